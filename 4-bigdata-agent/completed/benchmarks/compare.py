@@ -0,0 +1,68 @@
+"""
+Compare two benchmark reports produced by run_benchmarks.py.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<head>.json --threshold 10
+Exits with status 1 when any latency metric regressed by more than the threshold (percent).
+"""
+
+import sys
+import json
+import argparse
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+# 값이 클수록 좋은 지표 (처리량). 나머지는 작을수록 좋음 (지연 시간, 메모리)
+HIGHER_IS_BETTER = ("per_sec",)
+# 성능 지표가 아닌 카운터 (회귀 판정 제외)
+COUNTERS = {"graph.events", "event_queue.n"}
+
+def flatten(results, prefix=""):
+    """Flatten nested results into {"graph.total_ms": value}; summaries collapse to their p50."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict) and "p50" in value:
+            flat[path] = value["p50"]
+        elif isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+def compare(base, head, threshold):
+    base_flat, head_flat = flatten(base["results"]), flatten(head["results"])
+    regressions = []
+    print(f"{'metric':<60} {'base':>12} {'head':>12} {'change':>9}")
+    for metric in sorted(base_flat.keys() & head_flat.keys()):
+        old, new = base_flat[metric], head_flat[metric]
+        if not old: continue
+        change = (new - old) / old * 100
+        worse = -change if any(marker in metric for marker in HIGHER_IS_BETTER) else change
+        color = Colors.RED if worse > threshold else Colors.GREEN if worse < -threshold else ""
+        print(f"{color}{metric:<60} {old:>12.3f} {new:>12.3f} {change:>+8.1f}%{Colors.END if color else ''}")
+        if worse > threshold and metric not in COUNTERS:
+            regressions.append(metric)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON reports")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f: base = json.load(f)
+    with open(args.head, encoding="utf-8") as f: head = json.load(f)
+
+    print(f"base: {base['meta'].get('commit')}  head: {head['meta'].get('commit')}\n")
+    regressions = compare(base, head, args.threshold)
+    if regressions:
+        print(f"\n{Colors.RED}{len(regressions)} metric(s) regressed more than {args.threshold}%{Colors.END}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
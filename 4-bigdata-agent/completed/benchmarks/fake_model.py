@@ -0,0 +1,112 @@
+"""
+Scripted stand-in for BedrockModel so the graph can be benchmarked without AWS access.
+
+Each agent gets a script (list of turns). A turn is either plain text or a tool call; the model
+emits the same ConverseStream chunks Bedrock would (messageStart, contentBlockDelta, ... metadata).
+A turn with "unless" is skipped when that text appears in the conversation's first message.
+"""
+
+import json
+import time
+import uuid
+import asyncio
+from strands.models import Model
+
+PLAN = """# Plan
+
+## thought
+벤치마크용 고정 계획입니다.
+
+## title
+Benchmark run
+
+## steps
+### 1. Coder: Load data and compute summary
+- [ ] Read the description JSON files
+- [ ] Compute a simple aggregate
+
+### 2. Reporter: Write report
+- [ ] Summarize findings
+"""
+
+def text_turn(text):
+    return {"text": text}
+
+def tool_turn(name, tool_input):
+    return {"tool": name, "input": tool_input}
+
+DEFAULT_SCRIPTS = {
+    "coordinator": [text_turn("handoff_to_planner: 분석 요청을 계획 단계로 넘깁니다.")],
+    "planner": [{"reasoning": "사용자 요청을 단계별로 나눕니다. ", **text_turn(PLAN)}],
+    "supervisor": [
+        # 파이프라인 planning 으로 첫 Coder 단계가 이미 끝난 경우(supervisor 입력에 coder 결과 포함) 건너뜀
+        {**tool_turn("coder_agent_tool", {"task": "Load data and compute summary"}), "unless": "Response from coder"},
+        {**tool_turn("tracker_agent_tool", {"completed_agent": "coder", "completion_summary": "Loaded data and computed the aggregate"}), "unless": "Response from coder"},
+        text_turn("All steps are complete."),
+    ],
+    "coder": [
+        tool_turn("python_repl_tool", {"code": "total = sum(range(1000))\nprint(f'total={total}')"}),
+        text_turn("## Status\nSUCCESS\n\n## Completed Tasks\n- Computed total=499500 and saved the result."),
+    ],
+    "tracker": [text_turn(PLAN.replace("[ ]", "[x]", 2))],
+    "validator": [text_turn("Validation passed.")],
+    "reporter": [text_turn("Report written.")],
+}
+
+class ScriptedModel(Model):
+    """Model that replays a fixed per-agent script with optional simulated latency."""
+
+    def __init__(self, agent_name, scripts=None, first_token_latency=0.0, chunk_latency=0.0, chunk_size=16, model_id="scripted"):
+        self.agent_name = agent_name
+        self.script = (scripts or DEFAULT_SCRIPTS).get(agent_name, [text_turn("ok")])
+        self.first_token_latency = first_token_latency
+        self.chunk_latency = chunk_latency
+        self.chunk_size = chunk_size
+        self.config = {"model_id": model_id, "streaming": True}
+        self.calls = 0
+        self.stream_seconds = 0.0  # 모델 내부에서 보낸 시간 (노드 오버헤드 계산용)
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("ScriptedModel does not support structured output")
+
+    def _chunks(self, turn):
+        yield {"messageStart": {"role": "assistant"}}
+        if turn.get("reasoning"):
+            yield {"contentBlockDelta": {"delta": {"reasoningContent": {"text": turn["reasoning"]}}}}
+            yield {"contentBlockDelta": {"delta": {"reasoningContent": {"signature": "scripted"}}}}
+            yield {"contentBlockStop": {}}
+        if "tool" in turn:
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tooluse_{uuid.uuid4().hex[:12]}", "name": turn["tool"]}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(turn["input"], ensure_ascii=False)}}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "tool_use"
+        else:
+            text = turn["text"]
+            for start in range(0, len(text), self.chunk_size):
+                yield {"contentBlockDelta": {"delta": {"text": text[start:start + self.chunk_size]}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "end_turn"
+        yield {"messageStop": {"stopReason": stop_reason}}
+        output_tokens = max(1, len(json.dumps(turn, ensure_ascii=False)) // 4)
+        yield {"metadata": {"usage": {"inputTokens": 100, "outputTokens": output_tokens, "totalTokens": 100 + output_tokens}, "metrics": {"latencyMs": 0}}}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        first_message = json.dumps(messages[0]["content"], ensure_ascii=False) if messages else ""
+        turn = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        while turn.get("unless") and turn["unless"] in first_message and self.calls < len(self.script):
+            turn = self.script[self.calls]
+            self.calls += 1
+        started = time.perf_counter()
+        if self.first_token_latency: await asyncio.sleep(self.first_token_latency)
+        for chunk in self._chunks(turn):
+            if self.chunk_latency: await asyncio.sleep(self.chunk_latency)
+            self.stream_seconds += time.perf_counter() - started
+            yield chunk
+            started = time.perf_counter()
@@ -0,0 +1,103 @@
+"""
+Load generator for mcp_agents_server.py.
+
+Opens --clients MCP client sessions and has each one issue --calls tool calls back to back (with a
+progress callback), then reports throughput, call latency percentiles, progress notifications received
+and the server's own pool statistics (server_stats tool).
+
+By default the server runs in-process over memory streams with ScriptedModel in place of Bedrock
+(simulated --first_token_latency / --chunk_latency), so the numbers show the server's concurrency
+rather than model speed. --url targets a running server instead
+(python mcp_agents_server.py --transport http).
+
+Usage (from 4-bigdata-agent/completed):
+    python -m benchmarks.mcp_load --clients 8 --calls 4 --workers 4
+    python -m benchmarks.mcp_load --clients 8 --calls 4 --url http://127.0.0.1:8765/mcp
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from contextlib import AsyncExitStack, redirect_stdout, redirect_stderr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+async def _client(session, client_index, calls, tool, latencies, progress_counts, errors):
+    for call_index in range(calls):
+        progress = {"count": 0}
+        async def on_progress(_progress, _total, _message, progress=progress): progress["count"] += 1
+        started = time.perf_counter()
+        result = await session.call_tool(tool, {"task": f"Load test task {client_index}-{call_index}: compute a simple aggregate"}, progress_callback=on_progress)
+        latencies.append((time.perf_counter() - started) * 1000)
+        progress_counts.append(progress["count"])
+        if result.isError: errors.append(result.content[0].text if result.content else "error")
+
+async def run_load(args):
+    from mcp import ClientSession
+
+    latencies, progress_counts, errors = [], [], []
+    async with AsyncExitStack() as stack:
+        sessions = []
+        for _ in range(args.clients):
+            if args.url:
+                from mcp.client.streamable_http import streamablehttp_client
+                read_stream, write_stream, _ = await stack.enter_async_context(streamablehttp_client(args.url))
+                session = await stack.enter_async_context(ClientSession(read_stream, write_stream))
+                await session.initialize()
+            else:
+                from mcp.shared.memory import create_connected_server_and_client_session
+                from mcp_agents_server import app
+                session = await stack.enter_async_context(create_connected_server_and_client_session(app))
+            sessions.append(session)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_client(session, index, args.calls, args.tool, latencies, progress_counts, errors) for index, session in enumerate(sessions)))
+        elapsed = time.perf_counter() - started
+        server_stats = json.loads((await sessions[0].call_tool("server_stats", {})).content[0].text)
+
+    total_calls = args.clients * args.calls
+    return {
+        "clients": args.clients,
+        "calls": total_calls,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_calls_per_s": round(total_calls / elapsed, 2),
+        "latency_ms": {"p50": round(_percentile(latencies, 0.5), 1), "p95": round(_percentile(latencies, 0.95), 1), "max": round(max(latencies), 1)},
+        "progress_notifications_per_call": round(sum(progress_counts) / len(progress_counts), 1),
+        "server": server_stats,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP agent server load generator")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=4, help="Calls per client")
+    parser.add_argument("--tool", type=str, default="coder_agent")
+    parser.add_argument("--url", type=str, default=None, help="Streamable HTTP endpoint of a running server (default: in-process)")
+    parser.add_argument("--workers", type=int, default=None, help="MCP_MAX_WORKERS for the in-process server")
+    parser.add_argument("--first_token_latency", type=float, default=0.3)
+    parser.add_argument("--chunk_latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    if not args.url:
+        # 서버 모듈 임포트 전에 설정해야 적용됨
+        if args.workers: os.environ["MCP_MAX_WORKERS"] = str(args.workers)
+        os.environ.setdefault("MCP_MAX_PENDING", str(args.clients))
+        os.environ.setdefault("ARTIFACT_STORE_DIR", tempfile.mkdtemp(prefix="bench_artifacts_"))
+        from benchmarks.run_benchmarks import BenchmarkHarness
+        BenchmarkHarness(first_token_latency=args.first_token_latency, chunk_latency=args.chunk_latency).install()
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+        report = asyncio.run(run_load(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Offline measurement of latency-tiered model routing (utils/model_router.py).
+
+Runs the scripted graph with MODEL_ROUTING off and on. Each llm_type gets its own simulated
+time-to-first-token / inter-chunk latency, so the report shows what routing saves per node.
+
+Usage (from 4-bigdata-agent/completed):
+    python -m benchmarks.routing_benchmark --iterations 3
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+from contextlib import redirect_stdout, redirect_stderr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run_benchmarks import BenchmarkHarness, _run_graph_once, _summary
+from utils.model_router import model_router
+
+# llm_type -> (first_token_latency s, chunk_latency s). 상대적인 크기만 의미 있음
+TIER_LATENCY = {
+    "nova-micro": (0.05, 0.001),
+    "claude-haiku-4-5": (0.15, 0.002),
+    "claude-sonnet-3-7": (0.6, 0.006),
+    "claude-sonnet-4": (0.7, 0.006),
+    "claude-sonnet-4-5": (0.8, 0.007),
+}
+
+def run(harness, iterations, routing):
+    model_router.enabled = routing
+    runs = [asyncio.run(_run_graph_once(harness)) for _ in range(iterations)]
+    node_names = sorted({name for run in runs for name in run["nodes"]})
+    return {
+        "total_ms": _summary([run["total_ms"] for run in runs]),
+        "nodes_wall_ms": {name: _summary([run["nodes"][name]["wall_ms"] for run in runs if name in run["nodes"]]) for name in node_names},
+        "models": sorted({model.config["model_id"] for _, model in harness.models}),
+        "decisions": model_router.summary()["decisions"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Model routing benchmark (scripted models)")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--latency_budget", type=float, default=None, help="RUN_LATENCY_BUDGET_S to simulate")
+    args = parser.parse_args()
+
+    model_router.latency_budget_s = args.latency_budget
+    harness = BenchmarkHarness(latency_by_model=TIER_LATENCY)
+    harness.install()
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+        baseline = run(harness, args.iterations, routing=False)
+        routed = run(harness, args.iterations, routing=True)
+
+    report = {
+        "tier_latency": TIER_LATENCY,
+        "baseline": baseline,
+        "routed": routed,
+        "total_ms_saved_p50": baseline["total_ms"]["p50"] - routed["total_ms"]["p50"],
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
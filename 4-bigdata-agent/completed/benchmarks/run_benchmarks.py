@@ -0,0 +1,312 @@
+"""
+End-to-end performance benchmarks for the agent graph (no AWS access required).
+
+Drives build_graph() / StreamableGraph.stream_async with ScriptedModel in place of Bedrock and
+writes a JSON report that can be diffed between commits with benchmarks/compare.py.
+
+Usage (from 4-bigdata-agent/completed):
+    python -m benchmarks.run_benchmarks --iterations 5 --output benchmarks/results/$(git rev-parse --short HEAD).json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import platform
+import resource
+import statistics
+import subprocess
+from contextlib import redirect_stdout, redirect_stderr
+
+# 벤치마크는 실제 실행 시간을 측정해야 하므로 실행 캐시/카세트/의도 분류기는 끈 상태로 임포트 (스크립트 usage 로 토큰 보정값이 학습되지 않도록 보정도 끔)
+os.environ["EXECUTION_CACHE"] = "off"
+os.environ["BEDROCK_CASSETTE_MODE"] = "off"
+os.environ["INTENT_CLASSIFIER"] = "off"
+os.environ["TOKEN_CALIBRATION"] = "off"
+os.environ.setdefault("EVENT_LOG_DIR", tempfile.mkdtemp(prefix="bench_event_log_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_model import ScriptedModel
+from utils.strands_sdk_utils import strands_utils, FunctionNode
+from utils import event_queue
+from utils.event_log import EventLog
+from utils.terminal_renderer import TerminalRenderer
+from prompts.template import apply_prompt_template
+from tools import python_repl_tool as python_repl_module
+
+PROMPT_NAMES = ["coordinator", "planner", "supervisor", "coder", "validator", "reporter", "tracker", "summarization"]
+
+class BenchmarkHarness:
+    """Patches the model factory, node invocation and REPL so every phase can be timed."""
+
+    def __init__(self, first_token_latency=0.0, chunk_latency=0.0, latency_by_model=None):
+        self.first_token_latency = first_token_latency
+        self.chunk_latency = chunk_latency
+        self.latency_by_model = latency_by_model or {}  # llm_type -> (first_token_latency, chunk_latency)
+        self.models = []      # (created_at, ScriptedModel)
+        self.node_spans = []  # (name, start, end)
+        self.repl_spans = []  # (start, end)
+
+    def install(self):
+        harness = self
+
+        def get_model(**kwargs):
+            llm_type = kwargs.get("llm_type")
+            first_token_latency, chunk_latency = harness.latency_by_model.get(llm_type, (harness.first_token_latency, harness.chunk_latency))
+            model = ScriptedModel(
+                kwargs.get("agent_name", "agent"),
+                first_token_latency=first_token_latency,
+                chunk_latency=chunk_latency,
+                model_id=llm_type or "scripted",
+            )
+            harness.models.append((time.perf_counter(), model))
+            return model
+        strands_utils.get_model = staticmethod(get_model)
+
+        original_invoke = FunctionNode.invoke_async
+        async def timed_invoke(node, task=None, invocation_state=None, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original_invoke(node, task, invocation_state, **kwargs)
+            finally:
+                harness.node_spans.append((node.name, started, time.perf_counter()))
+        FunctionNode.invoke_async = timed_invoke
+
+        original_run = python_repl_module.repl.run
+        def timed_run(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original_run(*args, **kwargs)
+            finally:
+                harness.repl_spans.append((started, time.perf_counter()))
+        python_repl_module.repl.run = timed_run
+
+    def reset(self):
+        from graph.nodes import _global_node_states
+        _global_node_states.clear()
+        event_queue.clear_queue()
+        self.models.clear()
+        self.node_spans.clear()
+        self.repl_spans.clear()
+
+    def node_breakdown(self):
+        breakdown = {}
+        for name, start, end in self.node_spans:
+            model_seconds = sum(model.stream_seconds for created, model in self.models if start <= created <= end)
+            repl_seconds = sum(min(r_end, end) - max(r_start, start) for r_start, r_end in self.repl_spans if r_start < end and r_end > start)
+            breakdown[name] = {
+                "wall_ms": (end - start) * 1000,
+                "model_ms": model_seconds * 1000,
+                "tool_exec_ms": repl_seconds * 1000,
+                "overhead_ms": (end - start - model_seconds - repl_seconds) * 1000,
+            }
+        return breakdown
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "min": samples[0],
+        "max": samples[-1],
+        "n": len(samples),
+    }
+
+async def _run_graph_once(harness):
+    from graph.builder import build_graph
+
+    harness.reset()
+    started = time.perf_counter()
+    graph = build_graph()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    first_event_ms, event_count = None, 0
+    event_queue.queue_stats(reset=True)
+    stream_started = time.perf_counter()
+    async for _ in graph.stream_async({"request": "benchmark", "request_prompt": "Here is a user request: <user_request>benchmark</user_request>"}):
+        if first_event_ms is None: first_event_ms = (time.perf_counter() - stream_started) * 1000
+        event_count += 1
+    total_s = time.perf_counter() - stream_started
+
+    return {
+        "build_graph_ms": build_ms,
+        "time_to_first_event_ms": first_event_ms,
+        "total_ms": total_s * 1000,
+        "events": event_count,
+        "events_produced": event_queue.queue_stats()["put"],
+        "events_per_sec": event_count / total_s if total_s else 0.0,
+        "nodes": harness.node_breakdown(),
+    }
+
+def bench_graph(harness, iterations):
+    runs = [asyncio.run(_run_graph_once(harness)) for _ in range(iterations)]
+    node_names = sorted({name for run in runs for name in run["nodes"]})
+    return {
+        "build_graph_ms": _summary([run["build_graph_ms"] for run in runs]),
+        "time_to_first_event_ms": _summary([run["time_to_first_event_ms"] for run in runs]),
+        "total_ms": _summary([run["total_ms"] for run in runs]),
+        "events": runs[-1]["events"],
+        "events_produced": runs[-1]["events_produced"],
+        "events_per_sec": _summary([run["events_per_sec"] for run in runs]),
+        "nodes": {
+            name: {metric: _summary([run["nodes"][name][metric] for run in runs if name in run["nodes"]]) for metric in ("wall_ms", "model_ms", "tool_exec_ms", "overhead_ms")}
+            for name in node_names
+        },
+    }
+
+def bench_event_queue(n_events=200_000):
+    event = {"type": "agent_text_stream", "event_type": "text_chunk", "data": "토큰", "agent_name": "coder"}
+    event_queue.clear_queue()
+    started = time.perf_counter()
+    for _ in range(n_events): event_queue.put_event(event)
+    put_s = time.perf_counter() - started
+    started = time.perf_counter()
+    delivered = 0
+    while event_queue.has_events(flush=True):
+        event_queue.get_event(flush=True)
+        delivered += 1
+    drain_s = time.perf_counter() - started
+    return {"n": n_events, "delivered": delivered, "put_per_sec": n_events / put_s, "drain_per_sec": n_events / drain_s}
+
+def bench_event_log(n_events=50_000):
+    """Append throughput and a late subscriber's sequential (mmap) read from offset 0."""
+    log = EventLog("bench", root=tempfile.mkdtemp(prefix="bench_event_log_"), segment_bytes=1024 * 1024)
+    event = {"type": "agent_text_stream", "event_type": "text_chunk", "agent_name": "coder", "source": "coder_node", "data": "토큰 " * 8}
+    started = time.perf_counter()
+    for _ in range(n_events): log.append(event)
+    append_s = time.perf_counter() - started
+    started, offset, read = time.perf_counter(), 0, 0
+    while True:
+        events = log.read(offset, limit=5000)
+        if not events: break
+        read, offset = read + len(events), events[-1][0] + 1
+    read_s = time.perf_counter() - started
+    log.close()
+    return {"n": n_events, "append_per_sec": n_events / append_s, "replay_per_sec": read / read_s, "replayed": read, "segments": len(log.segments)}
+
+def bench_terminal_renderer(n_events=50_000):
+    """Events/sec of the display path with stdout going to a pipe: per-token flushing print vs. TerminalRenderer."""
+    events = [{"event_type": "text_chunk", "agent_name": ("coder", "planner", "supervisor")[i % 3], "data": "토큰 "} for i in range(n_events)]
+    events[::500] = [{"event_type": "tool_result", "tool_name": "python_repl_tool", "output": "Successfully executed||print(1)||" + "row\n" * 200}] * len(events[::500])
+
+    def run(render):
+        read_fd, write_fd = os.pipe()
+        def consume():
+            while os.read(read_fd, 1 << 16): pass
+        drain = threading.Thread(target=consume, daemon=True)
+        drain.start()
+        with os.fdopen(write_fd, "w", encoding="utf-8") as pipe:
+            started = time.perf_counter()
+            render(pipe)
+            elapsed = time.perf_counter() - started
+        drain.join()
+        os.close(read_fd)
+        return elapsed
+
+    def per_token_print(pipe):
+        for event in events:
+            if event["event_type"] == "text_chunk": print(f"\033[97m{event['data']}\033[0m", end="", flush=True, file=pipe)
+            else: print(f"\n[TOOL RESULT - {event['tool_name']}]\n{event['output']}", flush=True, file=pipe)
+
+    def buffered(pipe):
+        renderer = TerminalRenderer(stream=pipe)
+        for event in events: renderer.render(event)
+        renderer.flush()
+        buffered.writes = renderer.writes
+
+    baseline_s, renderer_s = run(per_token_print), run(buffered)
+    return {"n": n_events, "print_events_per_sec": n_events / baseline_s, "renderer_events_per_sec": n_events / renderer_s, "renderer_writes": buffered.writes}
+
+def bench_agent_construction(iterations):
+    samples = {}
+    for agent_name, kwargs in {
+        "coordinator": {"enable_reasoning": False},
+        "supervisor": {"prompt_cache_info": (True, "default")},
+    }.items():
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            strands_utils.get_agent(agent_name=agent_name, system_prompts=apply_prompt_template(prompt_name=agent_name, prompt_context={}), **kwargs)
+            timings.append((time.perf_counter() - started) * 1000)
+        samples[agent_name] = _summary(timings)
+    return samples
+
+def bench_prompt_templates(iterations):
+    context = {"USER_REQUEST": "benchmark request", "FULL_PLAN": "# Plan"}
+    results = {}
+    for prompt_name in PROMPT_NAMES:
+        started = time.perf_counter()
+        for _ in range(iterations): apply_prompt_template(prompt_name=prompt_name, prompt_context=context)
+        results[prompt_name] = {"us_per_call": (time.perf_counter() - started) / iterations * 1e6}
+    return results
+
+def bench_python_repl(iterations):
+    code = "import json, math\nprint(sum(math.sqrt(i) for i in range(10000)))"
+    cold_started = time.perf_counter()
+    python_repl_module.handle_python_repl_tool(code)
+    cold_ms = (time.perf_counter() - cold_started) * 1000
+    warm = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        python_repl_module.handle_python_repl_tool(code)
+        warm.append((time.perf_counter() - started) * 1000)
+    return {"cold_ms": cold_ms, "warm_ms": _summary(warm)}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent graph performance benchmarks")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--first_token_latency", type=float, default=0.0, help="Simulated model time-to-first-token (s)")
+    parser.add_argument("--chunk_latency", type=float, default=0.0, help="Simulated delay between stream chunks (s)")
+    parser.add_argument("--output", type=str, default=None, help="Where to write the JSON report (default: stdout only)")
+    args = parser.parse_args()
+
+    harness = BenchmarkHarness(args.first_token_latency, args.chunk_latency)
+    harness.install()
+
+    # 그래프/툴의 터미널 출력은 측정 대상이 아니므로 버림
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+        results = {
+            "graph": bench_graph(harness, args.iterations),
+            "event_queue": bench_event_queue(),
+            "terminal_renderer": bench_terminal_renderer(),
+            "event_log": bench_event_log(),
+            "agent_construction_ms": bench_agent_construction(args.iterations),
+            "apply_prompt_template": bench_prompt_templates(args.iterations * 20),
+            "python_repl_tool": bench_python_repl(args.iterations),
+        }
+
+    results["peak_rss_mb"] = {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "first_token_latency": args.first_token_latency,
+            "chunk_latency": args.chunk_latency,
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f: f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
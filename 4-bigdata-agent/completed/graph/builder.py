@@ -1,7 +1,13 @@
 import asyncio
 from strands.multiagent import GraphBuilder
-from utils.strands_sdk_utils import FunctionNode
+from utils.strands_sdk_utils import FunctionNode, SESSION_ID
 from utils.event_queue import has_events, get_event
+from utils.tracing import tracer
+from utils.usage_ledger import usage_ledger
+from utils.model_router import model_router
+from utils.token_estimator import calibration
+from utils.tool_registry import get_tool_registry
+from utils.event_log import EVENT_LOG, get_event_log
 from .nodes import (
     supervisor_node,
     coordinator_node,
@@ -14,6 +20,8 @@ class StreamableGraph:
     
     def __init__(self, graph):
         self.graph = graph
+        self.event_log = get_event_log(SESSION_ID) if EVENT_LOG else None
+        self.run_start_offset = None  # 이번 실행의 첫 이벤트 log offset (late subscriber 는 여기부터 읽음)
     
     async def invoke_async(self, task):
         """Original non-streaming invoke method."""
@@ -31,11 +39,12 @@ class StreamableGraph:
                 except asyncio.CancelledError: 
                     pass
     
-    async def _yield_pending_events(self):
-        """Yield any pending events from queue."""
-        while has_events():
-            event = get_event()
+    async def _yield_pending_events(self, flush=False):
+        """Yield any pending events from queue (flush=True also releases a text chunk still being coalesced)."""
+        while has_events(flush):
+            event = get_event(flush)
             if event: 
+                if self.event_log is not None: self.event_log.append(event)
                 yield event
     
     async def stream_async(self, task):
@@ -44,11 +53,17 @@ class StreamableGraph:
         # Step 1: Run graph backgound and put event into the global queue
         async def run_workflow():
             try:
-                return await self.graph.invoke_async(task)
+                with tracer.span("workflow", "workflow"):
+                    return await self.graph.invoke_async(task)
             except Exception as e:
                 print(f"Workflow error: {e}")
                 raise
         
+        usage_ledger.reset()
+        calibration.reset_stats()
+        model_router.reset()
+        if self.event_log is not None:
+            self.run_start_offset = self.event_log.append({"type": "workflow_start", "event_type": "workflow_start", "request": task.get("request", "")})
         workflow_task = asyncio.create_task(run_workflow())
         
         # Step 2: Consuming event in the global queue
@@ -59,10 +74,15 @@ class StreamableGraph:
                 await asyncio.sleep(0.005)
         finally:
             await self._cleanup_workflow(workflow_task)
-            async for event in self._yield_pending_events():
+            async for event in self._yield_pending_events(flush=True):
                 yield event
         
-        yield {"type": "workflow_complete", "message": "All events processed through global queue"}
+        for event in (
+            {"type": "usage_summary", "event_type": "usage_summary", **usage_ledger.summary(), "token_estimation": calibration.summary(), "tool_latency": get_tool_registry(SESSION_ID).summary()},
+            {"type": "workflow_complete", "message": "All events processed through global queue"},
+        ):
+            if self.event_log is not None: self.event_log.append(event)
+            yield event
 
 
 
@@ -1,5 +1,14 @@
+import os
 import logging
+import contextvars
+from collections.abc import MutableMapping
 from utils.strands_sdk_utils import strands_utils
+from utils.speculation import SpeculativeTask
+from utils.intent_classifier import intent_classifier
+from utils.plan_tracker import Plan, StreamingPlanParser, normalize_agent
+from utils.token_estimator import pack_context
+from utils.checkpoint import run_checkpoint
+from utils.dataset_profiler import dataset_profiler
 from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
 
@@ -25,13 +34,44 @@ def log_node_complete(node_name: str):
     print()  # Add newline before log
     logger.info(f"{Colors.GREEN}===== {node_name} completed ====={Colors.END}")
 
-# Global state storage for sharing between nodes
-_global_node_states = {}
+class _NodeStates(MutableMapping):
+    """
+    Global state storage for sharing between nodes and agent tools.
+    scoped() gives the calling context its own dict (one MCP tool call in mcp_agents_server.py), so
+    concurrent callers do not see each other's shared state; the graph run itself uses the default dict.
+    """
+
+    def __init__(self):
+        self._default = {}
+        self._scoped = contextvars.ContextVar("node_states", default=None)
+
+    def _states(self):
+        states = self._scoped.get()
+        return self._default if states is None else states
+
+    def scoped(self, states: dict):
+        """Use `states` for the rest of the calling context (run inside contextvars.copy_context())."""
+        return self._scoped.set(states)
+
+    def __getitem__(self, key): return self._states()[key]
+    def __setitem__(self, key, value): self._states()[key] = value
+    def __delitem__(self, key): del self._states()[key]
+    def __iter__(self): return iter(self._states())
+    def __len__(self): return len(self._states())
+
+_global_node_states = _NodeStates()
 
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 FULL_PLAN_FORMAT = "Here is full plan :\n\n<full_plan>\n{}\n</full_plan>\n\n*Please consider this to select the next step.*"
 CLUES_FORMAT = "Here is clues from {}:\n\n<clues>\n{}\n</clues>\n\n"
 
+HANDOFF_MARKER = "handoff_to_planner"
+# coordinator 응답이 handoff 마커로 시작하면 coordinator 스트리밍이 끝나기 전에 planner 를 미리 시작
+SPECULATIVE_PLANNER = os.environ.get("SPECULATIVE_PLANNER", "on").lower() in ("1", "on", "true")
+# plan 의 첫 단계(Coder)가 완성되면 planner 가 나머지 단계를 쓰는 동안 coder 실행 시작
+PIPELINED_PLANNING = os.environ.get("PIPELINED_PLANNING", "on").lower() in ("1", "on", "true")
+EARLY_STEP_FORMAT = "Here is the plan written so far:\n\n<full_plan>\n{}\n</full_plan>\n\nThe rest of the plan is still being written. Execute only this step now:\n\n<step>\n{}\n</step>"
+
 
 
 def should_handoff_to_planner(_):
@@ -58,6 +98,11 @@ async def coordinator_node(task=None, **kwargs):
 
     log_node_start("Coordinator")
 
+    resumed = _resumed_response("coordinator")
+    if resumed is not None:
+        log_node_complete("Coordinator")
+        return resumed
+
     # Extract user request from task (now passed as dictionary)
     if isinstance(task, dict):
         request = task.get("request", "")
@@ -66,6 +111,25 @@ async def coordinator_node(task=None, **kwargs):
         request = str(task) if task else ""
         request_prompt = request
 
+    # Store data directly in shared global storage
+    if 'shared' not in _global_node_states: _global_node_states['shared'] = {}
+    shared_state = _global_node_states['shared']
+
+    # 학습된 로컬 분류기가 handoff 를 확신하면 coordinator LLM 호출 생략
+    prediction = intent_classifier.predict(request)
+    if intent_classifier.should_skip_coordinator(prediction):
+        label, confidence, classify_ms = prediction
+        logger.info(f"{Colors.GREEN}Coordinator skipped - local intent classifier: {label} (confidence={confidence:.3f}, {classify_ms:.1f}ms){Colors.END}")
+        response = {"text": f"{HANDOFF_MARKER}: local intent classifier (confidence={confidence:.3f})"}
+        # planner 는 마지막 메시지를 입력으로 사용하므로 요청 프롬프트를 그대로 전달
+        shared_state['messages'] = [get_message_from_string(role="user", string=request_prompt, imgs=[])]
+        shared_state['request'] = request
+        shared_state['request_prompt'] = request_prompt
+        shared_state.setdefault('history', []).append({"agent":"coordinator", "message": response["text"]})
+        run_checkpoint.save("node:coordinator", shared_state, node="coordinator")
+        log_node_complete("Coordinator")
+        return response
+
     agent = strands_utils.get_agent(
         agent_name="coordinator",
         system_prompts=apply_prompt_template(prompt_name="coordinator", prompt_context={}), # apply_prompt_template(prompt_name="task_agent", prompt_context={"TEST": "sdsd"})
@@ -76,17 +140,29 @@ async def coordinator_node(task=None, **kwargs):
     )
 
     # Process streaming response and collect text in one pass
-    full_text = ""
-    async for event in strands_utils.process_streaming_response_yield(
-        agent, request_prompt, agent_name="coordinator", source="coordinator_node"
-    ):
-        if event.get("event_type") == "text_chunk": 
-            full_text += event.get("data", "")
+    full_text, speculation_decided = "", not SPECULATIVE_PLANNER
+    try:
+        async for event in strands_utils.process_streaming_response_yield(
+            agent, request_prompt, agent_name="coordinator", source="coordinator_node"
+        ):
+            if event.get("event_type") == "text_chunk": 
+                full_text += event.get("data", "")
+
+                # 마커는 응답 맨 앞에 오므로 앞부분만 보고 한 번만 판단
+                head = full_text.lstrip(' \n"')
+                if not speculation_decided and len(head) >= len(HANDOFF_MARKER):
+                    speculation_decided = True
+                    if head.startswith(HANDOFF_MARKER):
+                        planner_parts = [("message", request_prompt, 0, "head"), ("full_plan", FULL_PLAN_FORMAT.format(""), 1, "head")]
+                        _global_node_states['speculative_planner'] = SpeculativeTask(
+                            "planner", lambda emit: _stream_planner(request, planner_parts, emit=emit, request_prompt=request_prompt)
+                        )
+    except BaseException:
+        _discard_speculative_planner()
+        raise
     response = {"text": full_text}
-
-    # Store data directly in shared global storage
-    if 'shared' not in _global_node_states: _global_node_states['shared'] = {}
-    shared_state = _global_node_states['shared']
+    if HANDOFF_MARKER not in full_text: _discard_speculative_planner()
+    intent_classifier.log_decision(request, handoff=HANDOFF_MARKER in full_text, prediction=prediction)
 
     # Update shared global state
     shared_state['messages'] = agent.messages
@@ -97,6 +173,7 @@ async def coordinator_node(task=None, **kwargs):
     if 'history' not in shared_state: 
         shared_state['history'] = []
     shared_state['history'].append({"agent":"coordinator", "message": response["text"]})
+    run_checkpoint.save("node:coordinator", shared_state, node="coordinator")
 
     log_node_complete("Coordinator")
     # Return response only
@@ -104,6 +181,61 @@ async def coordinator_node(task=None, **kwargs):
 
 
 
+def _resumed_response(node_name):
+    """Recorded answer of a node that already completed in a resumed run (None if the node has to run)."""
+    if node_name not in _global_node_states.get('resumed_nodes', ()): return None
+    history = _global_node_states.get('shared', {}).get('history', [])
+    message = next((entry["message"] for entry in reversed(history) if entry.get("agent") == node_name), "")
+    logger.info(f"{Colors.GREEN}{node_name.capitalize()} skipped - completed before the checkpoint{Colors.END}")
+    return {"text": message}
+
+def _discard_speculative_planner():
+    speculation = _global_node_states.pop('speculative_planner', None)
+    if not speculation: return
+    speculation.discard()
+    # 이미 끝난 planner 가 시작한 파이프라인 coder 단계도 함께 중단
+    task = speculation.task
+    if task.done() and not task.cancelled() and task.exception() is None:
+        early_step = task.result().get("early_step")
+        if early_step: early_step.discard()
+
+async def _stream_planner(request, message_parts, emit=None, request_prompt=None):
+    """Build the planner agent and stream its plan. Does not touch shared state (safe to run speculatively)."""
+    agent = strands_utils.get_agent(
+        agent_name="planner",
+        system_prompts=apply_prompt_template(prompt_name="planner", prompt_context={"USER_REQUEST": request, "DATASET_PROFILES": dataset_profiler.prompt_block(request)}),
+        agent_type="claude-sonnet-4", # claude-sonnet-3-5-v-2, claude-sonnet-3-7
+        enable_reasoning=True,
+        prompt_cache_info=(False, None),  # enable prompt caching for reasoning agent, (False, None), (True, "default")
+        streaming=True,
+    )
+    message = pack_context(agent, message_parts, agent_name="planner")
+
+    # Process streaming response and collect text in one pass
+    full_text, parser, early_step = "", StreamingPlanParser() if PIPELINED_PLANNING else None, None
+    try:
+        async for event in strands_utils.process_streaming_response_yield(
+            agent, message, agent_name="planner", source="planner_node", emit=emit
+        ):
+            if event.get("event_type") == "text_chunk":
+                full_text += event.get("data", "")
+                if parser is None: continue
+                for step, block in parser.feed(event.get("data", "")):
+                    # 첫 단계가 Coder 이면 바로 실행 시작. 이후 단계는 supervisor 가 평소대로 지시
+                    if step.step_id == 1 and normalize_agent(step.agent) == "coder":
+                        plan_so_far = parser.text
+                        early_step = SpeculativeTask(
+                            "coder step 1", lambda emit: coder_agent_tool.run_coder_agent(
+                                request_prompt or request, plan_so_far, [("message", EARLY_STEP_FORMAT.format(plan_so_far, block), 0, "head")], emit=emit
+                            )
+                        )
+                    parser = None
+                    break
+    except BaseException:
+        if early_step: early_step.discard()
+        raise
+    return {"text": full_text, "early_step": early_step}
+
 async def planner_node(task=None, **kwargs):
 
     """Planner node that generates detailed plans for task execution."""
@@ -120,30 +252,32 @@ async def planner_node(task=None, **kwargs):
         logger.warning("No shared state found in global storage")
         return None, {"text": "No shared state available"}
 
-    agent = strands_utils.get_agent(
-        agent_name="planner",
-        system_prompts=apply_prompt_template(prompt_name="planner", prompt_context={"USER_REQUEST": request}),
-        agent_type="claude-sonnet-4", # claude-sonnet-3-5-v-2, claude-sonnet-3-7
-        enable_reasoning=True,
-        prompt_cache_info=(False, None),  # enable prompt caching for reasoning agent, (False, None), (True, "default")
-        streaming=True,
-    )
+    resumed = _resumed_response("planner")
+    if resumed is not None:
+        log_node_complete("Planner")
+        return resumed
 
-    full_plan, messages = shared_state.get("full_plan", ""), shared_state["messages"]
-    message = '\n\n'.join([messages[-1]["content"][-1]["text"], FULL_PLAN_FORMAT.format(full_plan)])
+    speculation = _global_node_states.pop('speculative_planner', None)
+    if speculation:
+        # coordinator 스트리밍 중에 시작된 planner 결과 사용 (버퍼링된 이벤트부터 순서대로 발행)
+        response = await speculation.commit()
+    else:
+        full_plan, messages = shared_state.get("full_plan", ""), shared_state["messages"]
+        message_parts = [("message", messages[-1]["content"][-1]["text"], 0, "head"), ("full_plan", FULL_PLAN_FORMAT.format(full_plan), 1, "head")]
+        response = await _stream_planner(request, message_parts, request_prompt=shared_state.get("request_prompt", request))
 
-    # Process streaming response and collect text in one pass
-    full_text = ""
-    async for event in strands_utils.process_streaming_response_yield(
-        agent, message, agent_name="planner", source="planner_node"
-    ):
-        if event.get("event_type") == "text_chunk": full_text += event.get("data", "")
-    response = {"text": full_text}
+    # 파이프라인으로 먼저 시작된 첫 단계는 planner 출력 뒤에 이어서 화면에 표시, 결과는 supervisor 가 병합
+    early_step = response.pop("early_step", None)
+    if early_step:
+        early_step.publish()
+        _global_node_states['early_step'] = early_step
 
     # Update shared global state
     shared_state['messages'] = [get_message_from_string(role="user", string=response["text"], imgs=[])]
     shared_state['full_plan'] = response["text"]
+    shared_state['plan'] = Plan.parse(response["text"])
     shared_state['history'].append({"agent":"planner", "message": response["text"]})
+    run_checkpoint.save("node:planner", shared_state, node="planner")
 
     log_node_complete("Planner")
     # Return response only
@@ -151,6 +285,24 @@ async def planner_node(task=None, **kwargs):
 
 
 
+async def _merge_early_step(shared_state, early_step):
+    """Wait for the pipelined first Coder step and merge it as if the supervisor had dispatched it."""
+    try:
+        response = await early_step.commit()
+    except Exception as e:
+        logger.warning(f"{Colors.YELLOW}Pipelined coder step failed ({e}) - supervisor will dispatch it again{Colors.END}")
+        return
+
+    shared_state['clues'] = '\n\n'.join([shared_state.get("clues", ""), CLUES_FORMAT.format("coder", response["text"])])
+    shared_state['history'].append({"agent":"coder", "message": response["text"]})
+    shared_state['messages'] = [get_message_from_string(role="user", string=RESPONSE_FORMAT.format("coder", response["text"]), imgs=[])]
+
+    plan = shared_state.get('plan') or Plan.parse(shared_state.get("full_plan", ""))
+    update = plan.apply_completion("coder", response["text"])
+    shared_state['plan'], shared_state['full_plan'] = plan, plan.to_markdown()
+    run_checkpoint.save("tool:coder (pipelined)", shared_state)
+    logger.info(f"{Colors.GREEN}Pipelined coder step merged ({early_step.head_start():.2f}s ahead of planner end, {update['reason']}){Colors.END}")
+
 async def supervisor_node(task=None, **kwargs):
     """Supervisor node that decides which agent should act next."""
     log_node_start("Supervisor")
@@ -164,6 +316,14 @@ async def supervisor_node(task=None, **kwargs):
         logger.warning("No shared state found in global storage")
         return None, {"text": "No shared state available"}
 
+    resumed = _resumed_response("supervisor")
+    if resumed is not None:
+        log_node_complete("Supervisor")
+        return resumed
+
+    early_step = _global_node_states.pop('early_step', None)
+    if early_step: await _merge_early_step(shared_state, early_step)
+
     agent = strands_utils.get_agent(
         agent_name="supervisor",
         system_prompts=apply_prompt_template(prompt_name="supervisor", prompt_context={}),
@@ -175,7 +335,12 @@ async def supervisor_node(task=None, **kwargs):
     )
 
     clues, full_plan, messages = shared_state.get("clues", ""), shared_state.get("full_plan", ""), shared_state["messages"]
-    message = '\n\n'.join([messages[-1]["content"][-1]["text"], FULL_PLAN_FORMAT.format(full_plan), clues])
+    # 컨텍스트 예산을 넘으면 우선순위 낮은 clues(오래된 앞부분)부터 잘라서 전송
+    message = pack_context(agent, [
+        ("message", messages[-1]["content"][-1]["text"], 0, "head"),
+        ("full_plan", FULL_PLAN_FORMAT.format(full_plan), 1, "head"),
+        ("clues", clues, 2, "tail"),
+    ], agent_name="supervisor")
 
     # Process streaming response and collect text in one pass
     full_text = ""
@@ -187,6 +352,7 @@ async def supervisor_node(task=None, **kwargs):
 
     # Update shared global state
     shared_state['history'].append({"agent":"supervisor", "message": response["text"]})
+    run_checkpoint.save("node:supervisor", shared_state, node="supervisor")
 
     log_node_complete("Supervisor")
     logger.info("Workflow completed")
@@ -2,7 +2,6 @@
 Entry point script for the Strands Agent Demo.
 """
 import os
-import shutil
 import asyncio
 import argparse
 from dotenv import load_dotenv
@@ -13,27 +12,29 @@ from graph.builder import build_graph
 load_dotenv()
 
 # Import event queue for unified event processing
-from utils.event_queue import clear_queue 
-
-def remove_artifact_folder(folder_path="./artifacts/"):
-    """
-    ./artifact/ 폴더가 존재하면 삭제하는 함수
-
-    Args:
-        folder_path (str): 삭제할 폴더 경로
-    """
-    if os.path.exists(folder_path):
-        print(f"'{folder_path}' 폴더를 삭제합니다...")
-        try:
-            shutil.rmtree(folder_path)
-            print(f"'{folder_path}' 폴더가 성공적으로 삭제되었습니다.")
-        except Exception as e: print(f"오류 발생: {e}")
+from utils.event_queue import clear_queue, queue_stats
+from utils.terminal_renderer import terminal_renderer
+from utils.execution_cache import get_execution_cache_stats
+from utils.response_cache import response_cache
+from utils.tool_output import get_tool_output_stats
+from utils.tracing import tracer
+from utils.model_router import model_router
+from utils.checkpoint import run_checkpoint
+from utils.artifact_store import artifact_store
+from utils.cell_quota import cell_quota
+from utils.dataset_profiler import dataset_profiler
+
+def _setup_execution(resume_run_id=None):
+    """Initialize execution environment (a fresh artifact namespace per run; on resume: restore the checkpointed shared state and artifacts)"""
+    from graph.nodes import _global_node_states
+    if resume_run_id:
+        checkpoint = run_checkpoint.resume(resume_run_id, _global_node_states)
+        print(f"Resuming run {resume_run_id} from checkpoint #{checkpoint['seq']} ({checkpoint['stage']})")
     else:
-        print(f"'{folder_path}' 폴더가 존재하지 않습니다.")
-
-def _setup_execution():
-    """Initialize execution environment"""
-    remove_artifact_folder()
+        run_id = run_checkpoint.start()
+        artifacts_dir = artifact_store.open_run(run_id)
+        print(f"Run id: {run_id}, artifacts: {artifacts_dir} (linked as ./artifacts)")
+        if run_checkpoint.enabled: print(f"Resume after a failure with --resume {run_id}")
     clear_queue()
     print("\n=== Starting Queue-Only Event Stream ===")
 
@@ -54,10 +55,12 @@ def _print_conversation_history():
 async def graph_streaming_execution(payload):
     """Execute full graph streaming workflow using new graph.stream_async method"""
 
-    _setup_execution()
+    _setup_execution(payload.get("resume_run_id"))
+    tracer.start_trace()
 
     # Get user query from payload
     user_query = payload.get("user_query", "")
+    dataset_profiler.warm_async(user_query)  # coordinator 가 도는 동안 새 데이터 버전 프로파일링
         
     # Build graph and use stream_async method
     graph = build_graph()
@@ -80,6 +83,17 @@ async def graph_streaming_execution(payload):
     #########################
     
     _print_conversation_history()
+    manifest = artifact_store.finalize()
+    print(f"Artifacts: {len(manifest.get('files', {}))} files in {artifact_store.run_dir()} ({artifact_store.stats})")
+    print(f"Execution cache: {get_execution_cache_stats()}")
+    print(f"LLM response cache: {response_cache.get_stats()}")
+    print(f"Tool output compaction: {get_tool_output_stats()}")
+    print(f"Cell quota: {cell_quota.summary()}")
+    print(f"Dataset profiles: {dataset_profiler.get_stats()}")
+    print(f"Event queue: {queue_stats(reset=True)}")
+    if graph.event_log is not None:
+        print(f"Event log: {graph.event_log.directory} (offsets {graph.run_start_offset}-{graph.event_log.next_offset - 1}, replay with python -m utils.event_log --session {graph.event_log.session_id} --from_offset {graph.run_start_offset})")
+    if tracer.enabled: tracer.export(os.environ.get("TRACE_DIR", "./traces"))
     print("=== Queue-Only Event Stream Complete ===")
 
 
@@ -88,15 +102,38 @@ if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Strands Agent Demo')
     parser.add_argument('--user_query', type=str, help='User query for the agent')
+    parser.add_argument('--cassette_mode', type=str, choices=['off', 'record', 'replay'], help='Record Bedrock streams to a cassette or replay them offline')
+    parser.add_argument('--cassette_path', type=str, help='Cassette file (JSONL) for record/replay')
+    parser.add_argument('--cassette_timing', type=str, choices=['original', 'zero'], help='Replay with recorded latency or as fast as possible')
+    parser.add_argument('--trace_dir', type=str, help='Enable tracing spans and export JSONL + Chrome trace files to this folder')
+    parser.add_argument('--model_routing', action='store_true', help='Route agents to latency-tiered models by role, prompt size and latency budget')
+    parser.add_argument('--latency_budget', type=float, help='Per-run latency budget in seconds used by model routing')
+    parser.add_argument('--resume', type=str, metavar='RUN_ID', help='Continue a failed run from its last checkpoint')
     
     args, unknown = parser.parse_known_args()
 
+    # Cassette settings are read by strands_utils.get_model via environment variables
+    if args.cassette_mode: os.environ["BEDROCK_CASSETTE_MODE"] = args.cassette_mode
+    if args.cassette_path: os.environ["BEDROCK_CASSETTE_PATH"] = args.cassette_path
+    if args.cassette_timing: os.environ["BEDROCK_CASSETTE_TIMING"] = args.cassette_timing
+    if args.trace_dir:
+        os.environ["TRACE_DIR"] = args.trace_dir
+        tracer.enabled = True
+    if args.model_routing: model_router.enabled = True
+    if args.latency_budget: model_router.latency_budget_s = args.latency_budget
+
     #########################
     ## modification START  ##
     #########################
 
     # Use argparse values if provided, otherwise use predefined values
-    if args.user_query:
+    if args.resume:
+        # 요청은 checkpoint 의 shared state 에서 복원
+        payload = {
+            "user_query": run_checkpoint.load(args.resume)["shared_state"].get("request", ""),
+            "resume_run_id": args.resume,
+        }
+    elif args.user_query:
         payload = {
             "user_query": args.user_query,
         }
@@ -120,11 +157,10 @@ if __name__ == "__main__":
     ## modification END    ##
     #########################
 
-    remove_artifact_folder()
-
     # Use full graph streaming execution for real-time streaming with graph structure
     async def run_streaming():
-        async for event in graph_streaming_execution(payload):
-            strands_utils.process_event_for_display(event)
+        async with terminal_renderer.running():
+            async for event in graph_streaming_execution(payload):
+                strands_utils.process_event_for_display(event)
 
     asyncio.run(run_streaming())
\ No newline at end of file
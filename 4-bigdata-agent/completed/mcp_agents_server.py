@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+MCP server exposing the Coder, Validator, Reporter and Tracker agent tools.
+
+exp/mcp_all_agents_server.py called the synchronous handle_*_agent_tool functions (which block on
+asyncio.run of a whole sub-agent) directly inside `async def call_tool`, so one call blocked the
+server's event loop and every other client. Here each call runs on a bounded worker pool
+(MCP_MAX_WORKERS threads); at most MCP_MAX_PENDING calls may wait for a worker, further calls are
+rejected with a "server busy" error instead of queueing without limit.
+
+Per-call isolation: every call runs in its own contextvars context with its own graph node state
+(_global_node_states.scoped), event sink and artifact namespace (artifact_store.enter_run). Calls that
+pass the same `run_id` continue that run (clues, history and artifacts carry over) and are executed one
+at a time; without a run_id every call is a fresh run.
+
+Progress: when the client sends a progressToken, the sub-agent's event stream (text chunks, tool
+results, python_repl_tool output) is turned into MCP progress notifications, at most one per
+MCP_PROGRESS_INTERVAL seconds.
+
+Usage (from 4-bigdata-agent/completed):
+    python mcp_agents_server.py                                   # stdio (one client)
+    python mcp_agents_server.py --transport http --port 8765      # streamable HTTP, many clients (/mcp)
+    python -m benchmarks.mcp_load --clients 8 --calls 4           # load generator
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+import threading
+import contextlib
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+from mcp.server import Server
+from mcp.types import Tool, TextContent
+
+load_dotenv()
+
+from graph.nodes import _global_node_states
+from utils.event_queue import set_event_sink
+from utils.artifact_store import RUN_ID_PATTERN, artifact_store
+from utils.tool_registry import LatencyHistogram
+from utils.common_utils import get_message_from_string
+from tools.coder_agent_tool import handle_coder_agent_tool
+from tools.validator_agent_tool import handle_validator_agent_tool
+from tools.reporter_agent_tool import handle_reporter_agent_tool
+from tools.tracker_agent_tool import handle_tracker_agent_tool
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MCP_MAX_WORKERS = int(os.environ.get("MCP_MAX_WORKERS", 4))
+MCP_MAX_PENDING = int(os.environ.get("MCP_MAX_PENDING", 16))
+MCP_MAX_RUNS = int(os.environ.get("MCP_MAX_RUNS", 64))
+MCP_PROGRESS_INTERVAL = float(os.environ.get("MCP_PROGRESS_INTERVAL", 0.5))
+PROGRESS_MESSAGE_CHARS = 200
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+RUN_PROPERTIES = {
+    "run_id": {
+        "type": "string",
+        "description": "Optional run to continue (shares clues, history and artifacts with earlier calls of the same run_id)",
+        "pattern": RUN_ID_PATTERN.pattern,
+    },
+    "full_plan": {
+        "type": "string",
+        "description": "Optional plan the agent should follow"
+    },
+}
+
+def _task_tool(name, description, task_description):
+    return Tool(
+        name=name,
+        description=description,
+        inputSchema={
+            "type": "object",
+            "properties": {"task": {"type": "string", "description": task_description}, **RUN_PROPERTIES},
+            "required": ["task"]
+        }
+    )
+
+TOOLS = [
+    _task_tool("coder_agent", "Execute Python code and bash commands for data analysis, calculations, and system operations.", "The coding task to execute"),
+    _task_tool("validator_agent", "Validate numerical calculations and generate citation metadata for reports.", "The validation task"),
+    _task_tool("reporter_agent", "Generate comprehensive reports in docx format based on analysis results.", "The reporting task"),
+    Tool(
+        name="tracker_agent",
+        description="Track and update task completion status.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "completed_agent": {"type": "string", "description": "Name of the agent that completed"},
+                "completion_summary": {"type": "string", "description": "Summary of what was completed"},
+                **RUN_PROPERTIES,
+            },
+            "required": ["completed_agent", "completion_summary"]
+        }
+    ),
+    Tool(
+        name="server_stats",
+        description="Worker pool utilisation and per-tool latency of this MCP server.",
+        inputSchema={"type": "object", "properties": {}}
+    ),
+]
+
+HANDLERS = {
+    "coder_agent": lambda arguments: handle_coder_agent_tool(arguments["task"]),
+    "validator_agent": lambda arguments: handle_validator_agent_tool(arguments["task"]),
+    "reporter_agent": lambda arguments: handle_reporter_agent_tool(arguments["task"]),
+    "tracker_agent": lambda arguments: handle_tracker_agent_tool(arguments["completed_agent"], arguments["completion_summary"]),
+}
+
+class ServerBusy(Exception):
+    pass
+
+class AgentCallPool:
+    """Bounded worker pool running the blocking agent handlers, with per-run state and latency stats."""
+
+    def __init__(self, max_workers: int = MCP_MAX_WORKERS, max_pending: int = MCP_MAX_PENDING, max_runs: int = MCP_MAX_RUNS):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_runs = max_runs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-agent")
+        self.runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # run_id -> {"states", "lock", "calls"}
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.queue_wait = LatencyHistogram()
+        self.stats = {"calls": 0, "rejected": 0, "failed": 0, "running": 0, "waiting": 0}
+        self._lock = threading.Lock()
+
+    def _run(self, run_id: str) -> Dict[str, Any]:
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                run = self.runs[run_id] = {"states": {}, "lock": threading.Lock(), "calls": 0}
+                # 실행 중이거나 대기 중인 호출이 있는 run 은 제외하고 오래된 run 부터 제거
+                idle = [key for key, entry in self.runs.items() if entry["calls"] == 0 and not entry["lock"].locked() and key != run_id]
+                for key in idle[:max(0, len(self.runs) - self.max_runs)]: del self.runs[key]
+            else:
+                self.runs.move_to_end(run_id)
+            run["calls"] += 1
+            return run
+
+    @staticmethod
+    def _prepare_state(states: Dict[str, Any], arguments: Dict[str, Any]):
+        """Shared state the handlers expect, with this call's task as the latest message."""
+        task = arguments.get("task") or arguments.get("completion_summary", "")
+        shared_state = states.setdefault("shared", {
+            "request": task,
+            "request_prompt": f"Here is a user request: <user_request>{task}</user_request>",
+            "full_plan": "",
+            "clues": "",
+            "history": [],
+        })
+        if arguments.get("full_plan"):
+            shared_state["full_plan"] = arguments["full_plan"]
+            shared_state.pop("plan", None)
+        shared_state["messages"] = [get_message_from_string(role="user", string=task, imgs=[])]
+
+    def _invoke(self, name, arguments, run_id, sink, submitted):
+        """Runs on a worker thread inside a copied context: scope state, events and artifacts to this call."""
+        waited_ms = (time.monotonic() - submitted) * 1000
+        with self._lock:
+            self.stats["waiting"] -= 1
+            self.stats["running"] += 1
+            self.queue_wait.add(waited_ms)
+        run = self._run(run_id)
+        started, ok = time.monotonic(), False
+        try:
+            with run["lock"]:  # 같은 run_id 의 호출은 순서대로 (shared state 를 이어서 사용)
+                _global_node_states.scoped(run["states"])
+                set_event_sink(sink)
+                artifact_store.enter_run(run_id)
+                self._prepare_state(run["states"], arguments)
+                result = HANDLERS[name](arguments)
+            ok = not str(result).startswith("Error")
+            return result
+        finally:
+            with self._lock:
+                run["calls"] -= 1
+                self.stats["running"] -= 1
+                if not ok: self.stats["failed"] += 1
+                self.latency.setdefault(name, LatencyHistogram()).add((time.monotonic() - started) * 1000, ok=ok)
+
+    async def submit(self, name: str, arguments: Dict[str, Any], run_id: str, sink) -> str:
+        with self._lock:
+            if self.stats["waiting"] >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise ServerBusy(f"Server busy: {self.stats['running']} calls running, {self.stats['waiting']} waiting (MCP_MAX_PENDING={self.max_pending})")
+            self.stats["calls"] += 1
+            self.stats["waiting"] += 1
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, context.run, self._invoke, name, arguments, run_id, sink, time.monotonic())
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                **self.stats,
+                "runs": len(self.runs),
+                "queue_wait": self.queue_wait.summary(),
+                "tools": {name: histogram.summary() for name, histogram in sorted(self.latency.items())},
+            }
+
+class ProgressReporter:
+    """Turns sub-agent events (put from the worker thread) into rate-limited MCP progress notifications."""
+
+    def __init__(self, session, progress_token, loop):
+        self.session = session
+        self.progress_token = progress_token
+        self.loop = loop
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.message = ""
+        self.count = 0
+        self.sent = 0
+        self._last_agent = None
+        self._announced_tools = set()
+
+    def sink(self, event):
+        """Event sink for the worker thread (utils.event_queue.set_event_sink)."""
+        if self.progress_token is None: return  # 진행 상황을 요청하지 않은 호출 - 버림
+        self.loop.call_soon_threadsafe(self.events.put_nowait, event)
+
+    def _add(self, event):
+        """Append the event to the rolling progress message (last PROGRESS_MESSAGE_CHARS characters)."""
+        self.count += 1
+        agent, event_type = event.get("agent_name") or "agent", event.get("event_type")
+        if event_type == "text_chunk":
+            text = event.get("data", "") if agent == self._last_agent else f"\n[{agent}] {event.get('data', '')}"
+        elif event_type == "tool_use" and event.get("tool_id") not in self._announced_tools:
+            self._announced_tools.add(event.get("tool_id"))  # tool_use 는 입력이 스트리밍되는 동안 여러 번 옴
+            text = f"\n[{agent}] calling {event.get('tool_name', 'tool')}"
+        elif event_type == "tool_progress":
+            text = f"\n[{agent}] {event.get('tool_name', 'tool')}: {event.get('data', '')}"
+        elif event_type == "tool_result":
+            text = f"\n[{agent}] {event.get('tool_name', 'tool')} finished ({event.get('status', 'success')})"
+        else:
+            return
+        self._last_agent = agent if event_type == "text_chunk" else None
+        self.message = (self.message + text)[-PROGRESS_MESSAGE_CHARS:]
+
+    async def pump(self):
+        """Drain events and send at most one notification per MCP_PROGRESS_INTERVAL (plus a final one)."""
+        if self.progress_token is None: return
+        done, sent_count = False, 0
+        while not done:
+            event = await self.events.get()
+            while True:
+                if event is None:
+                    done = True
+                    break
+                self._add(event)
+                try: event = self.events.get_nowait()
+                except asyncio.QueueEmpty: break
+            if self.count > sent_count:
+                await self._send()
+                sent_count = self.count
+            if not done: await asyncio.sleep(MCP_PROGRESS_INTERVAL)
+
+    async def _send(self):
+        try:
+            await self.session.send_progress_notification(self.progress_token, float(self.count), message=self.message.strip() or None)
+            self.sent += 1
+        except Exception as e:  # 클라이언트 연결이 끊겨도 작업은 계속
+            logger.debug(f"Progress notification failed: {e}")
+
+    def close(self):
+        self.events.put_nowait(None)
+
+agent_pool = AgentCallPool()
+app = Server("bedrock-agents")
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List all available agent tools"""
+    return TOOLS
+
+@app.call_tool()
+async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+    """Execute requested tool on the worker pool (the event loop stays free for other calls)"""
+    if name == "server_stats":
+        return [TextContent(type="text", text=json.dumps(agent_pool.summary(), ensure_ascii=False))]
+    if name not in HANDLERS:
+        raise ValueError(f"Unknown tool: {name}")
+
+    context = app.request_context
+    progress_token = context.meta.progressToken if context.meta else None
+    run_id = arguments.get("run_id") or f"mcp-{uuid.uuid4().hex[:12]}"
+    if not RUN_ID_PATTERN.match(run_id):
+        raise ValueError(f"Invalid run_id {run_id!r}: use 1-64 letters, digits, '_' or '-'")
+    reporter = ProgressReporter(context.session, progress_token, asyncio.get_running_loop())
+    pump = asyncio.create_task(reporter.pump())
+    started = time.monotonic()
+    try:
+        result = await agent_pool.submit(name, arguments, run_id, reporter.sink)
+    finally:
+        reporter.close()
+        await pump
+    logger.info(f"{Colors.GREEN}{name} ({run_id}) finished in {time.monotonic() - started:.1f}s, {reporter.count} events, {reporter.sent} progress notifications{Colors.END}")
+    return [TextContent(type="text", text=f"{result}\n\n[run_id: {run_id}]")]
+
+async def run_stdio():
+    from mcp.server.stdio import stdio_server
+
+    async with stdio_server() as (read_stream, write_stream):
+        await app.run(read_stream, write_stream, app.create_initialization_options())
+
+def run_http(host: str, port: int):
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+
+    session_manager = StreamableHTTPSessionManager(app=app)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        async with session_manager.run():
+            yield
+
+    uvicorn.run(Starlette(routes=[Mount("/mcp", app=session_manager.handle_request)], lifespan=lifespan), host=host, port=port, log_level="warning")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP server for the agent tools")
+    parser.add_argument("--transport", type=str, choices=["stdio", "http"], default="stdio")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.transport == "http": run_http(args.host, args.port)
+    else: asyncio.run(run_stdio())
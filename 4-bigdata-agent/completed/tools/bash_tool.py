@@ -1,8 +1,13 @@
+import os
+import signal
 import logging
+import threading
 import subprocess
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from tools.decorators import log_io
+from utils.artifact_store import artifact_store
+from utils.cell_quota import cell_quota
 
 
 # Simple logger setup
@@ -31,6 +36,42 @@ class Colors:
     RED = '\033[91m'
     END = '\033[0m'
 
+def _run_command(cmd):
+    """Run a shell command under the per-cell quota (utils/cell_quota.py). Returns (returncode, stdout, stderr, quota message)."""
+    with cell_quota.slot():
+        cgroup_path = cell_quota.create_cgroup()
+        try:
+            process = subprocess.Popen(
+                cmd, shell=True, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                start_new_session=True, preexec_fn=cell_quota.preexec(cgroup_path), env=cell_quota.child_env()
+            )
+            output, lock, exceeded = {"stdout": [], "stderr": [], "bytes": 0}, threading.Lock(), threading.Event()
+
+            def pump(pipe, stream):
+                # CELL_MAX_OUTPUT_MB 를 넘으면 읽기를 멈추고 프로세스 그룹 종료
+                for chunk in iter(lambda: pipe.read(65536), ""):
+                    with lock:
+                        output["bytes"] += len(chunk)
+                        if output["bytes"] > cell_quota.max_output_bytes: exceeded.set()
+                        else: output[stream].append(chunk)
+                    if exceeded.is_set():
+                        try: os.killpg(process.pid, signal.SIGKILL)
+                        except (ProcessLookupError, PermissionError): pass
+                        break
+                pipe.close()
+
+            readers = [threading.Thread(target=pump, args=(process.stdout, "stdout"), daemon=True),
+                       threading.Thread(target=pump, args=(process.stderr, "stderr"), daemon=True)]
+            for reader in readers: reader.start()
+            for reader in readers: reader.join()
+            returncode = process.wait()
+            stdout, stderr = "".join(output["stdout"]), "".join(output["stderr"])
+            if exceeded.is_set(): stdout = stdout[-2000:]  # 에이전트에게는 마지막 부분만 전달
+            quota_message = cell_quota.explain(returncode, stderr, exceeded.is_set(), cgroup_path) if returncode != 0 or exceeded.is_set() else None
+            return returncode, stdout, stderr, quota_message
+        finally:
+            cell_quota.remove_cgroup(cgroup_path)
+
 @log_io
 def handle_bash_tool(cmd: Annotated[str, "The bash command to be executed."]):
     """Use this to execute bash command and do necessary operations."""
@@ -38,20 +79,19 @@ def handle_bash_tool(cmd: Annotated[str, "The bash command to be executed."]):
     print()  # Add newline before log
     logger.info(f"\n{Colors.GREEN}Executing Bash: {cmd}{Colors.END}")
     try:
-        # Execute the command and capture output
-        result = subprocess.run(
-            cmd, shell=True, check=True, text=True, capture_output=True
-        )
+        # Execute the command and capture output (./artifacts -> 현재 run 디렉토리)
+        returncode, stdout, stderr, quota_message = _run_command(artifact_store.resolve_paths(cmd))
+        if returncode != 0 or quota_message:
+            # If command fails, return error information
+            quota_line = f"{quota_message}\n" if quota_message else ""
+            error_message = f"Command failed with exit code {returncode}.\n{quota_line}Stdout: {stdout}\nStderr: {stderr}"
+            logger.error(f"{Colors.RED}Command failed: {returncode} {quota_message or ''}{Colors.END}")
+            return error_message
+
         # Return stdout as the result
-        results = "||".join([cmd, result.stdout])
+        results = "||".join([cmd, stdout])
         return results + "\n"
 
-    except subprocess.CalledProcessError as e:
-        # If command fails, return error information
-        error_message = f"Command failed with exit code {e.returncode}.\nStdout: {e.stdout}\nStderr: {e.stderr}"
-        logger.error(f"{Colors.RED}Command failed: {e.returncode}{Colors.END}")
-        return error_message
-
     except Exception as e:
         # Catch any other exceptions
         error_message = f"Error executing command: {str(e)}"
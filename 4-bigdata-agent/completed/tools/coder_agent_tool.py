@@ -3,8 +3,12 @@ import asyncio
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from utils.strands_sdk_utils import strands_utils
+from utils.checkpoint import run_checkpoint
+from utils.dataset_profiler import dataset_profiler
+from utils.token_estimator import pack_context
 from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
+from tools.decorators import log_io
 from tools import python_repl_tool, bash_tool, glue_bigdata_tool
 
 # Simple logger setup
@@ -39,6 +43,7 @@ class Colors:
     END = '\033[0m'
 
 
+@log_io
 def handle_coder_agent_tool(task: Annotated[str, "The coding task or question that needs to be executed by the coder agent."]):
     """
     Execute Python code and bash commands using a specialized coder agent.
@@ -68,29 +73,10 @@ def handle_coder_agent_tool(task: Annotated[str, "The coding task or question th
     request_prompt, full_plan = shared_state.get("request_prompt", ""), shared_state.get("full_plan", "")
     clues, messages = shared_state.get("clues", ""), shared_state.get("messages", [])
 
-    # Create coder agent with specialized tools using consistent pattern
-    coder_agent = strands_utils.get_agent(
-        agent_name="coder",
-        system_prompts=apply_prompt_template(prompt_name="coder", prompt_context={"USER_REQUEST": request_prompt, "FULL_PLAN": full_plan}),
-        agent_type="claude-sonnet-3-7", # claude-sonnet-3-5-v-2, claude-sonnet-3-7, claude-sonnet-4
-        enable_reasoning=False,
-        tools=[python_repl_tool, bash_tool, glue_bigdata_tool],
-        streaming=True  # Enable streaming for consistency
-    )
-
-    # Prepare message with context if available
-    message = '\n\n'.join([messages[-1]["content"][-1]["text"], clues])
+    # Prepare message with context if available (packed to the coder's context budget in run_coder_agent)
+    message_parts = [("message", messages[-1]["content"][-1]["text"], 0, "head"), ("clues", clues, 1, "tail")]
 
-    # Process streaming response and collect text in one pass
-    async def process_coder_stream():
-        full_text = ""
-        async for event in strands_utils.process_streaming_response_yield(
-            coder_agent, message, agent_name="coder", source="coder_tool"
-        ):
-            if event.get("event_type") == "text_chunk": full_text += event.get("data", "")
-        return {"text": full_text}
-
-    response = asyncio.run(process_coder_stream())
+    response = asyncio.run(run_coder_agent(request_prompt, full_plan, message_parts))
     result_text = response['text']
 
     # Update clues
@@ -105,11 +91,33 @@ def handle_coder_agent_tool(task: Annotated[str, "The coding task or question th
     shared_state['clues'] = clues
     shared_state['history'] = history
 
+    run_checkpoint.save("tool:coder", shared_state)
     logger.info(f"\n{Colors.GREEN}Coder Agent Tool completed successfully{Colors.END}")
     return result_text
 
 
 
+async def run_coder_agent(request_prompt, full_plan, message_parts, emit=None):
+    """Run the coder agent on (name, text, priority, keep) message parts. Does not touch shared state (also used for pipelined plan steps)."""
+    # Create coder agent with specialized tools using consistent pattern
+    coder_agent = strands_utils.get_agent(
+        agent_name="coder",
+        system_prompts=apply_prompt_template(prompt_name="coder", prompt_context={"USER_REQUEST": request_prompt, "FULL_PLAN": full_plan, "DATASET_PROFILES": dataset_profiler.prompt_block(request_prompt)}),
+        agent_type="claude-sonnet-3-7", # claude-sonnet-3-5-v-2, claude-sonnet-3-7, claude-sonnet-4
+        enable_reasoning=False,
+        tools=[python_repl_tool, bash_tool, glue_bigdata_tool],
+        streaming=True  # Enable streaming for consistency
+    )
+    message = pack_context(coder_agent, message_parts, agent_name="coder")
+
+    # Process streaming response and collect text in one pass
+    full_text = ""
+    async for event in strands_utils.process_streaming_response_yield(
+        coder_agent, message, agent_name="coder", source="coder_tool", emit=emit
+    ):
+        if event.get("event_type") == "text_chunk": full_text += event.get("data", "")
+    return {"text": full_text}
+
 # Function name must match tool name
 def coder_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
     tool_use_id = tool["toolUseId"]
@@ -1,6 +1,7 @@
 import logging
 import functools
 from typing import Any, Callable, Type, TypeVar
+from utils.tracing import tracer
 
 # Simple logger setup
 logger = logging.getLogger(__name__)
@@ -24,10 +25,19 @@ def log_io(func: Callable) -> Callable:
         The wrapped function with input/output logging
     """
 
+    tool_name = func.__name__.removeprefix("handle_")
+    kind = "agent_tool" if tool_name.endswith("_agent_tool") else "tool"
+
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
-        # Execute the function
-        result = func(*args, **kwargs)
+        # Execute the function inside a tracing span (no-op unless TRACING=on)
+        with tracer.span(tool_name, kind) as span:
+            result = func(*args, **kwargs)
+            if span is not None:
+                span.set(
+                    input_chars=sum(len(str(value)) for value in [*args, *kwargs.values()]),
+                    output_chars=len(str(result)),
+                )
 
         # Note: Tool results are now handled through Strands SDK message wrapper
         # No need to put events in queue here
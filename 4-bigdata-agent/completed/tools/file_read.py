@@ -0,0 +1,17 @@
+from typing import Any
+from strands.types.tools import ToolResult, ToolUse
+from strands_tools import file_read as strands_file_read
+from utils.artifact_store import artifact_store
+
+# strands_tools.file_read 와 같은 스펙 - 에이전트 프롬프트와 tool 이름은 그대로 유지
+TOOL_SPEC = strands_file_read.TOOL_SPEC
+PATH_FIELDS = ("path", "comparison_path")
+
+# Function name must match tool name
+def file_read(tool: ToolUse, **kwargs: Any) -> ToolResult:
+    """strands_tools.file_read with './artifacts' resolved to the current run's directory (like python_repl_tool / bash_tool),
+    so concurrent runs and MCP calls (no ./artifacts link) read their own files."""
+    tool_input = dict(tool["input"])
+    for field in PATH_FIELDS:
+        if isinstance(tool_input.get(field), str): tool_input[field] = artifact_store.resolve_paths(tool_input[field])
+    return strands_file_read.file_read({**tool, "input": tool_input}, **kwargs)
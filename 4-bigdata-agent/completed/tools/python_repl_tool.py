@@ -1,9 +1,20 @@
+import os
 import sys
+import time
+import queue
+import signal
 import logging
+import threading
 import subprocess
+from datetime import datetime
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from tools.decorators import log_io
+from utils.event_queue import put_event
+from utils.execution_cache import execution_cache
+from utils.artifact_store import artifact_store
+from utils.cell_quota import cell_quota
+from utils.speculation import current_speculation
 
 
 # Simple logger setup
@@ -27,6 +38,12 @@ TOOL_SPEC = {
     }
 }
 
+# Progress streaming settings (tool_progress events)
+PROGRESS_FLUSH_INTERVAL = 0.5   # 최소 이벤트 간격 (초), 이 시간 동안 들어온 라인은 하나의 이벤트로 합침
+PROGRESS_MAX_CHARS = 4000       # 이벤트 하나에 담는 최대 문자 수, 초과분은 생략 표시
+PROGRESS_MAX_LINES = 200        # 이벤트 하나에 담는 최대 라인 수
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 셀에서 utils.pandas_parallel 등을 import 하기 위함
+
 class Colors:
     BLUE = '\033[94m'
     GREEN = '\033[92m'
@@ -36,31 +53,209 @@ class Colors:
     UNDERLINE = '\033[4m'
     END = '\033[0m'
 
+class ProgressStreamer:
+    """Coalesce stdout/stderr lines of a running cell into rate-limited tool_progress events."""
+
+    def __init__(self, tool_name="python_repl_tool", tool_id=None, agent_name=None, session_id="ABC"):
+        self.tool_name = tool_name
+        self.tool_id = tool_id
+        self.agent_name = agent_name or "coder"
+        self.session_id = session_id
+        self.pending = {"stdout": [], "stderr": []}
+        self.last_flush = time.monotonic()
+        self.seq = 0
+
+    def add(self, stream, line):
+        self.pending[stream].append(line)
+
+    def due(self):
+        """Seconds until the next flush is allowed (0 means flush now)."""
+        return max(0.0, PROGRESS_FLUSH_INTERVAL - (time.monotonic() - self.last_flush))
+
+    def flush(self, force=False):
+        if not force and self.due() > 0: return
+        for stream, lines in self.pending.items():
+            if not lines: continue
+            line_count, skipped = len(lines), 0
+            if line_count > PROGRESS_MAX_LINES:
+                skipped = line_count - PROGRESS_MAX_LINES
+                lines = lines[-PROGRESS_MAX_LINES:]
+            data = "".join(lines)
+            if len(data) > PROGRESS_MAX_CHARS:
+                data = data[-PROGRESS_MAX_CHARS:]
+            if skipped: data = f"... ({skipped} lines skipped)\n{data}"
+
+            self.seq += 1
+            # put_event 는 호출 context 의 event sink 를 따름 - 추측 실행 중이면 SpeculativeTask 버퍼로 들어감
+            put_event({
+                "timestamp": datetime.now().isoformat(),
+                "session_id": self.session_id,
+                "agent_name": self.agent_name,
+                "source": f"{self.tool_name}_progress",
+                "type": "agent_tool_stream",
+                "event_type": "tool_progress",
+                "tool_name": self.tool_name,
+                "tool_id": self.tool_id,
+                "stream": stream,
+                "seq": self.seq,
+                "line_count": line_count,
+                "data": data,
+            })
+            self.pending[stream] = []
+        self.last_flush = time.monotonic()
+
 class PythonREPL:
-    def __init__(self):
-        pass
+    def __init__(self, timeout=600):
+        self.timeout = timeout
+        self._running = {}  # tool_id -> (Popen, cancel Event)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pump(pipe, stream, line_queue):
+        """Read lines from a child pipe until EOF (runs in a reader thread)."""
+        try:
+            for line in iter(pipe.readline, ''):
+                line_queue.put((stream, line))
+        finally:
+            pipe.close()
+            line_queue.put((stream, None))
 
-    def run(self, command):
+    def run(self, command, tool_id=None, agent_name=None):
+        # 동시에 실행되는 셀 수 제한 (CELL_MAX_CONCURRENT) - 타임아웃은 슬롯을 얻은 뒤부터 계산
+        with cell_quota.slot():
+            cgroup_path = cell_quota.create_cgroup()
+            try:
+                return self._run_cell(command, tool_id, agent_name, cgroup_path)
+            finally:
+                cell_quota.remove_cgroup(cgroup_path)
+
+    def _run_cell(self, command, tool_id, agent_name, cgroup_path):
         try:
-            # 입력된 명령어 실행
-            result = subprocess.run(
-                [sys.executable, "-c", command],
-                capture_output=True,
+            # 입력된 명령어 실행 (-u: 자식 프로세스 출력 버퍼링 해제 → 라인 단위 스트리밍)
+            process = subprocess.Popen(
+                [sys.executable, "-u", "-c", command],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=600  # 타임아웃 설정
+                bufsize=1,
+                start_new_session=True,  # cancel 시 자식이 만든 프로세스까지 함께 종료
+                preexec_fn=cell_quota.preexec(cgroup_path),  # 셀 단위 rlimit / cgroup
+                env=self._child_env(),
             )
-            # 결과 반환
-            if result.returncode == 0:
-                return result.stdout
-            else:
-                return f"Error: {result.stderr}"
         except Exception as e:
             return f"Exception: {str(e)}"
 
+        cancel_event = threading.Event()
+        run_key = tool_id or f"pid-{process.pid}"
+        with self._lock: self._running[run_key] = (process, cancel_event)
+        # 추측 실행(파이프라인 coder) 중인 셀은 그 추측이 버려지면 함께 중단
+        speculation = current_speculation()
+        if speculation is not None: speculation.on_discard(cancel_event.set)
+
+        line_queue = queue.Queue()
+        readers = [
+            threading.Thread(target=self._pump, args=(process.stdout, "stdout", line_queue), daemon=True),
+            threading.Thread(target=self._pump, args=(process.stderr, "stderr", line_queue), daemon=True),
+        ]
+        for reader in readers: reader.start()
+
+        streamer = ProgressStreamer(tool_id=tool_id, agent_name=agent_name)
+        output = {"stdout": [], "stderr": []}
+        deadline = time.monotonic() + self.timeout
+        open_streams, stopped, output_bytes = 2, None, 0
+
+        try:
+            while open_streams:
+                if cancel_event.is_set(): stopped = "cancelled"
+                elif time.monotonic() > deadline: stopped = "timeout"
+                if stopped:
+                    self._kill(process)
+                    break
+                try:
+                    stream, line = line_queue.get(timeout=min(0.1, streamer.due() or 0.1))
+                except queue.Empty:
+                    streamer.flush()
+                    continue
+                if line is None:
+                    open_streams -= 1
+                    continue
+                output_bytes += len(line)
+                if output_bytes > cell_quota.max_output_bytes:
+                    stopped = "output_quota"
+                    self._kill(process)
+                    break
+                output[stream].append(line)
+                streamer.add(stream, line)
+                streamer.flush()
+            # 셀이 stdout/stderr 를 닫은 뒤에도 계속 실행될 수 있으므로 종료까지 deadline / cancel 확인
+            while not stopped:
+                try:
+                    process.wait(timeout=0.1)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel_event.is_set(): stopped = "cancelled"
+                    elif time.monotonic() > deadline: stopped = "timeout"
+                    if stopped: self._kill(process)
+            if stopped: process.wait(timeout=5)
+        except Exception as e:
+            self._kill(process)
+            return f"Exception: {str(e)}"
+        finally:
+            streamer.flush(force=True)
+            with self._lock: self._running.pop(run_key, None)
+
+        # 결과 반환
+        if stopped == "cancelled":
+            return f"Error: Execution cancelled by user\n{''.join(output['stderr'])}"
+        if stopped == "timeout":
+            return f"Exception: Command '{[sys.executable, '-c', command]}' timed out after {self.timeout} seconds"
+        if stopped == "output_quota":
+            return f"Error: {cell_quota.explain(process.returncode, output_exceeded=True)}\n{''.join(output['stdout'])[-2000:]}"
+        if process.returncode == 0:
+            return "".join(output["stdout"])
+        stderr = "".join(output["stderr"])
+        quota_message = cell_quota.explain(process.returncode, stderr, cgroup_path=cgroup_path)
+        return f"Error: {quota_message}\n{stderr}" if quota_message else f"Error: {stderr}"
+
+    @staticmethod
+    def _child_env():
+        env = cell_quota.child_env()
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+        return env
+
+    @staticmethod
+    def _kill(process):
+        if process.poll() is not None: return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            process.kill()
+
+    def cancel(self, tool_id=None):
+        """
+        Cancel a running cell. If tool_id is None, every running cell is cancelled.
+
+        Returns:
+            Number of cells that were signalled
+        """
+        with self._lock:
+            targets = [
+                entry for key, entry in self._running.items()
+                if tool_id is None or key == tool_id
+            ]
+        for _, cancel_event in targets: cancel_event.set()
+        return len(targets)
+
 repl = PythonREPL()
 
+def cancel_python_repl(tool_id=None):
+    """Cancel running python_repl_tool cell(s) mid-flight (e.g. from a UI stop button)."""
+    cancelled = repl.cancel(tool_id)
+    logger.info(f"{Colors.YELLOW}Cancel requested for {cancelled} running cell(s){Colors.END}")
+    return cancelled
+
 @log_io
-def handle_python_repl_tool(code: Annotated[str, "The python code to execute to do further analysis or calculation."]):
+def handle_python_repl_tool(code: Annotated[str, "The python code to execute to do further analysis or calculation."], tool_id=None, agent_name=None):
     """
     Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
     you should print it out with `print(...)`. This is visible to the user.
@@ -68,7 +263,11 @@ def handle_python_repl_tool(code: Annotated[str, "The python code to execute to
     print()  # Add newline before log
     logger.info(f"{Colors.GREEN}===== Executing Python code ====={Colors.END}")
     try:
-        result = repl.run(code)
+        result = execution_cache.cached_run(
+            "python_repl_tool", code,
+            execute=lambda: repl.run(artifact_store.resolve_paths(code), tool_id=tool_id, agent_name=agent_name),  # ./artifacts -> 현재 run 디렉토리
+            is_success=lambda output: not output.startswith(("Error:", "Exception:")),
+        )
     except BaseException as e:
         error_msg = f"Failed to execute. Error: {repr(e)}"
         logger.debug(f"{Colors.RED}Failed to execute. Error: {repr(e)}{Colors.END}")
@@ -90,9 +289,10 @@ def handle_python_repl_tool(code: Annotated[str, "The python code to execute to
 def python_repl_tool(tool: ToolUse, **kwargs: Any) -> ToolResult:
     tool_use_id = tool["toolUseId"]
     code = tool["input"]["code"]
+    agent = kwargs.get("agent")
 
     # Use the existing handle_python_repl_tool function
-    result = handle_python_repl_tool(code)
+    result = handle_python_repl_tool(code, tool_id=tool_use_id, agent_name=getattr(agent, "name", None))
 
     # Check if execution was successful based on the result string
     if "Failed to execute" in result:
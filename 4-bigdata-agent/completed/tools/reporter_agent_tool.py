@@ -3,11 +3,13 @@ import asyncio
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from utils.strands_sdk_utils import strands_utils
+from utils.checkpoint import run_checkpoint
+from utils.token_estimator import pack_context
 from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
+from tools.decorators import log_io
 
-from tools import python_repl_tool, bash_tool
-from strands_tools import file_read
+from tools import python_repl_tool, bash_tool, file_read
 
 # Simple logger setup
 logger = logging.getLogger(__name__)
@@ -38,6 +40,7 @@ class Colors:
     GREEN = '\033[92m'
     END = '\033[0m'
 
+@log_io
 def handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or instruction for generating the report."]):
     """
     Generate comprehensive reports based on analysis results using a specialized reporter agent.
@@ -81,7 +84,7 @@ def handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or inst
     )
 
     # Prepare message with context if available
-    message = '\n\n'.join([messages[-1]["content"][-1]["text"], clues])
+    message = pack_context(reporter_agent, [("message", messages[-1]["content"][-1]["text"], 0, "head"), ("clues", clues, 1, "tail")], agent_name="reporter")
 
     # Process streaming response and collect text in one pass
     async def process_reporter_stream():
@@ -107,6 +110,7 @@ def handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or inst
     shared_state['clues'] = clues
     shared_state['history'] = history
 
+    run_checkpoint.save("tool:reporter", shared_state)
     logger.info(f"\n{Colors.GREEN}Reporter Agent Tool completed{Colors.END}")
     return result_text
 
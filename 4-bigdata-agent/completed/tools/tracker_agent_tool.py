@@ -1,10 +1,15 @@
+import os
 import logging
 import asyncio
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from utils.strands_sdk_utils import strands_utils
+from utils.checkpoint import run_checkpoint
+from utils.token_estimator import pack_context
 from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
+from utils.plan_tracker import Plan, normalize_agent
+from tools.decorators import log_io
 
 # Simple logger setup
 logger = logging.getLogger(__name__)
@@ -34,17 +39,23 @@ TOOL_SPEC = {
 RESPONSE_FORMAT = "Updated task tracking from {}:\n\n<tracking_update>\n{}\n</tracking_update>\n\n*Task status has been updated.*"
 CLUES_FORMAT = "Here is updated tracking status:\n\n<tracking_clues>\n{}\n</tracking_clues>\n\n"
 
+# 결과만으로 완료 여부를 판단할 수 없을 때(PARTIAL_SUCCESS 등)만 tracker LLM 사용
+PLAN_TRACKER_LLM_FALLBACK = os.environ.get("PLAN_TRACKER_LLM_FALLBACK", "on").lower() in ("1", "on", "true")
+
 class Colors:
     GREEN = '\033[92m'
     BLUE = '\033[94m'
     END = '\033[0m'
 
+@log_io
 def handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the agent that just completed its task"], 
                              completion_summary: Annotated[str, "Summary of what was completed by the agent"]):
     """
     Track and update task completion status based on agent results.
     
-    This tool provides access to a tracker agent that can:
+    The plan checklist is updated deterministically from the completed agent's
+    reported status (utils.plan_tracker). The tracker agent (LLM) is only used
+    when the completion is ambiguous (e.g. PARTIAL_SUCCESS or no status):
     - Monitor task progress and update completion status
     - Update checklists from [ ] to [x] format
     - Maintain accurate task tracking
@@ -67,6 +78,51 @@ def handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the a
         logger.warning("No shared state found")
         return "Error: No shared state available" 
                     
+    full_plan = shared_state.get("full_plan", "")
+    clues = shared_state.get("clues", "")
+    history = shared_state.get("history", [])
+
+    # 완료한 에이전트의 마지막 결과(## Status)로 plan 체크리스트를 직접 갱신
+    plan = shared_state.get("plan") or Plan.parse(full_plan)
+    agent_output = next((entry["message"] for entry in reversed(history) if entry.get("agent") == normalize_agent(completed_agent)), completion_summary)
+    update = plan.apply_completion(completed_agent, agent_output) if plan.steps else {"ambiguous": True, "reason": "plan has no steps", "marked": []}
+
+    if not update["ambiguous"]:
+        result_text = plan.to_markdown()
+        logger.info(f"{Colors.BLUE}Plan tracked without LLM: {update['reason']}, {len(update['marked'])} task(s) marked{Colors.END}")
+    elif PLAN_TRACKER_LLM_FALLBACK:
+        logger.info(f"{Colors.BLUE}Plan tracking ambiguous ({update['reason']}) - using tracker LLM{Colors.END}")
+        result_text = _track_with_llm(shared_state, completed_agent, completion_summary)
+        if "# Plan" in result_text: plan = Plan.parse(result_text)
+    else:
+        result_text = plan.to_markdown()
+        logger.info(f"{Colors.BLUE}Plan tracking ambiguous ({update['reason']}) - plan left unchanged{Colors.END}")
+    response = {"text": result_text}
+
+    # Update clues with tracking information
+    clues = '\n\n'.join([clues, CLUES_FORMAT.format(response["text"])])
+    
+    # Update history
+    history.append({"agent": "tracker", "message": response["text"]})
+    
+    # Update shared state with tracking results
+    shared_state['messages'] = [get_message_from_string(role="user", string=RESPONSE_FORMAT.format("tracker", response["text"]), imgs=[])]
+    shared_state['clues'] = clues
+    shared_state['history'] = history
+    
+    # Update the full_plan with the tracked version if the response contains an updated plan
+    if "# Plan" in response["text"] or not update["ambiguous"]:
+        shared_state['full_plan'] = response["text"]
+        shared_state['plan'] = plan
+        logger.info(f"{Colors.BLUE}Updated full_plan with tracking results{Colors.END}")
+    
+    run_checkpoint.save("tool:tracker", shared_state)
+    logger.info(f"\n{Colors.GREEN}Tracker Agent Tool completed{Colors.END}")
+
+    return result_text
+
+def _track_with_llm(shared_state, completed_agent, completion_summary):
+    """Ask the tracker LLM to update the plan (fallback for completions the plan model cannot decide)."""
     request_prompt = shared_state.get("request_prompt", "")
     full_plan = shared_state.get("full_plan", "")
     clues = shared_state.get("clues", "")
@@ -94,7 +150,11 @@ def handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the a
     
     # Add context from previous messages and clues if available
     if messages:
-        tracking_message = '\n\n'.join([messages[-1]["content"][-1]["text"], clues, tracking_message])
+        tracking_message = pack_context(tracker_agent, [
+            ("message", messages[-1]["content"][-1]["text"], 1, "head"),
+            ("clues", clues, 2, "tail"),
+            ("tracking", tracking_message, 0, "head"),
+        ], agent_name="tracker")
     
     # Process streaming response and collect text in one pass
     async def process_tracker_stream():
@@ -106,30 +166,7 @@ def handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the a
                 full_text += event.get("data", "")
         return {"text": full_text}
     
-    response = asyncio.run(process_tracker_stream())
-    
-    result_text = response['text']
-    
-    # Update clues with tracking information
-    clues = '\n\n'.join([clues, CLUES_FORMAT.format(response["text"])])
-    
-    # Update history
-    history = shared_state.get("history", [])
-    history.append({"agent": "tracker", "message": response["text"]})
-    
-    # Update shared state with tracking results
-    shared_state['messages'] = [get_message_from_string(role="user", string=RESPONSE_FORMAT.format("tracker", response["text"]), imgs=[])]
-    shared_state['clues'] = clues
-    shared_state['history'] = history
-    
-    # Update the full_plan with the tracked version if the response contains an updated plan
-    if "# Plan" in response["text"]:
-        shared_state['full_plan'] = response["text"]
-        logger.info(f"{Colors.BLUE}Updated full_plan with tracking results{Colors.END}")
-    
-    logger.info(f"\n{Colors.GREEN}Tracker Agent Tool completed{Colors.END}")
-
-    return result_text
+    return asyncio.run(process_tracker_stream())["text"]
 
 # Function name must match tool name
 def tracker_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
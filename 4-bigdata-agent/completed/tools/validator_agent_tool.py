@@ -3,13 +3,16 @@ import asyncio
 from typing import Any, Annotated, Dict, List
 from strands.types.tools import ToolResult, ToolUse
 from utils.strands_sdk_utils import strands_utils
+from utils.checkpoint import run_checkpoint
+from utils.token_estimator import pack_context
+from utils.model_router import model_router, is_validation_failure
 from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
+from tools.decorators import log_io
 import pandas as pd
 from datetime import datetime
 
-from tools import python_repl_tool, bash_tool
-from strands_tools import file_read
+from tools import python_repl_tool, bash_tool, file_read
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -106,6 +109,7 @@ class OptimizedValidator:
         
         return priority_calcs, stats
 
+@log_io
 def handle_validator_agent_tool(_task: Annotated[str, "The validation task or instruction for validating calculations and generating citations."]):
     """
     Validate numerical calculations and generate citation metadata for reports.
@@ -149,7 +153,7 @@ def handle_validator_agent_tool(_task: Annotated[str, "The validation task or in
     )
 
     # Prepare message with context if available
-    message = '\n\n'.join([messages[-1]["content"][-1]["text"], clues])
+    message = pack_context(validator_agent, [("message", messages[-1]["content"][-1]["text"], 0, "head"), ("clues", clues, 1, "tail")], agent_name="validator")
 
     # Process streaming response
     async def process_validator_stream():
@@ -170,6 +174,9 @@ def handle_validator_agent_tool(_task: Annotated[str, "The validation task or in
     validator_agent, response = asyncio.run(process_validator_stream())
     result_text = response['text']
 
+    # 검증 실패 시 이후 coder/validator 호출은 한 단계 큰 모델 사용 (MODEL_ROUTING=on)
+    if is_validation_failure(result_text): model_router.escalate()
+
     # Update clues
     clues = '\n\n'.join([clues, CLUES_FORMAT.format("validator", response["text"])])
 
@@ -182,6 +189,7 @@ def handle_validator_agent_tool(_task: Annotated[str, "The validation task or in
     shared_state['clues'] = clues
     shared_state['history'] = history
 
+    run_checkpoint.save("tool:validator", shared_state)
     logger.info(f"\n{Colors.GREEN}Validator Agent Tool completed{Colors.END}")
     return result_text
 
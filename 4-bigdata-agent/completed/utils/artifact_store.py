@@ -0,0 +1,312 @@
+"""
+Content-addressed artifact store with one namespace per run.
+
+Every run gets its own directory ARTIFACT_STORE_DIR/runs/<run_id>/ instead of the shared ./artifacts
+folder that main.py used to delete on start, so concurrent runs no longer clobber each other's
+all_results.txt / calculation_metadata.json / citations.json. Agents keep using "./artifacts/...":
+python_repl_tool, bash_tool and file_read (tools/file_read.py) rewrite that prefix to the current
+run's directory (resolve_paths), and ./artifacts itself is a symlink to the most recently started run
+for people browsing the results.
+
+snapshot() hashes the run's files (memoized by size/mtime), copies each new content once into the
+shared blobs/<sha256> and writes runs/<run_id>/manifest.json (relative path -> sha256, size).
+finalize() replaces the finished run's files with hard links to the blobs, so identical charts and
+processed CSVs produced by different runs occupy disk space once. Blobs are made read-only (0444), so a
+write through a sealed run's link fails instead of silently changing every run sharing that content;
+a reopened (resumed) run gets private writable copies first. Checkpoints (utils/checkpoint.py,
+CHECKPOINT_DIR) reference the same blobs.
+
+gc() removes runs older than ARTIFACT_STORE_MAX_AGE_DAYS, then the oldest finished runs until the store
+fits in ARTIFACT_STORE_MAX_MB, then blobs that neither a run manifest nor a checkpoint references. Runs
+whose manifest is still "running" (possibly being written by another process) are only removed once
+they exceed the age limit. gc() runs when a run is opened.
+
+Usage (from 4-bigdata-agent/completed):
+    python -m utils.artifact_store list
+    python -m utils.artifact_store gc [--max_age_days 7] [--max_mb 2048]
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import argparse
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional
+
+from utils.execution_cache import _atomic_write_json, _sha256_file
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+ARTIFACT_STORE_DIR = os.environ.get("ARTIFACT_STORE_DIR", "./.cache/artifact_store")
+ARTIFACT_STORE_MAX_AGE_DAYS = float(os.environ.get("ARTIFACT_STORE_MAX_AGE_DAYS", 7))
+ARTIFACT_STORE_MAX_MB = float(os.environ.get("ARTIFACT_STORE_MAX_MB", 2048))
+CHECKPOINT_DIR = os.environ.get("CHECKPOINT_DIR", "./.cache/checkpoints")
+ARTIFACTS_LINK = "./artifacts"
+BLOB_GRACE_SECONDS = 3600  # 다른 프로세스가 manifest 를 쓰기 전에 넣은 blob 은 GC 하지 않음
+
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")  # run_id 는 경로에 들어가므로 ../ 등은 거부
+
+# "./artifacts" (또는 "./artifacts/...") - s3://bucket/artifacts/ 나 my_artifacts 같은 경로는 제외
+ARTIFACTS_PREFIX = re.compile(r"(?<![\w./-])\./artifacts(?=[/'\"\s),]|$)")
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+class ArtifactStore:
+
+    def __init__(self, root: str = ARTIFACT_STORE_DIR, link_path: Optional[str] = ARTIFACTS_LINK, checkpoint_dir: str = CHECKPOINT_DIR):
+        self.root = root
+        self.checkpoint_dir = checkpoint_dir
+        self.link_path = link_path
+        self.blob_dir = os.path.join(root, "blobs")
+        self.runs_dir = os.path.join(root, "runs")
+        self.default_run_id: Optional[str] = None
+        self._current = contextvars.ContextVar("artifact_run_id", default=None)
+        self._lock = threading.Lock()
+        self._hash_memo: Dict[tuple, str] = {}  # (path, size, mtime_ns) -> sha256
+        self.stats = {"blobs_stored": 0, "blobs_reused": 0, "bytes_deduplicated": 0}
+
+    # ---------- runs ----------
+
+    @property
+    def run_id(self) -> Optional[str]:
+        """Run of the calling context (concurrent runs in one process each set their own), else the last opened run."""
+        return self._current.get() or self.default_run_id
+
+    def run_dir(self, run_id: Optional[str] = None) -> str:
+        run_id = run_id or self.run_id
+        if run_id is None: return ARTIFACTS_LINK  # run 이 열리지 않은 경우 (단독 툴 실행, 벤치마크) 기존 경로 사용
+        if not RUN_ID_PATTERN.match(run_id): raise ValueError(f"Invalid run_id {run_id!r}")
+        return os.path.join(self.runs_dir, run_id, "artifacts")
+
+    def enter_run(self, run_id: str) -> str:
+        """Make run_id current for the calling context only (concurrent MCP tool calls); no ./artifacts link, no GC."""
+        run_dir = self.run_dir(run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        self._current.set(run_id)
+        if not os.path.exists(self._manifest_path(run_id)): self._write_manifest(run_id, {}, status="running")
+        return run_dir
+
+    def open_run(self, run_id: str, link: bool = True) -> str:
+        """Create (or reopen on resume) the run's namespace, make it current and collect garbage."""
+        run_dir = self.run_dir(run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._current.set(run_id)
+        self.default_run_id = run_id
+        if os.path.exists(self._manifest_path(run_id)): self._detach(run_dir)
+        else: self._write_manifest(run_id, {}, status="running")
+        if link and self.link_path: self._link(run_dir)
+        self.gc()
+        return run_dir
+
+    @staticmethod
+    def _detach(run_dir):
+        """A reopened run must not modify shared blobs in place: turn its hard links back into private copies."""
+        for root, _, names in os.walk(run_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                if os.stat(path).st_nlink < 2: continue
+                tmp_path = f"{path}.tmp.{os.getpid()}"
+                shutil.copy2(path, tmp_path)
+                os.chmod(tmp_path, 0o644)  # copy2 가 read-only blob 의 권한까지 복사함
+                os.replace(tmp_path, path)
+
+    def _link(self, run_dir):
+        """Point ./artifacts at the run directory (atomic symlink swap; a legacy real folder is removed once)."""
+        if os.path.isdir(self.link_path) and not os.path.islink(self.link_path):
+            logger.info(f"{Colors.YELLOW}Replacing legacy '{self.link_path}' folder with a link to the run's artifact directory{Colors.END}")
+            shutil.rmtree(self.link_path)
+        tmp_link = f"{self.link_path.rstrip('/')}.tmp.{os.getpid()}"
+        try:
+            if os.path.lexists(tmp_link): os.remove(tmp_link)
+            os.symlink(os.path.abspath(run_dir), tmp_link)
+            os.replace(tmp_link, self.link_path.rstrip("/"))
+        except OSError as e:
+            logger.warning(f"{Colors.YELLOW}Could not link {self.link_path} to {run_dir}: {e}{Colors.END}")
+
+    def resolve_paths(self, text: str) -> str:
+        """Rewrite './artifacts' in tool code / commands to the current run's directory."""
+        if self.run_id is None or "./artifacts" not in text: return text
+        run_dir = os.path.abspath(self.run_dir())
+        return ARTIFACTS_PREFIX.sub(lambda _: run_dir, text)
+
+    # ---------- blobs / manifests ----------
+
+    def _manifest_path(self, run_id):
+        return os.path.join(self.runs_dir, run_id, "manifest.json")
+
+    def _write_manifest(self, run_id, files, status):
+        manifest = {
+            "run_id": run_id,
+            "status": status,
+            "updated": time.time(),
+            "files": files,
+            "bytes": sum(entry["size"] for entry in files.values()),
+        }
+        os.makedirs(os.path.dirname(self._manifest_path(run_id)), exist_ok=True)
+        _atomic_write_json(self._manifest_path(run_id), manifest)
+        return manifest
+
+    def load_manifest(self, run_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path(run_id), encoding="utf-8") as f: return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"run_id": run_id, "status": "unknown", "updated": 0, "files": {}, "bytes": 0}
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest)
+
+    def put_file(self, path: str) -> str:
+        """Store a file's content once by sha256 and return the digest."""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        digest = self._hash_memo.get(key)
+        if digest is None: digest = self._hash_memo[key] = _sha256_file(path)
+        blob_path = self.blob_path(digest)
+        if os.path.exists(blob_path):
+            os.utime(blob_path)  # GC 유예 기간 갱신
+            self.stats["blobs_reused"] += 1
+        else:
+            os.makedirs(self.blob_dir, exist_ok=True)
+            # 하드링크는 이후 in-place 수정 (all_results.txt append 등) 이 blob 까지 바꾸므로 복사
+            tmp_path = f"{blob_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+            shutil.copyfile(path, tmp_path)
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, blob_path)
+            self.stats["blobs_stored"] += 1
+        return digest
+
+    def materialize(self, digest: str, target: str, fallback_blob_dir: Optional[str] = None):
+        """Write blob `digest` to target (checkpoint restore / execution cache hit)."""
+        source = self.blob_path(digest)
+        if not os.path.exists(source) and fallback_blob_dir: source = os.path.join(fallback_blob_dir, digest)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        shutil.copyfile(source, target)
+
+    def snapshot(self, run_id: Optional[str] = None, status: str = "running") -> Dict[str, Dict[str, Any]]:
+        """Hash the run's files into the blob store and rewrite its manifest; returns {relative path: {sha256, size}}."""
+        run_id = run_id or self.run_id
+        artifacts_dir = self.run_dir(run_id)
+        files = {}
+        if os.path.isdir(artifacts_dir):
+            for root, _, names in os.walk(artifacts_dir):
+                for name in names:
+                    full_path = os.path.join(root, name)
+                    files[os.path.relpath(full_path, artifacts_dir)] = {"sha256": self.put_file(full_path), "size": os.path.getsize(full_path)}
+        if run_id is not None:
+            with self._lock: self._write_manifest(run_id, files, status)
+        return files
+
+    def finalize(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Seal a finished run: snapshot it and replace its files with hard links to the shared blobs."""
+        run_id = run_id or self.run_id
+        if run_id is None: return {}
+        files = self.snapshot(run_id, status="complete")
+        artifacts_dir, linked = self.run_dir(run_id), 0
+        for rel_path, entry in files.items():
+            target, blob_path = os.path.join(artifacts_dir, rel_path), self.blob_path(entry["sha256"])
+            try:
+                if os.path.samefile(target, blob_path): continue
+                os.chmod(blob_path, 0o444)  # 이전 버전이 만든 쓰기 가능한 blob
+                tmp_link = f"{target}.tmp.{os.getpid()}"
+                os.link(blob_path, tmp_link)
+                os.replace(tmp_link, target)
+                linked += 1
+                self.stats["bytes_deduplicated"] += entry["size"]
+            except OSError:
+                pass  # 하드링크 미지원 파일시스템 - 복사본 유지
+        logger.info(f"{Colors.GREEN}Artifacts of run {run_id}: {len(files)} files, {linked} deduplicated against the blob store{Colors.END}")
+        return self.load_manifest(run_id)
+
+    # ---------- garbage collection ----------
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.runs_dir): return []
+        runs = [self.load_manifest(run_id) for run_id in os.listdir(self.runs_dir) if os.path.isdir(os.path.join(self.runs_dir, run_id))]
+        for manifest in runs:
+            if not manifest["updated"]: manifest["updated"] = os.path.getmtime(os.path.join(self.runs_dir, manifest["run_id"]))
+        return sorted(runs, key=lambda manifest: manifest["updated"])
+
+    def disk_usage(self) -> int:
+        """Bytes used by the store, counting hard-linked files once."""
+        seen, total = set(), 0
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                stat = os.lstat(os.path.join(root, name))
+                if (stat.st_dev, stat.st_ino) in seen: continue
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+        return total
+
+    def gc(self, max_age_days: float = ARTIFACT_STORE_MAX_AGE_DAYS, max_mb: float = ARTIFACT_STORE_MAX_MB) -> Dict[str, int]:
+        """Drop expired runs, then the oldest runs beyond the size limit, then unreferenced blobs."""
+        if not os.path.isdir(self.root): return {"runs_removed": 0, "blobs_removed": 0, "bytes": 0}
+        now, active = time.time(), {self.run_id, self.default_run_id}
+        runs = [manifest for manifest in self.list_runs() if manifest["run_id"] not in active]
+        removed = [manifest for manifest in runs if max_age_days > 0 and now - manifest["updated"] > max_age_days * 86400]
+        for manifest in removed: shutil.rmtree(os.path.join(self.runs_dir, manifest["run_id"]), ignore_errors=True)
+        # 다른 프로세스가 아직 기록 중일 수 있는 run 은 크기 제한으로 지우지 않음 (만료된 run 만 정리)
+        runs = [manifest for manifest in runs if manifest not in removed and manifest["status"] != "running"]
+
+        blobs_removed = self._collect_blobs(now)
+        max_bytes = max_mb * 1024 * 1024
+        while runs and max_bytes > 0 and self.disk_usage() > max_bytes:
+            oldest = runs.pop(0)
+            shutil.rmtree(os.path.join(self.runs_dir, oldest["run_id"]), ignore_errors=True)
+            removed.append(oldest)
+            blobs_removed += self._collect_blobs(now)
+
+        if removed or blobs_removed:
+            logger.info(f"{Colors.GREEN}Artifact store GC: {len(removed)} runs and {blobs_removed} blobs removed{Colors.END}")
+        return {"runs_removed": len(removed), "blobs_removed": blobs_removed, "bytes": self.disk_usage()}
+
+    def _collect_blobs(self, now) -> int:
+        if not os.path.isdir(self.blob_dir): return 0
+        live = {entry["sha256"] for manifest in self.list_runs() for entry in manifest["files"].values()}
+        live |= self._checkpoint_digests()  # --resume 은 run 디렉토리가 지워져도 checkpoint 의 blob 으로 복원함
+        removed = 0
+        for digest in os.listdir(self.blob_dir):
+            path = self.blob_path(digest)
+            if digest in live or now - os.path.getmtime(path) < BLOB_GRACE_SECONDS: continue
+            os.remove(path)
+            removed += 1
+        return removed
+
+    def _checkpoint_digests(self) -> set:
+        """Blobs referenced by the artifact manifests of saved checkpoints."""
+        digests = set()
+        if not os.path.isdir(self.checkpoint_dir): return digests
+        for run_id in os.listdir(self.checkpoint_dir):
+            try:
+                with open(os.path.join(self.checkpoint_dir, run_id, "checkpoint.json"), encoding="utf-8") as f:
+                    digests.update(entry["sha256"] for entry in json.load(f).get("artifacts", {}).values())
+            except (OSError, json.JSONDecodeError, KeyError, AttributeError):
+                continue
+        return digests
+
+artifact_store = ArtifactStore()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and garbage-collect the artifact store")
+    parser.add_argument("command", choices=["list", "gc"])
+    parser.add_argument("--max_age_days", type=float, default=ARTIFACT_STORE_MAX_AGE_DAYS)
+    parser.add_argument("--max_mb", type=float, default=ARTIFACT_STORE_MAX_MB)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for manifest in artifact_store.list_runs():
+            print(f"{manifest['run_id']:<28} {manifest['status']:<9} {len(manifest['files']):>4} files {manifest['bytes'] / 1024 / 1024:8.1f}MB  {time.strftime('%Y-%m-%d %H:%M', time.localtime(manifest['updated']))}")
+        print(f"store: {artifact_store.disk_usage() / 1024 / 1024:.1f}MB in {artifact_store.root}")
+    else:
+        print(json.dumps(artifact_store.gc(args.max_age_days, args.max_mb)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Pre-emptive conversation summarization that runs in the background.
+
+SummarizingConversationManager only summarizes after Bedrock rejects an overflowing request,
+synchronously and on the agent's own (large) model. BackgroundSummarizingConversationManager
+also registers a BeforeModelCallEvent hook: once the last model call used more than
+SUMMARY_SOFT_THRESHOLD of the context window, the older part of the conversation is summarized
+on a worker thread by a cheaper model (SUMMARY_MODEL). The foreground agent keeps going; the
+finished summary is swapped in atomically before a later model call, and only if the summarized
+messages are still the head of the conversation. On a hard overflow the pending summary is
+awaited (or a new one generated with the same cheap model) instead of using the agent's model.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from strands.hooks import BeforeModelCallEvent, HookProvider, HookRegistry
+from strands.types.content import Message
+from strands.types.exceptions import ContextWindowOverflowException
+from strands.agent.conversation_manager import SummarizingConversationManager
+
+from utils.usage_ledger import usage_ledger
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarizer")
+
+# llm_type -> context window (tokens)
+MODEL_CONTEXT_WINDOW = {
+    "claude-sonnet-3-5-v-2": 200000,
+    "claude-sonnet-3-7": 200000,
+    "claude-sonnet-4": 200000,
+    "claude-sonnet-4-5": 200000,
+    "claude-haiku-4-5": 200000,
+    "nova-micro": 128000,
+}
+
+class Colors:
+    CYAN = '\033[96m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+def _context_tokens(usage):
+    return usage.get("inputTokens", 0) + usage.get("cacheReadInputTokens", 0) + usage.get("cacheWriteInputTokens", 0) + usage.get("outputTokens", 0)
+
+class BackgroundSummarizingConversationManager(SummarizingConversationManager, HookProvider):
+
+    def __init__(
+        self,
+        summarizer_factory: Callable[[], Any],
+        context_window_tokens: int = 200000,
+        soft_threshold: float = 0.6,
+        summary_ratio: float = 0.5,
+        preserve_recent_messages: int = 10,
+        agent_name: str = "agent",
+    ):
+        super().__init__(summary_ratio=summary_ratio, preserve_recent_messages=preserve_recent_messages)
+        self.summarizer_factory = summarizer_factory
+        self.context_window_tokens = context_window_tokens
+        self.soft_threshold = soft_threshold
+        self.agent_name = agent_name
+        self._lock = threading.Lock()
+        self._pending: Optional[Future] = None
+        self._last_context_tokens = 0
+        self._usage_seen = 0
+
+    # ---------- hooks ----------
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+
+    def _before_model_call(self, event: BeforeModelCallEvent):
+        agent = event.agent
+        self._swap_if_ready(agent)
+
+        # 직전 모델 호출의 토큰 수 = 누적 사용량의 증가분 (이벤트 루프가 호출마다 update_usage)
+        total = _context_tokens(agent.event_loop_metrics.accumulated_usage)
+        if total > self._usage_seen:
+            self._last_context_tokens, self._usage_seen = total - self._usage_seen, total
+
+        if self._pending is None and self._last_context_tokens >= self.context_window_tokens * self.soft_threshold:
+            self._start_background_summary(agent)
+
+    # ---------- background summary ----------
+
+    def _split_point(self, messages):
+        count = min(max(1, int(len(messages) * self.summary_ratio)), len(messages) - self.preserve_recent_messages)
+        if count <= 0: return 0
+        return self._adjust_split_point_for_tool_pairs(messages, count)
+
+    def _ensure_summarizer(self):
+        if self.summarization_agent is None:
+            self.summarization_agent = self.summarizer_factory()
+        return self.summarization_agent
+
+    def _summarize(self, messages: List[Message]) -> Message:
+        summarizer = self._ensure_summarizer()
+        usage_before = dict(summarizer.event_loop_metrics.accumulated_usage)
+        started = time.perf_counter()
+        with self._lock:  # summarizer agent 는 하나이므로 동시에 한 요약만 실행
+            summary = self._generate_summary(list(messages), summarizer)  # summarizer 가 리스트에 append 하므로 복사본 전달
+        usage_after = summarizer.event_loop_metrics.accumulated_usage
+        usage_ledger.record(
+            f"{self.agent_name}_summarizer", summarizer.model.config.get("model_id"),
+            {
+                "input_tokens": usage_after.get("inputTokens", 0) - usage_before.get("inputTokens", 0),
+                "output_tokens": usage_after.get("outputTokens", 0) - usage_before.get("outputTokens", 0),
+            },
+            duration_ms=(time.perf_counter() - started) * 1000, source="background_summarizer",
+        )
+        return summary
+
+    def _start_background_summary(self, agent):
+        try:
+            split = self._split_point(agent.messages)
+        except ContextWindowOverflowException:
+            return
+        if split <= 0: return
+
+        snapshot = list(agent.messages[:split])  # 메시지 객체 자체를 보관해 swap 시 동일성 확인
+        logger.info(f"{Colors.CYAN}{self.agent_name.upper()} - background summarization started ({split} messages, ~{self._last_context_tokens} context tokens){Colors.END}")
+        future = _executor.submit(self._summarize, snapshot)
+        future.snapshot = snapshot
+        future.started = time.perf_counter()
+        self._pending = future
+
+    def _swap_if_ready(self, agent, wait=False) -> bool:
+        """Replace the summarized head of the conversation with the finished summary."""
+        future = self._pending
+        if future is None or (not wait and not future.done()): return False
+        self._pending = None
+        try:
+            summary = future.result()
+        except Exception as e:
+            logger.warning(f"{Colors.YELLOW}{self.agent_name.upper()} - background summarization failed: {e}{Colors.END}")
+            return False
+
+        snapshot = future.snapshot
+        head = agent.messages[:len(snapshot)]
+        if len(head) != len(snapshot) or any(current is not original for current, original in zip(head, snapshot)):
+            logger.info(f"{Colors.YELLOW}{self.agent_name.upper()} - conversation changed during summarization, summary dropped{Colors.END}")
+            return False
+
+        self.removed_message_count += len(snapshot) - (1 if self._summary_message else 0)
+        self._summary_message = summary
+        agent.messages[:] = [summary] + agent.messages[len(snapshot):]
+        self._last_context_tokens = 0
+        logger.info(f"{Colors.CYAN}{self.agent_name.upper()} - summary swapped in ({len(snapshot)} messages, {time.perf_counter() - future.started:.1f}s in background){Colors.END}")
+        return True
+
+    # ---------- overflow fallback ----------
+
+    def reduce_context(self, agent, e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """On a hard overflow use the pending background summary; otherwise summarize now with the cheap model."""
+        if self._pending is not None and self._swap_if_ready(agent, wait=True): return
+        self._ensure_summarizer()
+        super().reduce_context(agent, e=e, **kwargs)
@@ -125,6 +125,8 @@ class bedrock_info():
         "Claude-V4-1-Opus-CRI": "us.anthropic.claude-opus-4-1-20250805-v1:0",
         "Claude-V4-Opus-CRI": "us.anthropic.claude-opus-4-20250514-v1:0",
         "Claude-V4-5-Sonnet-CRI": "us.anthropic.claude-sonnet-4-5-20250929-v1:0",
+        "Claude-V3-5-Haiku-CRI": "us.anthropic.claude-3-5-haiku-20241022-v1:0",
+        "Claude-V4-5-Haiku-CRI": "us.anthropic.claude-haiku-4-5-20251001-v1:0",
         "Jurassic-2-Mid": "ai21.j2-mid-v1",
         "Jurassic-2-Ultra": "ai21.j2-ultra-v1",
         "Command": "cohere.command-text-v14",
@@ -144,6 +146,8 @@ class bedrock_info():
         "Nova-Lite": "amazon.nova-lite-v1:0",
         "Nova-Pro": "amazon.nova-pro-v1:0",
         "Nova-Pro-CRI": "us.amazon.nova-pro-v1:0",
+        "Nova-Micro-CRI": "us.amazon.nova-micro-v1:0",
+        "Nova-Lite-CRI": "us.amazon.nova-lite-v1:0",
         "SD-3-5-Large": "stability.sd3-5-large-v1:0",
         "SD-Ultra": "stability.stable-image-ultra-v1:1",
         "SD-3-Large": "stability.sd3-large-v1:0"
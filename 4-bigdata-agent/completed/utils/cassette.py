@@ -0,0 +1,179 @@
+"""
+Record/replay cassettes for Bedrock ConverseStream calls.
+
+`strands_utils.get_model` wraps every model in a CassetteModel when BEDROCK_CASSETTE_MODE is set:
+    record : call Bedrock as usual and append each request + raw stream chunks (text, tool use,
+             reasoning deltas, metadata) with their time offsets to the cassette file (JSONL)
+    replay : never call Bedrock; serve the recorded chunks back, either with the original
+             inter-chunk timing (BEDROCK_CASSETTE_TIMING=original) or as fast as possible (zero)
+
+Replay matches a request by its content hash first and falls back to (agent_name, call ordinal),
+because system prompts carry CURRENT_TIME and therefore differ from run to run. Ordinals count
+completed calls only, so a recorded call that failed or was retried does not shift the numbering.
+"""
+
+import os
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Any, AsyncGenerator
+
+from strands.models import Model
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recorded interaction matches a request."""
+
+def _to_json(obj):
+    """json.dumps default: bytes (images, redacted reasoning) are stored as base64."""
+    if isinstance(obj, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(bytes(obj)).decode("ascii")}
+    return str(obj)
+
+def _from_json(obj):
+    if isinstance(obj, dict):
+        if set(obj) == {"__bytes__"}: return base64.b64decode(obj["__bytes__"])
+        return {key: _from_json(value) for key, value in obj.items()}
+    if isinstance(obj, list): return [_from_json(value) for value in obj]
+    return obj
+
+def request_key(model_id, messages, tool_specs=None, system_prompt=None, system_prompt_content=None):
+    payload = json.dumps(
+        {
+            "model_id": model_id,
+            "system": system_prompt_content if system_prompt_content is not None else system_prompt,
+            "messages": messages,
+            "tools": sorted(spec.get("name", "") for spec in (tool_specs or [])),
+        },
+        sort_keys=True, ensure_ascii=False, default=_to_json,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class Cassette:
+    """One JSONL cassette file shared by every model in the process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key = defaultdict(deque)
+        self._by_ordinal = {}
+        self._ordinals = defaultdict(int)
+        self._loaded = False
+
+    def next_ordinal(self, agent_name):
+        with self._lock:
+            ordinal = self._ordinals[agent_name]
+            self._ordinals[agent_name] += 1
+            return ordinal
+
+    def append(self, interaction):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        line = json.dumps(interaction, ensure_ascii=False, default=_to_json)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise CassetteMissError(f"Cassette file not found: {self.path}")
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip(): continue
+                interaction = json.loads(line)
+                self._by_key[interaction["request_key"]].append(interaction)
+                self._by_ordinal[(interaction["agent_name"], interaction["ordinal"])] = interaction
+        self._loaded = True
+
+    def find(self, key, agent_name, ordinal):
+        with self._lock:
+            if not self._loaded: self._load()
+            if self._by_key.get(key):
+                return self._by_key[key].popleft()
+            interaction = self._by_ordinal.get((agent_name, ordinal))
+            if interaction is None:
+                raise CassetteMissError(f"No recorded interaction for {agent_name} call #{ordinal} in {self.path}")
+            return interaction
+
+class CassetteModel(Model):
+    """Model wrapper that records or replays ConverseStream chunks."""
+
+    def __init__(self, model, cassette, mode="replay", agent_name="agent", timing="zero"):
+        self.model = model
+        self.cassette = cassette
+        self.mode = mode
+        self.agent_name = agent_name
+        self.timing = timing
+
+    @property
+    def config(self):
+        return self.model.config
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs) -> AsyncGenerator[Any, None]:
+        model_id = self.config.get("model_id")
+        key = request_key(model_id, messages, tool_specs, system_prompt, kwargs.get("system_prompt_content"))
+        if self.mode == "replay":
+            ordinal = self.cassette.next_ordinal(self.agent_name)
+            interaction = self.cassette.find(key, self.agent_name, ordinal)
+            logger.debug(f"{Colors.GREEN}Replaying {self.agent_name} call #{ordinal} ({len(interaction['events'])} chunks){Colors.END}")
+            elapsed = 0.0
+            for offset, chunk in interaction["events"]:
+                if self.timing == "original" and offset > elapsed:
+                    await asyncio.sleep(offset - elapsed)
+                    elapsed = offset
+                else:
+                    await asyncio.sleep(0)  # 이벤트 루프 양보 - 실제 스트리밍과 같은 interleaving 유지
+                yield _from_json(chunk)
+            return
+
+        # record
+        started, events = time.monotonic(), []
+        async for chunk in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+            events.append([round(time.monotonic() - started, 4), chunk])
+            yield chunk
+        # ordinal 은 완료된 호출에만 부여 (실패 후 재시도된 호출이 번호를 소모하면 replay 의 ordinal 매칭이 어긋남)
+        self.cassette.append({
+            "request_key": key,
+            "agent_name": self.agent_name,
+            "ordinal": self.cassette.next_ordinal(self.agent_name),
+            "model_id": model_id,
+            "recorded_at": time.time(),
+            "request": {"system": kwargs.get("system_prompt_content") or system_prompt, "messages": messages, "tools": [spec.get("name") for spec in (tool_specs or [])]},
+            "events": events,
+        })
+
+_cassettes = {}
+
+def get_cassette_mode():
+    return os.environ.get("BEDROCK_CASSETTE_MODE", "off").lower()
+
+def wrap_model(model, agent_name="agent"):
+    """Wrap `model` according to BEDROCK_CASSETTE_MODE; returns it unchanged when the mode is off."""
+    mode = get_cassette_mode()
+    if mode not in ("record", "replay"): return model
+
+    path = os.environ.get("BEDROCK_CASSETTE_PATH", "./cassettes/default.jsonl")
+    if path not in _cassettes: _cassettes[path] = Cassette(path)
+    timing = os.environ.get("BEDROCK_CASSETTE_TIMING", "zero").lower()
+    logger.info(f"{Colors.YELLOW}{agent_name.upper()} - Bedrock cassette {mode} ({path}){Colors.END}")
+    return CassetteModel(model, _cassettes[path], mode=mode, agent_name=agent_name, timing=timing)
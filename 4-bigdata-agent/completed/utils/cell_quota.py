@@ -0,0 +1,190 @@
+"""
+Per-cell resource quotas for python_repl_tool and bash_tool.
+
+LLM-written cells used to run without limits, so one pd.read_csv of a production-sized card file or an
+accidental cross join could push the host into swap and stall every other session. Each cell's
+process now starts (preexec) with rlimits:
+    CELL_MAX_MEMORY_MB    RLIMIT_DATA  (heap + anonymous mmaps -> MemoryError in the cell)
+    CELL_MAX_CPU_SECONDS  RLIMIT_CPU   (SIGXCPU, SIGKILL CPU_KILL_GRACE_SECONDS later)
+    CELL_MAX_OPEN_FILES   RLIMIT_NOFILE
+    CELL_MAX_FILE_MB      RLIMIT_FSIZE (largest file a cell may write)
+and CELL_MAX_OUTPUT_MB caps stdout + stderr (the tool stops the cell once it is exceeded).
+
+When CELL_CGROUP_ROOT points to a writable, delegated cgroup v2 directory, each cell additionally
+runs in its own child cgroup with memory.max (real RSS limit, no swap) and cpu.max (CELL_CPU_CORES).
+
+For predictable host throughput at most CELL_MAX_CONCURRENT cells run at once (others wait for a
+slot), cells run at CELL_NICE and BLAS/OpenMP thread pools are capped at CELL_THREADS per cell.
+explain() turns a failed cell into a "Quota exceeded: ..." message the agent can act on.
+CELL_QUOTA=off disables the limits (the concurrency slots stay).
+"""
+
+import os
+import time
+import signal
+import logging
+import resource
+import threading
+import contextlib
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CPU_KILL_GRACE_SECONDS = 5
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_MAX_THREADS", "POLARS_MAX_THREADS")
+MEMORY_ERROR_MARKERS = ("MemoryError", "Unable to allocate", "Cannot allocate memory", "std::bad_alloc")
+
+class Colors:
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+class CellQuota:
+
+    def __init__(self):
+        cpu_count = os.cpu_count() or 1
+        self.enabled = os.environ.get("CELL_QUOTA", "on").lower() in ("1", "on", "true")
+        self.max_memory_mb = _env_float("CELL_MAX_MEMORY_MB", 4096)
+        self.max_cpu_seconds = _env_float("CELL_MAX_CPU_SECONDS", 600)
+        self.max_open_files = int(os.environ.get("CELL_MAX_OPEN_FILES", 256))
+        self.max_file_mb = _env_float("CELL_MAX_FILE_MB", 2048)
+        self.max_output_bytes = int(_env_float("CELL_MAX_OUTPUT_MB", 16) * 1024 * 1024)
+        self.max_concurrent = int(os.environ.get("CELL_MAX_CONCURRENT", max(2, cpu_count // 2)))
+        self.threads = int(os.environ.get("CELL_THREADS", max(1, cpu_count // self.max_concurrent)))
+        self.nice = int(os.environ.get("CELL_NICE", 5))
+        self.cgroup_root = os.environ.get("CELL_CGROUP_ROOT", "")
+        self.cpu_cores = _env_float("CELL_CPU_CORES", 0)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.stats = {"cells": 0, "slot_wait_ms": 0.0, "quota_exceeded": {}}
+        self._rlimits = self._build_rlimits() if self.enabled else []
+
+    # ---------- limits ----------
+
+    @staticmethod
+    def _cap(limit, soft, hard=None):
+        """(soft, hard) not above the current hard limit (an unprivileged process cannot raise it)."""
+        current_hard = resource.getrlimit(limit)[1]
+        hard = soft if hard is None else hard
+        if current_hard != resource.RLIM_INFINITY: soft, hard = min(soft, current_hard), min(hard, current_hard)
+        return limit, (soft, hard)
+
+    def _build_rlimits(self):
+        rlimits = []
+        if self.max_memory_mb > 0: rlimits.append(self._cap(resource.RLIMIT_DATA, int(self.max_memory_mb * 1024 * 1024)))
+        if self.max_cpu_seconds > 0: rlimits.append(self._cap(resource.RLIMIT_CPU, int(self.max_cpu_seconds), int(self.max_cpu_seconds) + CPU_KILL_GRACE_SECONDS))
+        if self.max_open_files > 0: rlimits.append(self._cap(resource.RLIMIT_NOFILE, self.max_open_files))
+        if self.max_file_mb > 0: rlimits.append(self._cap(resource.RLIMIT_FSIZE, int(self.max_file_mb * 1024 * 1024)))
+        return rlimits
+
+    def preexec(self, cgroup_path: Optional[str] = None):
+        """preexec_fn for the cell's Popen: join the cell cgroup, lower priority, apply rlimits (runs in the child)."""
+        rlimits, nice = list(self._rlimits), self.nice
+        procs_path = os.path.join(cgroup_path, "cgroup.procs").encode() if cgroup_path else None
+        def apply():
+            # fork 이후 자식에서 실행 - 락/로깅/import 없이 시스템 콜만 사용
+            if procs_path:
+                fd = os.open(procs_path, os.O_WRONLY)
+                try: os.write(fd, b"0")
+                finally: os.close(fd)
+            if nice: os.nice(nice)
+            for limit, values in rlimits: resource.setrlimit(limit, values)
+        return apply
+
+    def child_env(self) -> Dict[str, str]:
+        """Environment for the cell: thread pools capped unless the caller already set them."""
+        env = dict(os.environ)
+        for name in THREAD_ENV_VARS: env.setdefault(name, str(self.threads))
+        return env
+
+    # ---------- cgroup v2 (optional) ----------
+
+    def create_cgroup(self) -> Optional[str]:
+        if not self.enabled or not self.cgroup_root: return None
+        with self._lock:
+            self._seq += 1
+            path = os.path.join(self.cgroup_root, f"cell-{os.getpid()}-{self._seq}")
+        try:
+            os.mkdir(path)
+            if self.max_memory_mb > 0:
+                self._write(path, "memory.max", str(int(self.max_memory_mb * 1024 * 1024)))
+                with contextlib.suppress(OSError): self._write(path, "memory.swap.max", "0")
+            if self.cpu_cores > 0: self._write(path, "cpu.max", f"{int(self.cpu_cores * 100000)} 100000")
+            return path
+        except OSError as e:
+            logger.warning(f"{Colors.YELLOW}Cell cgroup unavailable under {self.cgroup_root} ({e}), using rlimits only{Colors.END}")
+            self.cgroup_root = ""
+            with contextlib.suppress(OSError): os.rmdir(path)
+            return None
+
+    @staticmethod
+    def _write(path, name, value):
+        with open(os.path.join(path, name), "w") as f: f.write(value)
+
+    @staticmethod
+    def oom_killed(cgroup_path: Optional[str]) -> bool:
+        if not cgroup_path: return False
+        try:
+            with open(os.path.join(cgroup_path, "memory.events")) as f:
+                return any(line.startswith("oom_kill ") and int(line.split()[1]) > 0 for line in f)
+        except (OSError, ValueError):
+            return False
+
+    @staticmethod
+    def remove_cgroup(cgroup_path: Optional[str]):
+        if not cgroup_path: return
+        for _ in range(20):  # 종료된 프로세스가 cgroup 에서 빠질 때까지 잠시 대기
+            try:
+                os.rmdir(cgroup_path)
+                return
+            except OSError:
+                time.sleep(0.05)
+
+    # ---------- scheduling ----------
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Wait for one of CELL_MAX_CONCURRENT execution slots."""
+        started = time.monotonic()
+        self._slots.acquire()
+        with self._lock:
+            self.stats["cells"] += 1
+            self.stats["slot_wait_ms"] += (time.monotonic() - started) * 1000
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    # ---------- errors ----------
+
+    def explain(self, returncode: Optional[int], stderr: str = "", output_exceeded: bool = False, cgroup_path: Optional[str] = None) -> Optional[str]:
+        """'Quota exceeded: ...' for a cell that hit one of the limits, else None."""
+        if output_exceeded:
+            kind, message = "output", f"output limit of {self.max_output_bytes // (1024 * 1024)}MB per cell (CELL_MAX_OUTPUT_MB). Print summaries (df.head(), df.describe(), value counts) instead of whole tables."
+        elif not self.enabled:
+            return None
+        elif returncode == -signal.SIGXCPU:
+            kind, message = "cpu", f"CPU time limit of {self.max_cpu_seconds:.0f}s per cell (CELL_MAX_CPU_SECONDS). Vectorize loops, work on a sample first, or split the work across cells."
+        elif self.oom_killed(cgroup_path) or any(marker in stderr for marker in MEMORY_ERROR_MARKERS):
+            kind, message = "memory", f"memory limit of {self.max_memory_mb:.0f}MB per cell (CELL_MAX_MEMORY_MB). Load only the needed columns (usecols=...), read in chunks (chunksize=...), downcast dtypes, and check join keys before merging (an unintended cross join multiplies rows)."
+        elif returncode == -signal.SIGKILL:
+            # cgroup 밖에서의 SIGKILL: 호스트 OOM killer 또는 RLIMIT_CPU hard limit
+            kind, message = "killed", f"the cell was killed by the system, most likely for memory (limit {self.max_memory_mb:.0f}MB, CELL_MAX_MEMORY_MB) or CPU time (limit {self.max_cpu_seconds:.0f}s). Reduce the data held in memory (usecols=..., chunksize=...) or split the work across cells."
+        elif "Too many open files" in stderr:
+            kind, message = "open_files", f"open file limit of {self.max_open_files} per cell (CELL_MAX_OPEN_FILES). Close files after use (with open(...) as f:)."
+        elif "File too large" in stderr or returncode == -signal.SIGXFSZ:
+            kind, message = "file_size", f"file size limit of {self.max_file_mb:.0f}MB per cell (CELL_MAX_FILE_MB). Aggregate before saving or write compressed/partitioned output."
+        else:
+            return None
+        with self._lock: self.stats["quota_exceeded"][kind] = self.stats["quota_exceeded"].get(kind, 0) + 1
+        return f"Quota exceeded: {message}"
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "quota_exceeded": dict(self.stats["quota_exceeded"]), "max_concurrent": self.max_concurrent, "enabled": self.enabled}
+
+cell_quota = CellQuota()
@@ -0,0 +1,146 @@
+"""
+Checkpoint / resume of graph runs.
+
+After every node and every agent-tool completion the shared state (request, full_plan, plan, clues,
+history, messages) and a manifest of the run's artifact directory (relative path -> sha256) are written
+atomically to CHECKPOINT_DIR/<run_id>/checkpoint.json. Artifact contents live in the shared blob store
+of utils/artifact_store.py (the same snapshot also updates the run's artifact manifest).
+
+`python main.py --resume <run_id>` restores the shared state and any missing or changed artifacts,
+then runs the graph again: nodes that already completed return their recorded answer without calling
+the model, and the supervisor continues from the restored plan and clues, so finished coder / Glue
+steps are not recomputed.
+"""
+
+import os
+import json
+import time
+import uuid
+import base64
+import shutil
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from utils.execution_cache import _atomic_write_json, _sha256_file
+from utils.artifact_store import artifact_store
+from utils.plan_tracker import Plan
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+def new_run_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+def _encode(value):
+    """JSON-safe copy of shared state values (Plan objects and bytes in messages are tagged)."""
+    if isinstance(value, Plan): return {"__plan__": value.to_markdown()}
+    if isinstance(value, (bytes, bytearray)): return {"__bytes__": base64.b64encode(value).decode()}
+    if isinstance(value, dict): return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)): return [_encode(item) for item in value]
+    return value
+
+def _decode(value):
+    if isinstance(value, dict):
+        if set(value) == {"__plan__"}: return Plan.parse(value["__plan__"])
+        if set(value) == {"__bytes__"}: return base64.b64decode(value["__bytes__"])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list): return [_decode(item) for item in value]
+    return value
+
+class RunCheckpoint:
+
+    def __init__(self, root=None, enabled=None):
+        self.root = root or os.environ.get("CHECKPOINT_DIR", "./.cache/checkpoints")
+        self.enabled = enabled if enabled is not None else os.environ.get("CHECKPOINTS", "on").lower() in ("1", "on", "true")
+        self.keep_runs = int(os.environ.get("CHECKPOINT_KEEP_RUNS", 10))
+        self.run_id: Optional[str] = None
+        self.completed_nodes: List[str] = []
+        self.seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def artifacts_dir(self):
+        return artifact_store.run_dir(self.run_id)
+
+    def _run_dir(self, run_id=None):
+        return os.path.join(self.root, run_id or self.run_id)
+
+    def start(self, run_id: Optional[str] = None) -> str:
+        """Begin checkpointing a new run (or continue an existing run id on resume)."""
+        self.run_id = run_id or new_run_id()
+        self.completed_nodes, self.seq = [], 0
+        if self.enabled:
+            os.makedirs(self._run_dir(), exist_ok=True)
+            self._prune()
+        return self.run_id
+
+    def _prune(self):
+        runs = sorted((entry for entry in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, entry))), key=lambda entry: os.path.getmtime(os.path.join(self.root, entry)))
+        for run_id in runs[:-self.keep_runs] if self.keep_runs > 0 else []:
+            if run_id != self.run_id: shutil.rmtree(os.path.join(self.root, run_id), ignore_errors=True)
+
+    # ---------- save ----------
+
+    def save(self, stage: str, shared_state: Dict[str, Any], node: Optional[str] = None):
+        """Atomically write the checkpoint after a node (node=name) or an agent tool (stage='tool:coder') completed."""
+        if not self.enabled or self.run_id is None or shared_state is None: return
+        started = time.perf_counter()
+        with self._lock:
+            if node and node not in self.completed_nodes: self.completed_nodes.append(node)
+            self.seq += 1
+            try:
+                checkpoint = {
+                    "run_id": self.run_id,
+                    "seq": self.seq,
+                    "stage": stage,
+                    "timestamp": time.time(),
+                    "completed_nodes": list(self.completed_nodes),
+                    "shared_state": _encode({key: value for key, value in shared_state.items()}),
+                    "artifacts": artifact_store.snapshot(self.run_id),
+                }
+                _atomic_write_json(os.path.join(self._run_dir(), "checkpoint.json"), checkpoint)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"{Colors.YELLOW}Checkpoint '{stage}' not saved: {e}{Colors.END}")
+                return
+        logger.info(f"{Colors.GREEN}Checkpoint #{self.seq} saved after {stage} (run {self.run_id}, {len(checkpoint['artifacts'])} artifacts, {(time.perf_counter() - started) * 1000:.0f}ms){Colors.END}")
+
+    # ---------- resume ----------
+
+    def load(self, run_id: str) -> Dict[str, Any]:
+        path = os.path.join(self._run_dir(run_id), "checkpoint.json")
+        if not os.path.exists(path): raise FileNotFoundError(f"No checkpoint for run '{run_id}' in {self.root}")
+        with open(path, encoding="utf-8") as f: checkpoint = json.load(f)
+        checkpoint["shared_state"] = _decode(checkpoint["shared_state"])
+        return checkpoint
+
+    def restore_artifacts(self, checkpoint) -> int:
+        """Bring the run's artifact directory back to the checkpointed manifest; returns the number of files restored."""
+        restored, artifacts_dir = 0, artifact_store.run_dir(checkpoint["run_id"])
+        legacy_blob_dir = os.path.join(self._run_dir(checkpoint["run_id"]), "blobs")  # 이전 형식 checkpoint
+        for rel_path, entry in checkpoint.get("artifacts", {}).items():
+            target = os.path.join(artifacts_dir, rel_path)
+            if os.path.exists(target) and _sha256_file(target) == entry["sha256"]: continue
+            artifact_store.materialize(entry["sha256"], target, fallback_blob_dir=legacy_blob_dir)
+            restored += 1
+        return restored
+
+    def resume(self, run_id: str, node_states: Dict[str, Any]) -> Dict[str, Any]:
+        """Load a run's last checkpoint into the graph's global node state and continue checkpointing it."""
+        checkpoint = self.load(run_id)
+        artifact_store.open_run(run_id)
+        restored = self.restore_artifacts(checkpoint)
+        self.start(run_id)
+        self.completed_nodes, self.seq = list(checkpoint["completed_nodes"]), checkpoint["seq"]
+        node_states.clear()
+        node_states['shared'] = checkpoint["shared_state"]
+        node_states['resumed_nodes'] = set(checkpoint["completed_nodes"])
+        logger.info(f"{Colors.GREEN}Resuming run {run_id} from checkpoint #{checkpoint['seq']} ({checkpoint['stage']}), completed nodes: {checkpoint['completed_nodes']}, {restored} artifacts restored{Colors.END}")
+        return checkpoint
+
+run_checkpoint = RunCheckpoint()
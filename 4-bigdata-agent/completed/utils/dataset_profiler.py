@@ -0,0 +1,304 @@
+"""
+Precomputed dataset profiles for the planner and coder prompts.
+
+The first coder cycles of every run used to go to data exploration: reading card_descriptions.json /
+customer_description.json, printing df.info() and describe(), checking nulls. Each registered dataset
+is now profiled once per data version (schema, dtypes, null counts, cardinalities, value samples,
+numeric and date ranges) and the profile is cached as JSON. prompt_block() renders a compact block
+that goes into the planner and coder system prompts ({DATASET_PROFILES}).
+
+Registered datasets are the CSV / TSV / Parquet / JSON files under DATASET_DIRS (comma separated,
+default ./data) plus local data files referenced in the user request. A data version is the file's
+(path, size, mtime_ns), so a changed file is profiled again while unchanged files cost one stat() per run.
+Tabular files are read in chunks (bounded memory); files with more than DATASET_PROFILE_MAX_ROWS rows
+are profiled on their first rows and marked as sampled.
+
+    DATASET_PROFILES           on/off (default on)
+    DATASET_PROFILE_DIR        cache directory (default ./.cache/dataset_profiles)
+    DATASET_PROFILE_MAX_ROWS   rows read per file (default 5000000)
+    DATASET_PROFILE_MAX_CHARS  size of the prompt block (default 8000)
+
+Usage (from 4-bigdata-agent/completed):
+    python -m utils.dataset_profiler              # profile DATASET_DIRS and print the prompt block
+    python -m utils.dataset_profiler ./data/x.csv --json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from typing import Any, Dict, List, Optional
+
+from utils.execution_cache import _atomic_write_json
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PROFILE_VERSION = 1
+TABULAR_EXTENSIONS = (".csv", ".tsv", ".parquet", ".pq")
+DATA_EXTENSIONS = TABULAR_EXTENSIONS + (".json",)
+CARDINALITY_CAP = 10000     # 이보다 많은 고유값은 ">10000" 으로 표시 (메모리 제한)
+TOP_VALUES = 5
+SAMPLE_VALUES = 3
+MAX_VALUE_CHARS = 40
+DATE_PATTERN = re.compile(r"^\d{4}[-/.]\d{1,2}[-/.]\d{1,2}")
+REQUEST_PATH = re.compile(r"""(?:[\w./~-]*/)?[\w.-]+(?:\.csv|\.tsv|\.parquet|\.pq|\.json)\b""")
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+def _short(value) -> str:
+    text = str(value)
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS - 3] + "..."
+
+def _number(value) -> str:
+    if value is None: return "-"
+    if float(value).is_integer() and abs(value) < 1e15: return f"{int(value):,}"
+    return f"{value:,.4g}" if abs(value) >= 1e-3 else f"{value:.3g}"
+
+class _ColumnStats:
+    """Running statistics of one column across chunks."""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.count = self.nulls = 0
+        self.distinct, self.capped = {}, False  # value -> count (CARDINALITY_CAP 까지)
+        self.minimum = self.maximum = None
+        self.numbers, self.mean, self.m2 = 0, 0.0, 0.0  # 수치 값의 개수 / 평균 / 편차 제곱합 (Chan 병합)
+        self.numeric = dtype.startswith(("int", "uint", "float", "Int", "UInt", "Float"))
+        self.date = False
+
+    def update(self, series):
+        import pandas as pd
+        if str(series.dtype) != self.dtype and not self.dtype.startswith("mixed"):
+            self.dtype = f"mixed({self.dtype}, {series.dtype})"
+            self.numeric = self.numeric and pd.api.types.is_numeric_dtype(series)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        self.count += len(values)
+        if values.empty: return
+        if self.numeric:
+            numbers = values.astype("float64")
+            # 청크 단위 (개수, 평균, M2) 를 누적값에 병합 - 합/제곱합 방식은 큰 평균에서 자릿수가 상쇄됨
+            chunk_mean = float(numbers.mean())
+            chunk_m2 = float(((numbers - chunk_mean) ** 2).sum())
+            total = self.numbers + len(numbers)
+            delta = chunk_mean - self.mean
+            self.mean += delta * len(numbers) / total
+            self.m2 += chunk_m2 + delta ** 2 * self.numbers * len(numbers) / total
+            self.numbers = total
+            low, high = float(numbers.min()), float(numbers.max())
+        elif self.date or (self.count == len(values) and values.astype(str).head(20).str.match(DATE_PATTERN).all()):
+            # ISO 형태의 날짜 문자열은 문자열 비교로 범위 계산
+            self.date = True
+            strings = values.astype(str)
+            low, high = strings.min(), strings.max()
+        else:
+            low = high = None
+        if low is not None:
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+        if not self.capped:
+            for value, count in values.value_counts(sort=False).items():
+                self.distinct[value] = self.distinct.get(value, 0) + int(count)
+            if len(self.distinct) > CARDINALITY_CAP: self.distinct, self.capped = {}, True
+
+    def result(self) -> Dict[str, Any]:
+        column = {"dtype": self.dtype, "non_null": self.count, "nulls": self.nulls,
+                  "distinct": f">{CARDINALITY_CAP}" if self.capped else len(self.distinct)}
+        if self.numeric and self.numbers:
+            variance = self.m2 / (self.numbers - 1) if self.numbers > 1 else 0.0
+            column.update({"min": self.minimum, "max": self.maximum, "mean": self.mean, "std": variance ** 0.5})
+        elif self.date:
+            column.update({"kind": "date", "min": self.minimum, "max": self.maximum})
+        if self.distinct:
+            ranked = sorted(self.distinct.items(), key=lambda item: -item[1])
+            if not self.numeric or len(self.distinct) <= TOP_VALUES * 4:
+                column["top"] = [[_short(value), count] for value, count in ranked[:TOP_VALUES]]
+            column["samples"] = [_short(value) for value, _ in ranked[:SAMPLE_VALUES]]
+        return column
+
+class DatasetProfiler:
+
+    def __init__(self, cache_dir=None, dirs=None, enabled=None):
+        self.cache_dir = cache_dir or os.environ.get("DATASET_PROFILE_DIR", "./.cache/dataset_profiles")
+        self.dirs = dirs if dirs is not None else [path.strip() for path in os.environ.get("DATASET_DIRS", "./data").split(",") if path.strip()]
+        self.enabled = enabled if enabled is not None else os.environ.get("DATASET_PROFILES", "on").lower() in ("1", "on", "true")
+        self.max_rows = int(os.environ.get("DATASET_PROFILE_MAX_ROWS", 5_000_000))
+        self.max_chars = int(os.environ.get("DATASET_PROFILE_MAX_CHARS", 8000))
+        self.stats = {"profiled": 0, "cached": 0, "failed": 0, "profile_ms": 0.0}
+        self._memo = {}  # version -> profile (프로세스 내 재사용)
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    # ---------- registry ----------
+
+    def datasets(self, request: str = "") -> List[str]:
+        """Data files under DATASET_DIRS plus existing local data files referenced in the request."""
+        paths = []
+        for directory in self.dirs:
+            for root, subdirs, names in os.walk(directory):
+                subdirs[:] = sorted(name for name in subdirs if not name.startswith("."))
+                paths.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(DATA_EXTENSIONS) and not name.startswith("."))
+        for match in REQUEST_PATH.findall(request or ""):
+            if os.path.isfile(match): paths.append(match)
+        unique = {}
+        for path in paths: unique.setdefault(os.path.realpath(path), path)
+        return list(unique.values())
+
+    @staticmethod
+    def version(path) -> str:
+        stat = os.stat(path)
+        return hashlib.sha256(f"{PROFILE_VERSION}:{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+
+    # ---------- profiling ----------
+
+    def profile(self, path) -> Dict[str, Any]:
+        """Cached profile of one file (computed once per data version)."""
+        version = self.version(path)
+        if version in self._memo: return self._memo[version]
+        with self._lock: path_lock = self._path_locks.setdefault(version, threading.Lock())
+        with path_lock:  # 같은 파일을 동시에 두 번 프로파일링하지 않도록
+            if version in self._memo: return self._memo[version]
+            cache_path = os.path.join(self.cache_dir, f"{version}.json")
+            try:
+                with open(cache_path, encoding="utf-8") as f: profile = json.load(f)
+                self.stats["cached"] += 1
+            except (OSError, ValueError):
+                started = time.perf_counter()
+                try:
+                    profile = self._profile_json(path) if path.lower().endswith(".json") else self._profile_table(path)
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    logger.warning(f"{Colors.YELLOW}Dataset profiling failed for {path}: {e}{Colors.END}")
+                    profile = {"error": f"{type(e).__name__}: {e}"}
+                profile.update({"path": path, "bytes": os.path.getsize(path), "profiled_at": time.strftime("%Y-%m-%d %H:%M:%S")})
+                elapsed = (time.perf_counter() - started) * 1000
+                self.stats["profiled"] += 1
+                self.stats["profile_ms"] += elapsed
+                logger.info(f"{Colors.GREEN}Profiled {path} in {elapsed:.0f}ms{Colors.END}")
+                if "error" not in profile:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    _atomic_write_json(cache_path, profile)
+            profile["path"] = path  # 같은 파일을 다른 경로로 참조한 경우 요청의 경로로 표시
+            self._memo[version] = profile
+            return profile
+
+    def _profile_table(self, path) -> Dict[str, Any]:
+        from utils.pandas_parallel import read_chunks
+        read_kwargs = {"sep": "\t"} if path.lower().endswith(".tsv") else {}
+        if not path.lower().endswith((".parquet", ".pq")): read_kwargs["low_memory"] = False
+        columns, rows, sampled = {}, 0, False
+        for chunk in read_chunks(path, chunksize=200_000, **read_kwargs):
+            if rows + len(chunk) > self.max_rows:
+                chunk, sampled = chunk.iloc[:self.max_rows - rows], True
+            rows += len(chunk)
+            for name in chunk.columns:
+                columns.setdefault(name, _ColumnStats(str(chunk[name].dtype))).update(chunk[name])
+            if sampled: break
+        return {"kind": "table", "rows": rows, "sampled": sampled, "columns": {str(name): stats.result() for name, stats in columns.items()}}
+
+    @staticmethod
+    def _profile_json(path) -> Dict[str, Any]:
+        with open(path, encoding="utf-8") as f: data = json.load(f)
+        # {"columns": [{"name": ..., "description": ...}]} 형태의 컬럼 설명 파일
+        entries = data.get("columns") if isinstance(data, dict) else data
+        if isinstance(entries, list) and entries and all(isinstance(entry, dict) and "name" in entry for entry in entries):
+            return {"kind": "column_descriptions", "columns": {str(entry["name"]): str(entry.get("description", "")) for entry in entries}}
+        if isinstance(data, list) and data and all(isinstance(entry, dict) for entry in data[:100]):
+            import pandas as pd
+            frame = pd.DataFrame(data)
+            columns = {}
+            for name in frame.columns:
+                stats = _ColumnStats(str(frame[name].dtype))
+                try: stats.update(frame[name])
+                except TypeError: stats.update(frame[name].astype(str))  # dict/list 값은 문자열로
+                columns[str(name)] = stats.result()
+            return {"kind": "table", "rows": len(frame), "sampled": False, "columns": columns}
+        preview = json.dumps(data, ensure_ascii=False)
+        keys = list(data)[:30] if isinstance(data, dict) else None
+        return {"kind": "json", "type": type(data).__name__, "keys": keys, "length": len(data) if isinstance(data, (list, dict)) else None,
+                "preview": preview[:600] + ("..." if len(preview) > 600 else "")}
+
+    def profiles(self, request: str = "") -> List[Dict[str, Any]]:
+        return [self.profile(path) for path in self.datasets(request)]
+
+    def warm_async(self, request: str = "") -> Optional[threading.Thread]:
+        """Profile new data versions in the background (run start) so the planner prompt does not wait."""
+        if not self.enabled: return None
+        thread = threading.Thread(target=self.profiles, args=(request,), name="dataset-profiler", daemon=True)
+        thread.start()
+        return thread
+
+    # ---------- rendering ----------
+
+    @staticmethod
+    def render(profile: Dict[str, Any]) -> str:
+        size = f"{profile.get('bytes', 0) / 1024:,.0f} KB"
+        if "error" in profile:
+            return f"### {profile['path']} ({size}) - not profiled: {profile['error']}"
+        if profile["kind"] == "column_descriptions":
+            lines = [f"### {profile['path']} (column descriptions, {len(profile['columns'])} columns)"]
+            lines.extend(f"- {name}: {description}" for name, description in profile["columns"].items())
+            return "\n".join(lines)
+        if profile["kind"] == "json":
+            shape = f"{profile['type']}, {profile['length']} entries" if profile["length"] is not None else profile["type"]
+            keys = f"\nkeys: {', '.join(map(str, profile['keys']))}" if profile["keys"] else ""
+            return f"### {profile['path']} (json {shape}, {size}){keys}\npreview: {profile['preview']}"
+
+        rows = f"{profile['rows']:,} rows" + (" (sampled: first rows only)" if profile["sampled"] else "")
+        lines = [f"### {profile['path']} ({rows} x {len(profile['columns'])} columns, {size})"]
+        for name, column in profile["columns"].items():
+            parts = [column["dtype"]]
+            if column["nulls"]: parts.append(f"nulls {column['nulls']:,}")
+            parts.append(f"distinct {column['distinct'] if isinstance(column['distinct'], str) else format(column['distinct'], ',')}")
+            if "mean" in column:
+                parts.append(f"min {_number(column['min'])}, max {_number(column['max'])}, mean {_number(column['mean'])}, std {_number(column['std'])}")
+            elif column.get("kind") == "date":
+                parts.append(f"range {column['min']} ~ {column['max']}")
+            if column.get("top") and (column["distinct"] == len(column["top"]) or ("mean" not in column and column.get("kind") != "date")):
+                parts.append("top " + ", ".join(f"{value} ({count:,})" for value, count in column["top"]))
+            elif column.get("samples") and "mean" not in column:
+                parts.append("e.g. " + ", ".join(column["samples"]))
+            lines.append(f"- {name}: {'; '.join(parts)}")
+        return "\n".join(lines)
+
+    def prompt_block(self, request: str = "") -> str:
+        """Compact profile block for the {DATASET_PROFILES} prompt slot (bounded by DATASET_PROFILE_MAX_CHARS)."""
+        if not self.enabled: return "Dataset profiles are disabled."
+        rendered = [self.render(profile) for profile in self.profiles(request)]
+        if not rendered: return "No local datasets registered (DATASET_DIRS). Explore the data yourself."
+        block = "\n\n".join(rendered)
+        if len(block) > self.max_chars:
+            block = block[:self.max_chars].rsplit("\n", 1)[0] + "\n... (profiles truncated, explore remaining columns yourself)"
+        return block
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+dataset_profiler = DatasetProfiler()
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile registered datasets (cached per data version)")
+    parser.add_argument("paths", nargs="*", help="Files to profile (default: DATASET_DIRS)")
+    parser.add_argument("--json", action="store_true", help="Print raw profiles instead of the prompt block")
+    args = parser.parse_args()
+
+    profiler = DatasetProfiler(dirs=[path for path in args.paths if os.path.isdir(path)] if args.paths else None)
+    files = [path for path in args.paths if os.path.isfile(path)]
+    if args.json:
+        profiles = [profiler.profile(path) for path in files] if files else profiler.profiles()
+        print(json.dumps(profiles, indent=2, ensure_ascii=False, default=str))
+    else:
+        print(profiler.prompt_block(" ".join(files)) if files else profiler.prompt_block())
+    print(json.dumps(profiler.get_stats()), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Durable, offset-addressable event log per session.
+
+The in-memory event queue only serves the consumer that is attached while a run streams. EventLog
+additionally appends every event StreamableGraph.stream_async hands out to per-session segment files
+(EVENT_LOG_DIR/<session_id>/<base offset>.log). Each record is
+    8-byte offset | 4-byte length | JSON payload
+so offsets stay valid after compaction. Readers memory-map the segments and scan sequentially from the
+requested offset; subscribe() keeps following the log, so any number of subscribers (SSE reconnects,
+dashboards, late consumers) fan out from one write without re-running anything.
+
+Several processes may write the same session (SESSION_ID is shared): append() holds an exclusive
+flock on <session>/.lock while it assigns the offset and writes, and re-reads the segment state first
+when another writer has changed it (active segment size or directory listing), so offsets stay unique.
+
+When the active segment exceeds EVENT_LOG_SEGMENT_BYTES a new one is started. Sealed segments older
+than the newest EVENT_LOG_HOT_SEGMENTS are compacted (consecutive text chunks of one agent merged,
+tool_progress dropped - tool_result keeps the output) and segments beyond EVENT_LOG_MAX_SEGMENTS are
+deleted. Compaction runs in a background thread started on a roll, so append() never waits for it.
+Reading from a compacted or deleted offset resumes at the next available record.
+
+Usage (from 4-bigdata-agent/completed):
+    python -m utils.event_log --session ABC --from_offset 0 [--follow]
+"""
+
+import os
+import json
+import mmap
+import fcntl
+import struct
+import bisect
+import asyncio
+import argparse
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+EVENT_LOG = os.environ.get("EVENT_LOG", "on").lower() in ("1", "on", "true")
+EVENT_LOG_DIR = os.environ.get("EVENT_LOG_DIR", "./.cache/event_log")
+EVENT_LOG_SEGMENT_BYTES = int(os.environ.get("EVENT_LOG_SEGMENT_BYTES", 4 * 1024 * 1024))
+EVENT_LOG_HOT_SEGMENTS = int(os.environ.get("EVENT_LOG_HOT_SEGMENTS", 2))
+EVENT_LOG_MAX_SEGMENTS = int(os.environ.get("EVENT_LOG_MAX_SEGMENTS", 32))
+
+RECORD_HEADER = struct.Struct("<QI")  # offset, payload length
+COMPACTED_SUFFIX = ".c.log"
+
+class _Segment:
+
+    def __init__(self, path: str, base_offset: int):
+        self.path = path
+        self.base_offset = base_offset
+        self.offsets: List[int] = []    # record offsets (sorted)
+        self.positions: List[int] = []  # byte position of each record
+        self.size = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+
+    @property
+    def compacted(self):
+        return self.path.endswith(COMPACTED_SUFFIX)
+
+    @property
+    def last_offset(self):
+        return self.offsets[-1] if self.offsets else self.base_offset - 1
+
+    def load_index(self):
+        """Rebuild the record index of an existing segment file with one sequential scan."""
+        self.offsets, self.positions, position = [], [], 0
+        view = self.view()
+        while view is not None and position + RECORD_HEADER.size <= len(view):
+            offset, length = RECORD_HEADER.unpack_from(view, position)
+            if position + RECORD_HEADER.size + length > len(view): break  # 기록 중 중단된 마지막 레코드는 무시
+            self.offsets.append(offset)
+            self.positions.append(position)
+            position += RECORD_HEADER.size + length
+        self.size = position
+
+    def view(self):
+        """mmap of the segment, re-mapped when the file has grown since the last read."""
+        if self._mmap is None or self._mapped_size != os.path.getsize(self.path):
+            self.close()
+            size = os.path.getsize(self.path)
+            if size == 0: return None
+            with open(self.path, "rb") as f: self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+        return self._mmap
+
+    def records(self, from_offset: int):
+        view = self.view()
+        if view is None: return
+        for index in range(bisect.bisect_left(self.offsets, from_offset), len(self.offsets)):
+            position = self.positions[index]
+            offset, length = RECORD_HEADER.unpack_from(view, position)
+            start = position + RECORD_HEADER.size
+            yield offset, view[start:start + length]
+
+    def close(self):
+        if self._mmap is not None: self._mmap.close()
+        self._mmap, self._mapped_size = None, 0
+
+def _read_records(path: str) -> List[Tuple[int, bytes]]:
+    """All (offset, payload) records of a sealed segment file, read without the shared mmap."""
+    with open(path, "rb") as f: data = f.read()
+    records, position = [], 0
+    while position + RECORD_HEADER.size <= len(data):
+        offset, length = RECORD_HEADER.unpack_from(data, position)
+        start = position + RECORD_HEADER.size
+        if start + length > len(data): break
+        records.append((offset, data[start:start + length]))
+        position = start + length
+    return records
+
+def _compact_records(records):
+    """Merge consecutive text chunks of one agent/source and drop tool_progress (first offset of a merged run is kept)."""
+    merged: List[Tuple[int, Dict[str, Any]]] = []
+    for offset, payload in records:
+        event = json.loads(payload)
+        if event.get("event_type") == "tool_progress": continue
+        if event.get("event_type") == "text_chunk" and merged:
+            previous = merged[-1][1]
+            if previous.get("event_type") == "text_chunk" and previous.get("agent_name") == event.get("agent_name") and previous.get("source") == event.get("source"):
+                previous["data"] = previous.get("data", "") + event.get("data", "")
+                previous["chunk_size"] = len(previous["data"])
+                continue
+        merged.append((offset, event))
+    return merged
+
+class EventLog:
+
+    def __init__(self, session_id: str, root: str = EVENT_LOG_DIR, segment_bytes: int = EVENT_LOG_SEGMENT_BYTES):
+        self.session_id = session_id
+        self.directory = os.path.join(root, session_id)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self._writer = None
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = open(os.path.join(self.directory, ".lock"), "a+b")
+
+        self.segments: List[_Segment] = []
+        self.next_offset = 0
+        self.refresh()
+
+    def _segment_names(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(".log") and name.split(".")[0].isdigit())
+
+    def refresh(self):
+        """Pick up segments written by another process (read-only users such as the CLI tail, or a second writer)."""
+        with self._lock:
+            if self._writer is None: self._reload(self._segment_names())
+            else:
+                with self._file_lock(): self._sync()
+
+    def _reload(self, names: List[str]):
+        known = {segment.path: segment for segment in self.segments}
+        segments = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            segment = known.pop(path, None)
+            if segment is None or segment.size != os.path.getsize(path):  # 변경 없는 세그먼트는 다시 스캔하지 않음
+                segment = segment or _Segment(path, int(name.split(".")[0]))
+                segment.load_index()
+            segments.append(segment)
+        for segment in known.values(): segment.close()
+        self.segments = segments
+        self.next_offset = max((segment.last_offset + 1 for segment in self.segments), default=0)
+
+    # ---------- write ----------
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared by every process that writes this session directory."""
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _sync(self):
+        """Under the file lock: re-read the segments if another writer changed them since our last write."""
+        names = self._segment_names()
+        if self._writer is not None and names == [os.path.basename(segment.path) for segment in self.segments] \
+                and os.fstat(self._writer.fileno()).st_size == self.segments[-1].size:
+            return
+        if self._writer is not None: self._writer.close()
+        self._writer = None
+        self._reload(names)
+        if not self.segments or self.segments[-1].compacted: self._roll()
+        else:
+            # 기록 중 중단된 마지막 레코드는 잘라내고 이어서 기록 (파일 잠금 중이므로 다른 writer 가 쓰는 중일 수 없음)
+            self._writer = open(self.segments[-1].path, "r+b")
+            self._writer.truncate(self.segments[-1].size)
+            self._writer.seek(self.segments[-1].size)
+
+    def _roll(self):
+        if self._writer is not None: self._writer.close()
+        segment = _Segment(os.path.join(self.directory, f"{self.next_offset:020d}.log"), self.next_offset)
+        self.segments.append(segment)
+        self._writer = open(segment.path, "ab")
+        segment.size = self._writer.tell()
+
+    def append(self, event) -> int:
+        """Append one event and return its offset."""
+        payload = json.dumps(dict(event), ensure_ascii=False, default=str).encode("utf-8")
+        rolled = False
+        with self._lock, self._file_lock():
+            self._sync()
+            segment = self.segments[-1]
+            if segment.size and segment.size + len(payload) > self.segment_bytes:
+                self._roll()
+                rolled, segment = True, self.segments[-1]
+            offset = self.next_offset
+            self._writer.write(RECORD_HEADER.pack(offset, len(payload)) + payload)
+            self._writer.flush()  # 페이지 캐시에 반영되어야 mmap 리더가 바로 읽을 수 있음
+            segment.offsets.append(offset)
+            segment.positions.append(segment.size)
+            segment.size += RECORD_HEADER.size + len(payload)
+            self.next_offset += 1
+            waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            try: loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError: pass  # 구독자의 이벤트 루프가 이미 종료됨
+        if rolled: self._compact_async()
+        return offset
+
+    # ---------- compaction ----------
+
+    def _compact_async(self):
+        """Run compact() in a background thread unless one is already running."""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive(): return
+            self._compactor = threading.Thread(target=self.compact, name=f"event-log-compact-{self.session_id}", daemon=True)
+            self._compactor.start()
+
+    def compact(self):
+        """Compact sealed cold segments and enforce the segment retention limit.
+
+        The segment is rewritten without holding any lock; only the swap of the files takes the locks."""
+        with self._compact_lock:
+            with self._lock:
+                cold = [segment for segment in self.segments[:-max(EVENT_LOG_HOT_SEGMENTS, 1)] if not segment.compacted]
+            for segment in cold:
+                compacted_path = segment.path[:-len(".log")] + COMPACTED_SUFFIX
+                temp_path = f"{compacted_path}.{os.getpid()}.tmp"
+                try:
+                    merged = _compact_records(_read_records(segment.path))
+                except FileNotFoundError:
+                    continue  # 다른 프로세스가 이미 압축했거나 삭제함
+                with open(temp_path, "wb") as f:
+                    for offset, event in merged:
+                        payload = json.dumps(event, ensure_ascii=False).encode("utf-8")
+                        f.write(RECORD_HEADER.pack(offset, len(payload)) + payload)
+                with self._lock, self._file_lock():
+                    if segment not in self.segments or not os.path.exists(segment.path):
+                        os.remove(temp_path)
+                        continue
+                    os.replace(temp_path, compacted_path)
+                    segment.close()
+                    os.remove(segment.path)
+                    segment.path = compacted_path
+                    segment.load_index()
+
+            with self._lock, self._file_lock():
+                while len(self.segments) > max(EVENT_LOG_MAX_SEGMENTS, EVENT_LOG_HOT_SEGMENTS + 1):
+                    oldest = self.segments.pop(0)
+                    oldest.close()
+                    try: os.remove(oldest.path)
+                    except FileNotFoundError: pass
+
+    # ---------- read ----------
+
+    @property
+    def first_offset(self) -> int:
+        return next((segment.offsets[0] for segment in self.segments if segment.offsets), self.next_offset)
+
+    def read(self, from_offset: int = 0, limit: int = 1000) -> List[Tuple[int, Dict[str, Any]]]:
+        """Up to `limit` events with offset >= from_offset, in order."""
+        events = []
+        with self._lock:
+            for segment in self.segments:
+                if segment.last_offset < from_offset: continue
+                for offset, payload in segment.records(from_offset):
+                    events.append((offset, json.loads(payload)))
+                    if len(events) >= limit: return events
+        return events
+
+    async def subscribe(self, from_offset: int = 0, follow: bool = True, batch: int = 1000, poll_interval: float = 0.2) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (offset, event) from `from_offset`; with follow=True keep waiting for new events."""
+        offset = from_offset
+        while True:
+            events = self.read(offset, batch)
+            for event_offset, event in events:
+                yield event_offset, event
+                offset = event_offset + 1
+            if events: continue
+            if not follow: return
+            waiter = asyncio.Event()
+            with self._lock:
+                if self.next_offset > offset: continue  # read 이후에 추가된 이벤트가 있음
+                self._waiters.append((asyncio.get_running_loop(), waiter))
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                self.refresh()  # 다른 프로세스가 기록 중인 로그를 따라가는 경우
+
+    def close(self):
+        compactor = self._compactor
+        if compactor is not None: compactor.join()
+        with self._lock:
+            if self._writer is not None: self._writer.close()
+            self._writer = None
+            for segment in self.segments: segment.close()
+
+_logs: "OrderedDict[str, EventLog]" = OrderedDict()
+_logs_lock = threading.Lock()
+
+def get_event_log(session_id: str) -> EventLog:
+    with _logs_lock:
+        log = _logs.get(session_id)
+        if log is None: log = _logs[session_id] = EventLog(session_id)
+        return log
+
+def main():
+    parser = argparse.ArgumentParser(description="Read a session's event log")
+    parser.add_argument("--session", type=str, default="ABC")
+    parser.add_argument("--from_offset", type=int, default=0)
+    parser.add_argument("--follow", action="store_true", help="Keep waiting for new events")
+    args = parser.parse_args()
+
+    log = get_event_log(args.session)
+    async def tail():
+        async for offset, event in log.subscribe(args.from_offset, follow=args.follow):
+            print(json.dumps({"offset": offset, **event}, ensure_ascii=False), flush=True)
+    try:
+        asyncio.run(tail())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,101 @@
 """
 Global event queue for streaming events across different components.
 Allows coder_agent_tool and other tools to send streaming events to main.py
+
+Consecutive text_chunk events of the same agent/source are coalesced in the queue: the newest
+chunk is held open for up to EVENT_COALESCE_WINDOW_MS (or until it reaches EVENT_COALESCE_MAX_CHARS,
+or any other event is queued behind it) and later tokens are appended to it. Consumers therefore
+see one event per window instead of one per token, at a delay below what is visible on screen.
+EVENT_COALESCE_WINDOW_MS=0 turns coalescing off.
+
+set_event_sink() redirects the events of the calling context (e.g. one MCP tool call running a
+sub-agent in a worker thread) to a callback instead of this queue.
 """
 
+import os
+import time
 import threading
+import contextvars
 from collections import deque
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
+
+from utils.stream_events import AgentEvent
+
+EVENT_COALESCE_WINDOW_MS = float(os.environ.get("EVENT_COALESCE_WINDOW_MS", 100))
+EVENT_COALESCE_MAX_CHARS = int(os.environ.get("EVENT_COALESCE_MAX_CHARS", 2048))
 
 # Global event queue
 _global_event_queue = deque()
 _queue_lock = threading.Lock()
+_open_chunk: Optional[AgentEvent] = None  # 아직 이어붙일 수 있는 마지막 text_chunk (항상 큐의 마지막 원소)
+_stats = {"put": 0, "delivered": 0}
+_event_sink: contextvars.ContextVar = contextvars.ContextVar("event_sink", default=None)
+
+def set_event_sink(sink: Optional[Callable[[Dict[str, Any]], None]]):
+    """Send events put by the calling context to `sink` instead of the global queue (None restores the queue)."""
+    return _event_sink.set(sink)
+
+def _window_closed(chunk: AgentEvent, now: float) -> bool:
+    return chunk.text_size >= EVENT_COALESCE_MAX_CHARS or (now - chunk.created) * 1000 >= EVENT_COALESCE_WINDOW_MS
 
 def put_event(event: Dict[str, Any]) -> None:
-    """Add an event to the global queue"""
+    """Add an event to the global queue (text chunks are merged into the open chunk of the same agent)"""
+    global _open_chunk
+    sink = _event_sink.get()
+    if sink is not None:
+        sink(event)
+        return
     with _queue_lock:
-        _global_event_queue.append(event)
+        _stats["put"] += 1
+        if EVENT_COALESCE_WINDOW_MS <= 0:
+            _global_event_queue.append(event)
+            return
 
-def get_event() -> Optional[Dict[str, Any]]:
-    """Get an event from the global queue (non-blocking)"""
+        is_text = event.get("event_type") == "text_chunk"
+        if (is_text and _open_chunk is not None and _open_chunk.agent_name == event.get("agent_name") and _open_chunk.source == event.get("source")
+                and _open_chunk.session_id == event.get("session_id") and not _window_closed(_open_chunk, time.monotonic())):
+            _open_chunk.append_text(event.get("data", ""))
+            return
+
+        if is_text:
+            # 새 윈도우: 호출자가 같은 이벤트 객체를 계속 사용하므로 큐에는 별도 객체로 보관
+            _open_chunk = AgentEvent.text_chunk(event.get("data", ""), event.get("agent_name"), event.get("session_id"), event.get("source"))
+            _global_event_queue.append(_open_chunk)
+        else:
+            _open_chunk = None
+            _global_event_queue.append(event)
+
+def _deliverable(flush: bool) -> bool:
+    global _open_chunk
+    if not _global_event_queue: return False
+    if _global_event_queue[0] is _open_chunk:
+        if not flush and not _window_closed(_open_chunk, time.monotonic()): return False
+        _open_chunk = None
+    return True
+
+def get_event(flush: bool = False) -> Optional[Dict[str, Any]]:
+    """Get an event from the global queue (non-blocking). flush=True also releases a chunk whose window is still open."""
     with _queue_lock:
-        if _global_event_queue:
+        if _deliverable(flush):
+            _stats["delivered"] += 1
             return _global_event_queue.popleft()
         return None
 
-def has_events() -> bool:
-    """Check if there are events in the queue"""
+def has_events(flush: bool = False) -> bool:
+    """Check if there are deliverable events in the queue"""
     with _queue_lock:
-        return len(_global_event_queue) > 0
+        return _deliverable(flush)
 
 def clear_queue() -> None:
     """Clear all events from the queue"""
+    global _open_chunk
+    with _queue_lock:
+        _global_event_queue.clear()
+        _open_chunk = None
+
+def queue_stats(reset: bool = False) -> Dict[str, Any]:
+    """Events put by producers vs. events handed to consumers (after coalescing)."""
     with _queue_lock:
-        _global_event_queue.clear()
\ No newline at end of file
+        stats = {**_stats, "coalesce_ratio": round(_stats["put"] / _stats["delivered"], 2) if _stats["delivered"] else None}
+        if reset: _stats.update(put=0, delivered=0)
+        return stats
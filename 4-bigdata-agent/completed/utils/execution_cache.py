@@ -0,0 +1,313 @@
+"""
+Content-addressed execution cache for python_repl_tool (opt-in: EXECUTION_CACHE=on).
+
+A cell is keyed by its normalized code plus the content hash of every input file it
+references (sha256 for local paths, ETags for s3:// paths). On a hit the recorded output
+is returned and the artifacts the cell produced are restored into the current run's artifact
+directory (utils/artifact_store.py; ./artifacts/ when no run is open).
+Add `# nocache` anywhere in a cell to opt out (e.g. cells using random sampling or now()).
+
+Only paths written as string literals that exist when the key is built are fingerprinted; paths
+built with os.path.join, f-strings, variables or glob patterns are not, which is why the cache is
+off by default. A cell that overlapped another cell writing to the same artifact directory is not
+stored, because its produced artifacts cannot be told apart.
+Glue statements are never cached: the interactive session is stateful.
+"""
+
+import os
+import re
+import ast
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+NOCACHE_MARKER = re.compile(r"#\s*no-?cache\b", re.IGNORECASE)
+S3_PATH = re.compile(r"^s3a?://([^/]+)/?(.*)$")
+WRITE_CALLS = {"to_csv", "to_parquet", "to_excel", "to_json", "to_pickle", "savefig", "save", "makedirs", "mkdir", "rmtree"}
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+def _atomic_write_json(path, obj):
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _sha256_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ExecutionCache:
+
+    def __init__(self, cache_dir=None, artifacts_dir=None, max_bytes=None, enabled=None):
+        self.cache_dir = cache_dir or os.environ.get("EXECUTION_CACHE_DIR", "./.cache/execution")
+        self._artifacts_dir = artifacts_dir
+        self.max_bytes = max_bytes or int(float(os.environ.get("EXECUTION_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+        self.enabled = enabled if enabled is not None else os.environ.get("EXECUTION_CACHE", "off").lower() in ("1", "on", "true")
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "stored": 0, "evicted": 0, "overlapped": 0}
+        self._lock = threading.Lock()
+        self._file_hash_memo = {}  # (path, size, mtime_ns) -> sha256
+        self._s3_client = None
+        self._active = {}  # artifacts_dir -> {cell token: overlapped}
+
+    @property
+    def artifacts_dir(self):
+        from utils.artifact_store import artifact_store  # artifact_store 가 이 모듈의 헬퍼를 사용 (순환 import 방지)
+        return self._artifacts_dir or artifact_store.run_dir()
+
+    # ---------- key construction ----------
+
+    @staticmethod
+    def normalize_code(code):
+        """Strip comments and formatting so near-identical cells share a key."""
+        try:
+            return ast.unparse(ast.parse(code))
+        except (SyntaxError, ValueError):
+            lines = [line.rstrip() for line in code.strip().splitlines()]
+            return "\n".join(line for line in lines if line and not line.lstrip().startswith("#"))
+
+    @staticmethod
+    def _write_targets(tree):
+        """String literals passed to writer calls (to_csv, savefig, df.write..., open(.., 'w')) - outputs, not inputs."""
+        targets = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call): continue
+            func = ast.unparse(node.func)
+            args = [arg for arg in [*node.args, *(kw.value for kw in node.keywords)] if isinstance(arg, ast.Constant) and isinstance(arg.value, str)]
+            if not args: continue
+            if func == "open":
+                mode = node.args[1].value if len(node.args) > 1 and isinstance(node.args[1], ast.Constant) else "r"
+                if any(flag in str(mode) for flag in "wax"): targets.add(args[0].value)
+            elif func.split(".")[-1] in WRITE_CALLS or ".write" in func:
+                targets.update(arg.value for arg in args)
+        return targets
+
+    @staticmethod
+    def referenced_paths(code):
+        """String literals in the cell that look like local files or S3 objects read by the cell."""
+        try:
+            tree = ast.parse(code)
+            literals = [node.value for node in ast.walk(tree) if isinstance(node, ast.Constant) and isinstance(node.value, str)]
+            outputs = ExecutionCache._write_targets(tree)
+        except (SyntaxError, ValueError):
+            literals, outputs = re.findall(r"""['"]([^'"\n]+)['"]""", code), set()
+        paths = set()
+        for literal in literals:
+            if literal in outputs: continue
+            literal = literal.strip()
+            if S3_PATH.match(literal) or os.path.isfile(literal) or os.path.isdir(literal):
+                paths.add(literal)
+        return sorted(paths)
+
+    def _local_fingerprint(self, path):
+        if os.path.isdir(path):
+            # 디렉토리는 (상대경로, 크기, 수정시각) 목록으로 지문 생성 - 대용량 파티션 폴더 전체 해시 방지
+            entries = []
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    full_path = os.path.join(root, name)
+                    stat = os.stat(full_path)
+                    entries.append(f"{os.path.relpath(full_path, path)}:{stat.st_size}:{stat.st_mtime_ns}")
+            return "dir:" + hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._file_hash_memo:
+            self._file_hash_memo[memo_key] = _sha256_file(path)
+        return self._file_hash_memo[memo_key]
+
+    def _s3_fingerprint(self, path):
+        if self._s3_client is None:
+            import boto3
+            self._s3_client = boto3.client("s3")
+        bucket, key = S3_PATH.match(path).groups()
+        try:
+            if key and not key.endswith("/"):
+                return self._s3_client.head_object(Bucket=bucket, Key=key)["ETag"]
+        except Exception:
+            pass  # prefix (폴더) 경로일 수 있으므로 list로 재시도
+
+        etags = []
+        paginator = self._s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=key):
+            etags.extend(f"{obj['Key']}:{obj['ETag']}" for obj in page.get("Contents", []))
+        return "prefix:" + hashlib.sha256("\n".join(etags).encode()).hexdigest()
+
+    def make_key(self, tool_name, code):
+        from utils.artifact_store import artifact_store
+        inputs, run_dir = {}, os.path.abspath(artifact_store.run_dir())
+        # './artifacts/...' 입력은 현재 run 의 디렉토리에서 지문 생성 (key 에는 원래 경로 사용 - run 간 재사용)
+        for path in self.referenced_paths(artifact_store.resolve_paths(code)):
+            inputs[path.replace(run_dir, "./artifacts", 1)] = self._s3_fingerprint(path) if S3_PATH.match(path) else self._local_fingerprint(path)
+        payload = json.dumps({"tool": tool_name, "code": self.normalize_code(code), "inputs": inputs}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest(), inputs
+
+    # ---------- artifact snapshots ----------
+
+    def _snapshot_artifacts(self):
+        snapshot = {}
+        if not os.path.isdir(self.artifacts_dir): return snapshot
+        for root, _, files in os.walk(self.artifacts_dir):
+            for name in files:
+                full_path = os.path.join(root, name)
+                stat = os.stat(full_path)
+                snapshot[os.path.relpath(full_path, self.artifacts_dir)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _store_artifacts(self, before, after):
+        produced = {}
+        blob_dir = os.path.join(self.cache_dir, "blobs")
+        os.makedirs(blob_dir, exist_ok=True)
+        for rel_path, signature in after.items():
+            if before.get(rel_path) == signature: continue
+            full_path = os.path.join(self.artifacts_dir, rel_path)
+            digest = _sha256_file(full_path)
+            blob_path = os.path.join(blob_dir, digest)
+            if not os.path.exists(blob_path): shutil.copyfile(full_path, blob_path)
+            produced[rel_path] = digest
+        return produced
+
+    def _restore_artifacts(self, produced):
+        for rel_path, digest in produced.items():
+            target = os.path.join(self.artifacts_dir, rel_path)
+            if os.path.exists(target) and _sha256_file(target) == digest: continue
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            shutil.copyfile(os.path.join(self.cache_dir, "blobs", digest), target)
+
+    # ---------- index / LRU ----------
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), encoding="utf-8") as f: return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _evict(self, index):
+        """Drop least-recently-used entries until the cache fits in max_bytes (blobs are shared, so count unique)."""
+        def total_bytes():
+            blobs = {digest: size for entry in index.values() for digest, size in entry["blobs"].items()}
+            return sum(entry["result_bytes"] for entry in index.values()) + sum(blobs.values())
+
+        while index and total_bytes() > self.max_bytes:
+            oldest = min(index, key=lambda key: index[key]["last_access"])
+            index.pop(oldest)
+            self.stats["evicted"] += 1
+
+        live_blobs = {digest for entry in index.values() for digest in entry["blobs"]}
+        blob_dir = os.path.join(self.cache_dir, "blobs")
+        if os.path.isdir(blob_dir):
+            for digest in os.listdir(blob_dir):
+                if digest not in live_blobs: os.remove(os.path.join(blob_dir, digest))
+
+    # ---------- public API ----------
+
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def get_stats(self):
+        return {**self.stats, "hit_rate": round(self.hit_rate(), 4)}
+
+    def cached_run(self, tool_name: str, code: str, execute: Callable[[], Any], is_success: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Run `execute()` through the cache.
+
+        Args:
+            tool_name: Tool that owns the cell (part of the key, e.g. "python_repl_tool")
+            code: The code that `execute` runs
+            execute: Zero-arg callable that actually runs the code and returns a JSON-serializable result
+            is_success: Only results for which this returns True are stored (errors are never cached)
+
+        Returns:
+            The recorded result on a hit, otherwise the fresh result of `execute()`
+        """
+        if not self.enabled or NOCACHE_MARKER.search(code):
+            self.stats["bypassed"] += 1
+            return execute()
+
+        try:
+            key, inputs = self.make_key(tool_name, code)
+        except Exception as e:
+            logger.warning(f"Execution cache key failed, running uncached: {e}")
+            self.stats["bypassed"] += 1
+            return execute()
+
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is not None:
+                try:
+                    with open(os.path.join(self.cache_dir, "entries", f"{key}.json"), encoding="utf-8") as f:
+                        record = json.load(f)
+                    self._restore_artifacts(record["artifacts"])
+                    entry["last_access"] = time.time()
+                    _atomic_write_json(self._index_path(), index)
+                    self.stats["hits"] += 1
+                    logger.info(f"{Colors.GREEN}Execution cache hit ({tool_name}, {len(record['artifacts'])} artifacts restored, hit rate {self.hit_rate():.0%}){Colors.END}")
+                    return record["result"]
+                except (OSError, KeyError, json.JSONDecodeError) as e:
+                    logger.warning(f"Execution cache entry {key[:12]} unreadable, re-running: {e}")
+
+        self.stats["misses"] += 1
+        artifacts_dir, token = os.path.realpath(self.artifacts_dir), object()
+        with self._lock:
+            active = self._active.setdefault(artifacts_dir, {})
+            for other in active: active[other] = True  # 같은 디렉토리에 동시에 쓰는 셀들은 산출물 구분 불가
+            active[token] = bool(active)
+        try:
+            before = self._snapshot_artifacts()
+            result = execute()
+        finally:
+            with self._lock:
+                overlapped = self._active[artifacts_dir].pop(token)
+                if not self._active[artifacts_dir]: del self._active[artifacts_dir]
+        if is_success is not None and not is_success(result): return result
+        if overlapped:
+            self.stats["overlapped"] += 1
+            logger.info(f"{Colors.YELLOW}Execution cache: {tool_name} cell overlapped another cell in {artifacts_dir}, not stored{Colors.END}")
+            return result
+
+        try:
+            with self._lock:
+                os.makedirs(os.path.join(self.cache_dir, "entries"), exist_ok=True)
+                produced = self._store_artifacts(before, self._snapshot_artifacts())
+                record = {"tool": tool_name, "inputs": inputs, "result": result, "artifacts": produced}
+                _atomic_write_json(os.path.join(self.cache_dir, "entries", f"{key}.json"), record)
+
+                index = self._load_index()
+                index[key] = {
+                    "last_access": time.time(),
+                    "result_bytes": len(json.dumps(result, ensure_ascii=False).encode()),
+                    "blobs": {digest: os.path.getsize(os.path.join(self.cache_dir, "blobs", digest)) for digest in produced.values()},
+                }
+                self._evict(index)
+                for stale in set(os.listdir(os.path.join(self.cache_dir, "entries"))) - {f"{k}.json" for k in index}:
+                    os.remove(os.path.join(self.cache_dir, "entries", stale))
+                _atomic_write_json(self._index_path(), index)
+                self.stats["stored"] += 1
+        except (OSError, TypeError) as e:
+            logger.warning(f"{Colors.YELLOW}Execution cache store failed ({tool_name}): {e}{Colors.END}")
+
+        return result
+
+execution_cache = ExecutionCache()
+
+def get_execution_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters and hit rate for this process."""
+    return execution_cache.get_stats()
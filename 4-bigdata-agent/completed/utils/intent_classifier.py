@@ -0,0 +1,148 @@
+"""
+Local intent classifier that lets simple analysis requests skip the coordinator LLM call.
+
+coordinator_node logs every LLM decision (request -> handoff_to_planner or not) to
+COORDINATOR_DECISIONS_LOG. A TF-IDF (char n-gram, works for Korean and English) + logistic
+regression model trained on that log predicts the handoff in a few milliseconds. Only confident
+"handoff" predictions skip the LLM; conversational or ambiguous inputs still go to the coordinator.
+A small shadow sample of confident requests is still sent to the LLM so agreement stays measured.
+
+Usage (from 4-bigdata-agent/completed):
+    python -m utils.intent_classifier train   # fit on the decision log and save the model
+    python -m utils.intent_classifier stats   # agreement rate between classifier and LLM
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import random
+import logging
+import argparse
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+HANDOFF, DIRECT = "handoff", "direct"
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+class IntentClassifier:
+
+    def __init__(self, model_path=None, log_path=None, threshold=None, shadow_rate=None, enabled=None):
+        self.model_path = model_path or os.environ.get("INTENT_CLASSIFIER_MODEL", "./.cache/intent_classifier.pkl")
+        self.log_path = log_path or os.environ.get("COORDINATOR_DECISIONS_LOG", "./.cache/coordinator_decisions.jsonl")
+        self.threshold = threshold if threshold is not None else float(os.environ.get("INTENT_CONFIDENCE_THRESHOLD", 0.9))
+        self.shadow_rate = shadow_rate if shadow_rate is not None else float(os.environ.get("INTENT_SHADOW_RATE", 0.05))
+        self.enabled = enabled if enabled is not None else os.environ.get("INTENT_CLASSIFIER", "on").lower() not in ("0", "off", "false")
+        self._pipeline = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded: return self._pipeline
+        self._loaded = True
+        if os.path.exists(self.model_path):
+            try:
+                with open(self.model_path, "rb") as f: self._pipeline = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"{Colors.YELLOW}Intent classifier not loaded ({e}); using the coordinator LLM{Colors.END}")
+        return self._pipeline
+
+    def predict(self, request: str) -> Optional[Tuple[str, float, float]]:
+        """(label, confidence, latency_ms) or None when no trained model is available."""
+        if not self.enabled or self._load() is None: return None
+        started = time.perf_counter()
+        probabilities = self._pipeline.predict_proba([request])[0]
+        best = probabilities.argmax()
+        return str(self._pipeline.classes_[best]), float(probabilities[best]), (time.perf_counter() - started) * 1000
+
+    def should_skip_coordinator(self, prediction) -> bool:
+        """Confident handoff predictions skip the LLM, except for the shadow sample kept for agreement stats."""
+        if prediction is None: return False
+        label, confidence, _ = prediction
+        return label == HANDOFF and confidence >= self.threshold and random.random() >= self.shadow_rate
+
+    def log_decision(self, request: str, handoff: bool, prediction=None):
+        """Append the coordinator LLM's decision (with the classifier's guess, if any) to the training log."""
+        if not self.enabled: return
+        record = {"timestamp": time.time(), "request": request, "label": HANDOFF if handoff else DIRECT}
+        if prediction is not None:
+            record.update({"predicted": prediction[0], "confidence": round(prediction[1], 4), "classify_ms": round(prediction[2], 3)})
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Coordinator decision not logged: {e}")
+
+    def _records(self):
+        if not os.path.exists(self.log_path): return []
+        with open(self.log_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def train(self, min_examples=20) -> Dict[str, Any]:
+        from sklearn.pipeline import make_pipeline
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.model_selection import cross_val_score
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        records = self._records()
+        texts, labels = [record["request"] for record in records], [record["label"] for record in records]
+        if len(records) < min_examples or len(set(labels)) < 2:
+            raise ValueError(f"Need at least {min_examples} logged decisions covering both labels (have {len(records)}: {sorted(set(labels))})")
+
+        pipeline = make_pipeline(
+            TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True, min_df=1),
+            LogisticRegression(class_weight="balanced", max_iter=1000),
+        )
+        folds = min(5, min(labels.count(HANDOFF), labels.count(DIRECT)))
+        accuracy = float(cross_val_score(pipeline, texts, labels, cv=folds).mean()) if folds >= 2 else None
+        pipeline.fit(texts, labels)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.model_path)), exist_ok=True)
+        with open(self.model_path, "wb") as f: pickle.dump(pipeline, f)
+        self._pipeline, self._loaded = pipeline, True
+        return {"examples": len(records), "handoff": labels.count(HANDOFF), "direct": labels.count(DIRECT), "cv_accuracy": accuracy, "model_path": self.model_path}
+
+    def agreement_stats(self) -> Dict[str, Any]:
+        """How often the classifier agreed with the LLM, overall and above the confidence threshold."""
+        scored = [record for record in self._records() if "predicted" in record]
+        confident = [record for record in scored if record["confidence"] >= self.threshold]
+        def rate(records):
+            return round(sum(record["predicted"] == record["label"] for record in records) / len(records), 4) if records else None
+        return {
+            "logged_decisions": len(self._records()),
+            "scored": len(scored),
+            "agreement": rate(scored),
+            "confident": len(confident),
+            "confident_agreement": rate(confident),
+            "threshold": self.threshold,
+        }
+
+intent_classifier = IntentClassifier()
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinator intent classifier")
+    parser.add_argument("command", choices=["train", "stats"])
+    parser.add_argument("--min_examples", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        try:
+            result = intent_classifier.train(min_examples=args.min_examples)
+        except ValueError as e:
+            print(f"{Colors.YELLOW}{e}{Colors.END}")
+            sys.exit(1)
+    else:
+        result = intent_classifier.agreement_stats()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
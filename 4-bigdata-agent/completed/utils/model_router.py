@@ -0,0 +1,126 @@
+"""
+Latency-tiered model routing per agent role.
+
+strands_utils.get_agent asks the router which llm_type to use instead of taking the call site's
+agent_type as-is. The decision uses:
+  - role: bookkeeping roles (tracker, coordinator) go to the fast tier
+  - prompt size: long system prompts are never sent to the fast tier
+  - per-run latency budget (RUN_LATENCY_BUDGET_S): once most of the budget is spent, roles that
+    tolerate it (validator, reporter) are moved down a tier as well
+  - escalation: a failed validation bumps the coder/validator one tier up for the rest of the run
+
+Enable with MODEL_ROUTING=on (default off: call sites keep their hardcoded models).
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 작은 모델 -> 큰 모델 순서. escalation은 이 순서로 한 단계씩 올라감
+MODEL_TIERS = ["nova-micro", "claude-haiku-4-5", "claude-sonnet-3-7", "claude-sonnet-4", "claude-sonnet-4-5"]
+# extended thinking 미지원 모델 (enable_reasoning=True 인 에이전트에는 배정하지 않음)
+NO_REASONING_TIERS = {"nova-micro"}
+
+# role -> routing policy
+#   tier: 기본으로 배정할 llm_type (None 이면 호출부의 agent_type 유지)
+#   under_pressure: 지연 예산을 대부분 소진했을 때 배정할 llm_type
+ROLE_POLICY = {
+    "coordinator": {"tier": "claude-haiku-4-5"},
+    "tracker": {"tier": "claude-haiku-4-5"},
+    "validator": {"tier": None, "under_pressure": "claude-haiku-4-5"},
+    "reporter": {"tier": None, "under_pressure": "claude-haiku-4-5"},
+}
+# validation 실패 시 한 단계 큰 모델로 올릴 role
+ESCALATE_ON_VALIDATION_FAILURE = ("coder", "validator")
+
+class Colors:
+    BLUE = '\033[94m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+def _tier_index(llm_type):
+    return MODEL_TIERS.index(llm_type) if llm_type in MODEL_TIERS else None
+
+def is_validation_failure(validator_output: str) -> bool:
+    """True when the validator's return value reports PARTIAL_SUCCESS/ERROR or calculations needing review."""
+    text = validator_output or ""
+    status = text.split("## Status", 1)[1].strip().split("\n", 1)[0] if "## Status" in text else ""
+    if "ERROR" in status or "PARTIAL" in status: return True
+    for line in text.splitlines():
+        if "Needs review:" in line:
+            count = line.split("Needs review:", 1)[1].strip().split(" ", 1)[0].strip(",")
+            if count.isdigit() and int(count) > 0: return True
+    return False
+
+class ModelRouter:
+
+    def __init__(self):
+        self.enabled = os.environ.get("MODEL_ROUTING", "off").lower() in ("1", "on", "true")
+        self.fast_tier = os.environ.get("MODEL_ROUTING_FAST_TIER", "claude-haiku-4-5")
+        assert self.fast_tier in MODEL_TIERS, f"MODEL_ROUTING_FAST_TIER must be one of {MODEL_TIERS}"
+        self.fast_tier_max_prompt_chars = int(os.environ.get("MODEL_ROUTING_FAST_MAX_PROMPT_CHARS", 60000))
+        budget = os.environ.get("RUN_LATENCY_BUDGET_S")
+        self.latency_budget_s = float(budget) if budget else None
+        self.pressure_ratio = float(os.environ.get("RUN_LATENCY_PRESSURE_RATIO", 0.6))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new run: restart the latency budget clock and clear escalations."""
+        with self._lock:
+            self.run_started = time.monotonic()
+            self.escalations: Dict[str, int] = {}
+            self.decisions: List[Dict[str, Any]] = []
+
+    def under_pressure(self):
+        if not self.latency_budget_s: return False
+        return time.monotonic() - self.run_started >= self.latency_budget_s * self.pressure_ratio
+
+    def route(self, role: str, requested: str, prompt_chars: int = 0, enable_reasoning: bool = False) -> str:
+        """Return the llm_type to use for this agent call."""
+        if not self.enabled: return requested
+
+        policy = ROLE_POLICY.get(role, {})
+        chosen, reason = requested, "call site"
+        if self.under_pressure() and policy.get("under_pressure"):
+            chosen, reason = policy["under_pressure"], "latency budget"
+        elif policy.get("tier"):
+            chosen, reason = policy["tier"], "role"
+        if chosen == "claude-haiku-4-5": chosen = self.fast_tier
+
+        # 긴 프롬프트 / reasoning 은 fast tier 로 보내지 않음
+        if chosen != requested and _tier_index(chosen) is not None and _tier_index(chosen) <= _tier_index(self.fast_tier):
+            if prompt_chars > self.fast_tier_max_prompt_chars:
+                chosen, reason = requested, f"prompt too large for fast tier ({prompt_chars} chars)"
+        if enable_reasoning and chosen in NO_REASONING_TIERS:
+            chosen, reason = requested, "reasoning not supported"
+
+        with self._lock:
+            steps = self.escalations.get(role, 0)
+            if steps and _tier_index(chosen) is not None:
+                chosen = MODEL_TIERS[min(_tier_index(chosen) + steps, len(MODEL_TIERS) - 1)]
+                reason = f"{reason}, escalated +{steps}"
+            self.decisions.append({"role": role, "requested": requested, "chosen": chosen, "reason": reason, "prompt_chars": prompt_chars})
+
+        if chosen != requested:
+            logger.info(f"{Colors.BLUE}{role.upper()} - routed {requested} -> {chosen} ({reason}){Colors.END}")
+        return chosen
+
+    def escalate(self, roles=ESCALATE_ON_VALIDATION_FAILURE, reason="validation failure"):
+        """Use one tier larger model for these roles for the rest of the run."""
+        if not self.enabled: return
+        with self._lock:
+            for role in roles:
+                self.escalations[role] = self.escalations.get(role, 0) + 1
+        logger.info(f"{Colors.YELLOW}Model escalation ({reason}): {', '.join(roles)}{Colors.END}")
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "escalations": dict(self.escalations), "decisions": list(self.decisions)}
+
+model_router = ModelRouter()
@@ -0,0 +1,292 @@
+"""
+Chunked, multi-process pandas helpers for the coder's python_repl_tool cells.
+
+Coder-generated pandas code runs single-threaded: pd.read_csv parses a 10M-row card file on one core
+and groupby over Card_Category / Qtr / state_cd aggregates on one core. This module splits the input
+into independent tasks (byte ranges of a CSV aligned to line starts, Parquet row groups, or files of
+a partitioned folder / glob), and every worker process reads its task in chunks of `chunksize` rows
+and reduces it to a partial aggregate. Only the small partials travel back to the cell, where they
+are combined (map-reduce), so parsing and aggregation both scale with cores and memory per worker
+stays bounded by the chunk size. No Spark session is needed.
+
+    from utils.pandas_parallel import read_chunks, parallel_groupby, parallel_map
+
+    summary = parallel_groupby("./data/transactions.csv", by=["Card_Category", "Qtr"],
+                               agg={"Total_Trans_Amt": ["sum", "mean"], "Client_Num": "nunique"})
+    for chunk in read_chunks("./data/transactions.csv", columns=["Client_Num", "Total_Trans_Amt"]):
+        ...
+    counts = parallel_map("./data/transactions.csv", lambda df: df["state_cd"].value_counts(),
+                          reduce=lambda parts: pd.concat(parts).groupby(level=0).sum())
+
+Supported aggregations: sum, count, size, min, max, mean, std, var, nunique. mean/var/std carry
+(count, mean, M2) per partial and merge them with Chan's parallel formula, so large offsets (values
+around 1e8 with a std of 1) do not cancel. Workers default to PANDAS_PARALLEL_WORKERS, else the cell's
+thread quota (CELL_THREADS / utils.cell_quota), so a cell does not fan out over every core of a host
+that runs several cells at once. CSV byte-range splitting assumes no quoted field contains a newline;
+pass split_files=False for such files (one task per file).
+"""
+
+import io
+import os
+import glob
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.cell_quota import cell_quota
+
+DEFAULT_CHUNKSIZE = 500_000
+MIN_RANGE_BYTES = 32 * 1024 * 1024  # 이보다 작은 CSV 구간으로는 나누지 않음 (프로세스 오버헤드가 더 큼)
+PARTIAL_FUNCS = {"sum": ("sum",), "count": ("count",), "size": ("size",), "min": ("min",), "max": ("max",),
+                 "mean": ("count", "mean"), "std": ("count", "mean", "m2"), "var": ("count", "mean", "m2")}
+
+def default_workers() -> int:
+    return max(1, int(os.environ.get("PANDAS_PARALLEL_WORKERS", cell_quota.threads)))
+
+# ---------- task planning ----------
+
+def _is_parquet(path: str) -> bool:
+    return path.endswith((".parquet", ".pq", ".parq"))
+
+def _expand(source: Union[str, Sequence[str]]) -> List[str]:
+    """A file, a folder of files (partitioned output), a glob pattern or a list of paths."""
+    if not isinstance(source, str): return [path for item in source for path in _expand(item)]
+    if os.path.isdir(source):
+        return sorted(os.path.join(root, name) for root, _, names in os.walk(source) for name in names
+                      if name.endswith((".csv", ".csv.gz", ".parquet", ".pq", ".parq")) and not name.startswith(("_", ".")))
+    if any(char in source for char in "*?["): return sorted(glob.glob(source))
+    return [source]
+
+def _csv_ranges(path: str, parts: int) -> List[tuple]:
+    """Split a CSV into byte ranges that start at line boundaries (the header line is excluded)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+        parts = max(1, min(parts, (size - data_start) // MIN_RANGE_BYTES or 1))
+        bounds = [data_start]
+        for index in range(1, parts):
+            f.seek(data_start + (size - data_start) * index // parts)
+            f.readline()  # 다음 줄의 시작으로 정렬
+            if f.tell() > bounds[-1]: bounds.append(f.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def _plan_tasks(source, workers: int, split_files: bool) -> List[Dict[str, Any]]:
+    tasks = []
+    paths = _expand(source)
+    if not paths: raise FileNotFoundError(f"No input files for {source!r}")
+    per_file = max(1, workers // len(paths))
+    for path in paths:
+        if _is_parquet(path):
+            try:
+                import pyarrow.parquet as pq
+                row_groups = pq.ParquetFile(path).num_row_groups
+                groups_per_task = max(1, -(-row_groups // per_file)) if split_files else row_groups
+                tasks.extend({"kind": "parquet", "path": path, "row_groups": list(range(start, min(start + groups_per_task, row_groups)))}
+                             for start in range(0, row_groups, groups_per_task))
+                continue
+            except ImportError:
+                pass  # pyarrow 가 없으면 파일 단위로 pandas 가 읽음
+            tasks.append({"kind": "parquet", "path": path, "row_groups": None})
+        elif split_files and os.path.isfile(path) and not path.endswith(".gz"):
+            tasks.extend({"kind": "csv_range", "path": path, "start": start, "end": end} for start, end in _csv_ranges(path, per_file))
+        else:
+            tasks.append({"kind": "csv", "path": path})
+    return tasks
+
+# ---------- reading ----------
+
+class _RangeReader(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file."""
+
+    def __init__(self, path, start, end):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0: return 0
+        count = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._remaining)])
+        self._remaining -= count
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def _csv_header(path: str) -> List[str]:
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def _read_task(task: Dict[str, Any], columns: Optional[List[str]], chunksize: int, read_kwargs: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+    if task["kind"] == "parquet":
+        if task["row_groups"] is None:
+            yield pd.read_parquet(task["path"], columns=columns, **read_kwargs)
+            return
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(task["path"])
+        for batch in parquet_file.iter_batches(batch_size=chunksize, row_groups=task["row_groups"], columns=columns):
+            yield batch.to_pandas()
+    elif task["kind"] == "csv_range":
+        names = _csv_header(task["path"])
+        with io.BufferedReader(_RangeReader(task["path"], task["start"], task["end"]), buffer_size=1024 * 1024) as stream:
+            yield from pd.read_csv(stream, header=None, names=names, usecols=columns, chunksize=chunksize, **read_kwargs)
+    else:
+        yield from pd.read_csv(task["path"], usecols=columns, chunksize=chunksize, **read_kwargs)
+
+def read_chunks(source, columns: Optional[List[str]] = None, chunksize: int = DEFAULT_CHUNKSIZE, **read_kwargs) -> Iterator[pd.DataFrame]:
+    """Iterate over a CSV / Parquet file, folder or glob in DataFrames of at most `chunksize` rows (single process)."""
+    for task in _plan_tasks(source, 1, split_files=False):
+        yield from _read_task(task, columns, chunksize, read_kwargs)
+
+# ---------- map-reduce ----------
+
+_FORK_FRAME: Optional[pd.DataFrame] = None  # fork 로 상속되는 입력 DataFrame (pickle 전송 없이 공유)
+_FORK_CALL: Optional[tuple] = None  # fork 로 상속되는 (task_func, args) - 셀에서 정의한 lambda 도 사용 가능
+
+def _frame_tasks(frame: pd.DataFrame, workers: int, chunksize: int) -> List[Dict[str, Any]]:
+    step = max(1, min(chunksize, -(-len(frame) // workers)))
+    return [{"kind": "frame", "start": start, "end": min(start + step, len(frame))} for start in range(0, len(frame), step)]
+
+def _task_chunks(task, columns, chunksize, read_kwargs):
+    if task["kind"] == "frame":
+        frame = task.get("frame", _FORK_FRAME)
+        chunk = frame.iloc[task["start"]:task["end"]]
+        yield chunk[columns] if columns else chunk
+    else:
+        yield from _read_task(task, columns, chunksize, read_kwargs)
+
+def _map_task(task, func, columns, chunksize, read_kwargs):
+    return [func(chunk) for chunk in _task_chunks(task, columns, chunksize, read_kwargs)]
+
+def _forked_task(task):
+    task_func, args = _FORK_CALL
+    return task_func(task, *args)
+
+def _run(source, task_func, args, workers, chunksize, split_files) -> List[Any]:
+    global _FORK_FRAME, _FORK_CALL
+    workers = workers or default_workers()
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    if isinstance(source, pd.DataFrame):
+        tasks = _frame_tasks(source, workers, chunksize)
+        if start_method == "fork": _FORK_FRAME = source
+        else: tasks = [{**task, "frame": source.iloc[task["start"]:task["end"]], "start": 0, "end": task["end"] - task["start"]} for task in tasks]
+    else:
+        tasks = _plan_tasks(source, workers, split_files)
+    try:
+        if workers == 1 or len(tasks) <= 1:  # 헤더만 있는 CSV / 빈 DataFrame 은 task 가 없음
+            return [task_func(task, *args) for task in tasks]
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=multiprocessing.get_context(start_method)) as pool:
+            if start_method == "fork":
+                _FORK_CALL = (task_func, args)
+                return list(pool.map(_forked_task, tasks))
+            return list(pool.map(task_func, tasks, *[[arg] * len(tasks) for arg in args]))
+    finally:
+        _FORK_FRAME, _FORK_CALL = None, None
+
+def parallel_map(source, func: Callable[[pd.DataFrame], Any], reduce: Optional[Callable[[List[Any]], Any]] = None,
+                 columns: Optional[List[str]] = None, workers: Optional[int] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                 split_files: bool = True, **read_kwargs) -> Any:
+    """
+    Apply `func` to every chunk of `source` (path, folder, glob, list of paths or DataFrame) across processes.
+
+    Returns reduce(list of results) or the list itself. Workers are forked, so `func` may be a
+    lambda or a function defined in the cell; its results must be picklable.
+    """
+    results = [result for task_results in _run(source, _map_task, (func, columns, chunksize, read_kwargs), workers, chunksize, split_files) for result in task_results]
+    return reduce(results) if reduce else results
+
+# ---------- groupby / aggregate ----------
+
+def _normalize_agg(agg: Dict[str, Union[str, List[str]]]) -> Dict[str, List[str]]:
+    spec = {column: [funcs] if isinstance(funcs, str) else list(funcs) for column, funcs in agg.items()}
+    unsupported = {func for funcs in spec.values() for func in funcs} - set(PARTIAL_FUNCS) - {"nunique"}
+    if unsupported: raise ValueError(f"Unsupported aggregation(s) {sorted(unsupported)}; use {sorted(PARTIAL_FUNCS) + ['nunique']} or parallel_map")
+    return spec
+
+def _partial(chunk: pd.DataFrame, by: List[str], spec: Dict[str, List[str]], dropna: bool):
+    """Partial aggregates of one chunk: decomposable statistics plus distinct (key, value) pairs for nunique."""
+    grouped = chunk.groupby(by, dropna=dropna, observed=True, sort=False)
+    parts, distinct = {}, {}
+    for column, funcs in spec.items():
+        needed = {partial for func in funcs if func != "nunique" for partial in PARTIAL_FUNCS[func]}
+        for partial in needed:
+            if partial == "m2": parts[(column, partial)] = grouped[column].var(ddof=0) * grouped[column].count()
+            elif partial == "size": parts[(column, partial)] = grouped.size()
+            else: parts[(column, partial)] = getattr(grouped[column], partial)()
+        if "nunique" in funcs: distinct[column] = chunk[by + [column]].drop_duplicates()
+    return pd.DataFrame(parts) if parts else None, distinct
+
+def _groupby_task(task, by, spec, columns, chunksize, read_kwargs, dropna):
+    """One worker: fold every chunk of the task into a single partial (bounded memory)."""
+    combined, distinct = None, {}
+    for chunk in _task_chunks(task, columns, chunksize, read_kwargs):
+        partial, chunk_distinct = _partial(chunk, by, spec, dropna)
+        combined = partial if combined is None else _combine([combined, partial], by, dropna)
+        for column, pairs in chunk_distinct.items():
+            distinct[column] = pairs if column not in distinct else pd.concat([distinct[column], pairs]).drop_duplicates()
+    return combined, distinct
+
+def _combine(partials: List[pd.DataFrame], by: List[str], dropna: bool) -> pd.DataFrame:
+    frame = pd.concat([partial for partial in partials if partial is not None])
+    levels = list(range(len(by)))
+    how = {column: ("min" if column[1] == "min" else "max" if column[1] == "max" else "sum") for column in frame.columns if column[1] not in ("mean", "m2")}
+    combined = frame.groupby(level=levels, dropna=dropna, sort=False).agg(how)
+    for column in {column for column, partial in frame.columns if partial == "mean"}:
+        # Chan 병합: mean = sum(n_i * mean_i) / n, M2 = sum(M2_i) + sum(n_i * (mean_i - mean)^2)
+        count, mean = frame[(column, "count")], frame[(column, "mean")].fillna(0)
+        total = combined[(column, "count")]
+        combined[(column, "mean")] = (count * mean).groupby(level=levels, dropna=dropna, sort=False).sum() / total.replace(0, np.nan)
+        if (column, "m2") in frame.columns:
+            delta = mean - combined[(column, "mean")].reindex(frame.index).to_numpy()
+            spread = frame[(column, "m2")].fillna(0) + count * delta.fillna(0) ** 2
+            combined[(column, "m2")] = spread.groupby(level=levels, dropna=dropna, sort=False).sum()
+    return combined
+
+def parallel_groupby(source, by: Union[str, List[str]], agg: Dict[str, Union[str, List[str]]], workers: Optional[int] = None,
+                     chunksize: int = DEFAULT_CHUNKSIZE, split_files: bool = True, dropna: bool = True, sort: bool = True,
+                     **read_kwargs) -> pd.DataFrame:
+    """
+    groupby(by).agg(agg) over a CSV / Parquet path, folder, glob or DataFrame, computed across processes.
+
+    Columns are named like pandas: `column` for a single function ({"amt": "sum"}) and
+    `column_func` when a list is given ({"amt": ["sum", "mean"]} -> amt_sum, amt_mean).
+    Only the `by` and aggregated columns are read.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    spec = _normalize_agg(agg)
+    columns = list(dict.fromkeys(by + list(spec)))
+    results = _run(source, _groupby_task, (by, spec, columns, chunksize, read_kwargs, dropna), workers, chunksize, split_files)
+
+    names = {(column, func): column if isinstance(agg[column], str) else f"{column}_{func}" for column, funcs in spec.items() for func in funcs}
+    if not results:
+        # 입력에 행이 없음 - pandas 처럼 같은 컬럼/인덱스 이름의 빈 결과
+        index = pd.MultiIndex.from_arrays([[]] * len(by), names=by) if len(by) > 1 else pd.Index([], name=by[0])
+        return pd.DataFrame({name: pd.Series(dtype="int64" if func in ("count", "size", "nunique") else "float64") for (_, func), name in names.items()}, index=index)
+
+    partials = [partial for partial, _ in results if partial is not None]
+    combined = _combine(partials, by, dropna) if partials else None
+    output = {}
+    for column, funcs in spec.items():
+        for func in funcs:
+            name = names[(column, func)]
+            if func == "nunique":
+                pairs = pd.concat([distinct[column] for _, distinct in results if column in distinct]).drop_duplicates()
+                output[name] = pairs.groupby(by, dropna=dropna, observed=True)[column].nunique()
+                continue
+            if func in ("sum", "count", "size", "min", "max"): output[name] = combined[(column, func)]
+            elif func == "mean": output[name] = combined[(column, "mean")]
+            else:
+                # pandas 와 동일하게 ddof=1
+                count = combined[(column, "count")]
+                variance = combined[(column, "m2")] / (count - 1).where(count > 1)
+                output[name] = variance if func == "var" else np.sqrt(variance)
+    result = pd.DataFrame(output)
+    result.index.names = by
+    return result.sort_index() if sort else result
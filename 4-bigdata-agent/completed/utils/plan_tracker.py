@@ -0,0 +1,164 @@
+"""
+Structured model of the planner's markdown plan and deterministic progress tracking.
+
+The planner writes steps as
+    ### 1. Coder: Descriptive Subtitle
+    - [ ] Subtask 1
+    - [ ] Subtask 2
+Plan.parse() turns that into steps (id, agent, title, tasks) while keeping the original lines, so
+to_markdown() re-renders exactly what the planner wrote with only the checkboxes changed.
+
+handle_tracker_agent_tool uses apply_completion() instead of an LLM call: a SUCCESS result from
+an agent marks that agent's first pending step done, ERROR marks nothing. Anything it cannot
+decide (PARTIAL_SUCCESS, no status, no matching step) is reported as ambiguous and the caller
+falls back to the tracker LLM.
+
+StreamingPlanParser does the same on the planner's token stream and hands out each step as soon
+as its block is closed (next step header, next "## " section or end of stream).
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+STEP_HEADER = re.compile(r"^\s*###\s*(\d+)\.\s*([^:\n]+?)\s*:\s*(.*?)\s*$")
+TASK_LINE = re.compile(r"^(\s*[-*]\s*)\[([ xX])\](.*)$")
+SECTION_HEADER = re.compile(r"^\s*#{1,2}\s")
+STATUS_LINE = re.compile(r"##\s*Status\s*\n+\s*\**\s*(SUCCESS|PARTIAL_SUCCESS|ERROR)", re.IGNORECASE)
+
+def parse_status(agent_output: str) -> Optional[str]:
+    """SUCCESS / PARTIAL_SUCCESS / ERROR from an agent's "## Status" section, or None."""
+    match = STATUS_LINE.search(agent_output or "")
+    return match.group(1).upper() if match else None
+
+def normalize_agent(name: str) -> str:
+    """'Coder', 'coder_agent_tool', 'Coder Agent' -> 'coder'."""
+    name = (name or "").strip().lower().replace(" ", "_")
+    for suffix in ("_agent_tool", "_tool", "_agent"):
+        if name.endswith(suffix): name = name[: -len(suffix)]
+    return name
+
+class PlanTask:
+
+    __slots__ = ("text", "done", "line_no")
+
+    def __init__(self, text, done, line_no):
+        self.text = text
+        self.done = done
+        self.line_no = line_no
+
+class PlanStep:
+
+    __slots__ = ("step_id", "agent", "title", "tasks", "line_no")
+
+    def __init__(self, step_id, agent, title, line_no):
+        self.step_id = step_id
+        self.agent = agent
+        self.title = title
+        self.tasks: List[PlanTask] = []
+        self.line_no = line_no
+
+    @property
+    def done(self):
+        return bool(self.tasks) and all(task.done for task in self.tasks)
+
+    @property
+    def status(self):
+        completed = sum(task.done for task in self.tasks)
+        return "done" if self.done else "in_progress" if completed else "pending"
+
+    def to_dict(self):
+        return {
+            "step_id": self.step_id,
+            "agent": self.agent,
+            "title": self.title,
+            "status": self.status,
+            "tasks": [{"text": task.text, "done": task.done} for task in self.tasks],
+        }
+
+class Plan:
+
+    def __init__(self, lines: List[str], steps: List[PlanStep]):
+        self.lines = lines
+        self.steps = steps
+
+    @classmethod
+    def parse(cls, markdown: str) -> "Plan":
+        lines = (markdown or "").split("\n")
+        steps: List[PlanStep] = []
+        for line_no, line in enumerate(lines):
+            header = STEP_HEADER.match(line)
+            if header:
+                steps.append(PlanStep(int(header.group(1)), header.group(2).strip(), header.group(3), line_no))
+                continue
+            task = TASK_LINE.match(line)
+            if task and steps:
+                steps[-1].tasks.append(PlanTask(task.group(3).strip(), task.group(2) in "xX", line_no))
+        return cls(lines, steps)
+
+    def to_markdown(self) -> str:
+        lines = list(self.lines)
+        for step in self.steps:
+            for task in step.tasks:
+                match = TASK_LINE.match(lines[task.line_no])
+                lines[task.line_no] = f"{match.group(1)}[{'x' if task.done else ' '}]{match.group(3)}"
+        return "\n".join(lines)
+
+    def steps_for(self, agent: str) -> List[PlanStep]:
+        agent = normalize_agent(agent)
+        return [step for step in self.steps if normalize_agent(step.agent) == agent]
+
+    def next_step(self, agent: Optional[str] = None) -> Optional[PlanStep]:
+        """First step (optionally of one agent) that still has pending tasks."""
+        steps = self.steps_for(agent) if agent else self.steps
+        return next((step for step in steps if not step.done), None)
+
+    def apply_completion(self, agent: str, agent_output: str) -> Dict[str, Any]:
+        """Deterministically update the plan from an agent result. Returns {"ambiguous": bool, "reason", "marked"}."""
+        step = self.next_step(agent)
+        if step is None:
+            return {"ambiguous": True, "reason": f"no pending step for agent '{agent}'", "marked": []}
+
+        status = parse_status(agent_output)
+        if status == "SUCCESS":
+            marked = [task.text for task in step.tasks if not task.done]
+            for task in step.tasks: task.done = True
+            return {"ambiguous": False, "reason": f"{agent} reported SUCCESS", "step_id": step.step_id, "marked": marked}
+        if status == "ERROR":
+            return {"ambiguous": False, "reason": f"{agent} reported ERROR", "step_id": step.step_id, "marked": []}
+        return {"ambiguous": True, "reason": f"{agent} status {status or 'missing'}", "step_id": step.step_id, "marked": []}
+
+    def summary(self) -> Dict[str, Any]:
+        tasks = [task for step in self.steps for task in step.tasks]
+        return {
+            "steps": [step.to_dict() for step in self.steps],
+            "completed_tasks": sum(task.done for task in tasks),
+            "total_tasks": len(tasks),
+        }
+
+class StreamingPlanParser:
+    """Feed planner text chunks; returns (PlanStep, markdown block) for every step whose block just closed."""
+
+    def __init__(self):
+        self.text = ""
+        self.emitted = 0
+
+    def feed(self, chunk: str) -> List[Tuple[PlanStep, str]]:
+        self.text += chunk
+        return self._closed_steps(final=False) if "\n" in chunk else []
+
+    def close(self) -> List[Tuple[PlanStep, str]]:
+        return self._closed_steps(final=True)
+
+    def _closed_steps(self, final):
+        # 스트리밍 중에는 마지막 미완성 줄은 제외하고 파싱
+        complete = self.text if final else self.text[: self.text.rfind("\n") + 1]
+        plan = Plan.parse(complete)
+        lines = plan.lines
+        closed = []
+        for index in range(self.emitted, len(plan.steps)):
+            step = plan.steps[index]
+            end = next((line_no for line_no in range(step.line_no + 1, len(lines)) if STEP_HEADER.match(lines[line_no]) or SECTION_HEADER.match(lines[line_no])), None)
+            if end is None and not final: break
+            closed.append((step, "\n".join(lines[step.line_no:end]).strip()))
+        self.emitted += len(closed)
+        return closed
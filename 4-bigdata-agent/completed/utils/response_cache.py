@@ -0,0 +1,308 @@
+"""
+Response cache for Bedrock ConverseStream calls (model layer).
+
+Reruns of the same workflow (e.g. the weekly card report in main.py) send identical or near-identical
+requests to Bedrock. `strands_utils.get_model` wraps every model in a CachedModel that serves them
+from a local cache and replays the recorded stream chunks, so the agent loop, streaming events and
+tool calls behave exactly as for a live response (replayed usage is reported as 0 tokens).
+
+Two tiers:
+    exact      : sha256 of model id, sampling config, system prompt, messages, tool specs and tool_choice.
+                 The CURRENT_TIME line of system prompts is keyed by its date only (the time of day changes
+                 every run, the date decides what "this month" / "yesterday" means); everything else must
+                 match, so a rerun on another day is a miss.
+    similarity : (LLM_CACHE_SIMILARITY=on) for deterministic calls only (temperature <= 0.01, no
+                 extended thinking, no tool use / tool results in the conversation). Requests with the
+                 same model, system prompt and tools are compared by TF-IDF (char n-grams) cosine
+                 similarity of their message text; the best match above LLM_CACHE_SIMILARITY_THRESHOLD
+                 is replayed if every number in the two texts is the same.
+
+Only completed streams (messageStop received) are stored. Entries expire after LLM_CACHE_TTL_HOURS and
+least-recently-used entries are evicted beyond LLM_CACHE_MAX_MB. LLM_CACHE=off disables the cache.
+
+Usage (from 4-bigdata-agent/completed):
+    python -m utils.response_cache stats
+    python -m utils.response_cache gc
+    python -m utils.response_cache clear
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import logging
+import argparse
+import threading
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from strands.models import Model
+
+from utils.cassette import _to_json, _from_json
+from utils.execution_cache import _atomic_write_json
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CURRENT_TIME_LINE = re.compile(r"(CURRENT_TIME: (?:\w{3} \w{3} \d{2} \d{4}|\d{4}-\d{2}-\d{2}))[^\n]*")  # 날짜 부분만 남김
+NUMBER_TOKEN = re.compile(r"\d+(?:[.,]\d+)*")
+CONFIG_KEYS = ("temperature", "top_p", "max_tokens", "stop_sequences", "additional_request_fields")
+MAX_SIMILARITY_TEXT = 20000  # 유사도 인덱스에 저장하는 메시지 텍스트 최대 길이
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+def _digest(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, ensure_ascii=False, default=_to_json).encode()).hexdigest()
+
+def _strip_time(obj):
+    """System prompt with the CURRENT_TIME line cut to its date (the time of day changes every run)."""
+    if isinstance(obj, str): return CURRENT_TIME_LINE.sub(r"\1", obj)
+    if isinstance(obj, list): return [_strip_time(value) for value in obj]
+    if isinstance(obj, dict): return {key: _strip_time(value) for key, value in obj.items()}
+    return obj
+
+def _zero_usage(chunk):
+    """Replayed responses cost nothing: report 0 tokens / 0 ms so usage_ledger does not count them twice."""
+    metadata = chunk.get("metadata") if isinstance(chunk, dict) else None
+    if not metadata: return chunk
+    metadata = dict(metadata)
+    if "usage" in metadata: metadata["usage"] = {name: 0 if isinstance(value, (int, float)) else value for name, value in metadata["usage"].items()}
+    if "metrics" in metadata: metadata["metrics"] = {**metadata["metrics"], "latencyMs": 0}
+    return {**chunk, "metadata": metadata}
+
+class ResponseCache:
+
+    def __init__(self, cache_dir=None, enabled=None, similarity=None):
+        self.cache_dir = cache_dir or os.environ.get("LLM_CACHE_DIR", "./.cache/llm_responses")
+        self.enabled = enabled if enabled is not None else os.environ.get("LLM_CACHE", "on").lower() in ("1", "on", "true")
+        self.similarity = similarity if similarity is not None else os.environ.get("LLM_CACHE_SIMILARITY", "off").lower() in ("1", "on", "true")
+        self.threshold = float(os.environ.get("LLM_CACHE_SIMILARITY_THRESHOLD", 0.95))
+        self.ttl_seconds = float(os.environ.get("LLM_CACHE_TTL_HOURS", 168)) * 3600
+        self.max_bytes = int(float(os.environ.get("LLM_CACHE_MAX_MB", 256)) * 1024 * 1024)
+        self.stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "bypassed": 0, "stored": 0, "expired": 0, "evicted": 0}
+        self._index = None  # key -> {bucket, agent_name, created, last_access, bytes, text}
+        self._vectorizers = {}  # bucket -> (keys, vectorizer, matrix), 버킷 항목이 바뀌면 다시 학습
+        self._lock = threading.Lock()
+
+    # ---------- keys ----------
+
+    @staticmethod
+    def describe(config, messages, tool_specs=None, system_prompt=None, system_prompt_content=None, tool_choice=None) -> Dict[str, Any]:
+        """Exact key, similarity bucket and (for deterministic conversations) the text compared by the similarity tier."""
+        system = system_prompt_content if system_prompt_content is not None else system_prompt
+        system = _strip_time(system)
+        bucket = _digest({
+            "model_id": config.get("model_id"),
+            "config": {name: config.get(name) for name in CONFIG_KEYS},
+            "system": system,
+            "tools": sorted((tool_specs or []), key=lambda spec: spec.get("name", "")),
+            "tool_choice": tool_choice,
+        })
+        thinking = (config.get("additional_request_fields") or {}).get("thinking", {}).get("type") == "enabled"
+        deterministic = (config.get("temperature") if config.get("temperature") is not None else 1.0) <= 0.01 and not thinking
+        text = None
+        if deterministic and not any("toolUse" in block or "toolResult" in block for message in messages for block in message.get("content", [])):
+            text = "\n".join(f"{message['role']}: {block['text']}" for message in messages for block in message.get("content", []) if "text" in block)[:MAX_SIMILARITY_TEXT]
+        return {"key": _digest({"bucket": bucket, "messages": messages}), "bucket": bucket, "text": text}
+
+    # ---------- index ----------
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, "entries", f"{key}.json")
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(os.path.join(self.cache_dir, "index.json"), encoding="utf-8") as f: self._index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _atomic_write_json(os.path.join(self.cache_dir, "index.json"), self._index)
+
+    def _drop(self, key, reason):
+        self._index.pop(key, None)
+        self.stats[reason] += 1
+        try: os.remove(self._entry_path(key))
+        except FileNotFoundError: pass
+
+    def _evict(self):
+        """Drop expired entries, then least-recently-used ones until the cache fits in max_bytes."""
+        index, now = self._load_index(), time.time()
+        for key in [key for key, entry in index.items() if now - entry["created"] > self.ttl_seconds]: self._drop(key, "expired")
+        total = sum(entry["bytes"] for entry in index.values())
+        for key in sorted(index, key=lambda key: index[key]["last_access"]):
+            if total <= self.max_bytes: break
+            total -= index[key]["bytes"]
+            self._drop(key, "evicted")
+
+    # ---------- similarity tier ----------
+
+    def _similar(self, bucket, text) -> Optional[tuple]:
+        index = self._load_index()
+        keys = tuple(sorted(key for key, entry in index.items() if entry["bucket"] == bucket and entry.get("text")))
+        if not keys: return None
+        cached = self._vectorizers.get(bucket)
+        if cached is None or cached[0] != keys:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True)  # 한국어/영어 모두 동작
+            cached = (keys, vectorizer, vectorizer.fit_transform([index[key]["text"] for key in keys]))
+            self._vectorizers[bucket] = cached
+        _, vectorizer, matrix = cached
+        scores = (matrix @ vectorizer.transform([text]).T).toarray().ravel()  # L2 정규화된 벡터 -> 코사인 유사도
+        numbers = NUMBER_TOKEN.findall(text)
+        for position in scores.argsort()[::-1]:
+            if scores[position] < self.threshold: return None
+            # 날짜, 분기, 금액 등 숫자가 하나라도 다르면 같은 요청이 아님
+            if NUMBER_TOKEN.findall(index[keys[position]]["text"]) == numbers: return keys[position], float(scores[position])
+        return None
+
+    # ---------- lookup / store ----------
+
+    def lookup(self, request: Dict[str, Any], agent_name: str) -> Optional[Dict[str, Any]]:
+        """Recorded entry for the request (exact tier first, then similarity), or None."""
+        with self._lock:
+            index = self._load_index()
+            match, kind, score = request["key"] if request["key"] in index else None, "exact", 1.0
+            if match is None and self.similarity and request["text"]:
+                similar = self._similar(request["bucket"], request["text"])
+                if similar: (match, score), kind = similar, "similar"
+            if match is None or time.time() - index[match]["created"] > self.ttl_seconds:
+                if match is not None: self._drop(match, "expired")
+                self.stats["misses"] += 1
+                return None
+            try:
+                with open(self._entry_path(match), encoding="utf-8") as f: record = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"{Colors.YELLOW}LLM cache entry {match[:12]} unreadable: {e}{Colors.END}")
+                self._drop(match, "evicted")
+                self.stats["misses"] += 1
+                return None
+            index[match]["last_access"] = time.time()
+            index[match]["hits"] = index[match].get("hits", 0) + 1
+            self._save_index()
+            self.stats[f"{kind}_hits"] += 1
+        logger.info(f"{Colors.GREEN}{agent_name.upper()} - LLM cache {kind} hit (score {score:.3f}, hit rate {self.hit_rate():.0%}){Colors.END}")
+        return record
+
+    def store(self, request: Dict[str, Any], agent_name: str, model_id: str, events: List[Any]):
+        record = {"agent_name": agent_name, "model_id": model_id, "created": time.time(), "events": events}
+        try:
+            with self._lock:
+                os.makedirs(os.path.join(self.cache_dir, "entries"), exist_ok=True)
+                payload = json.dumps(record, ensure_ascii=False, default=_to_json)
+                tmp_path = f"{self._entry_path(request['key'])}.tmp.{os.getpid()}.{threading.get_ident()}"
+                with open(tmp_path, "w", encoding="utf-8") as f: f.write(payload)
+                os.replace(tmp_path, self._entry_path(request["key"]))
+                self._load_index()[request["key"]] = {
+                    "bucket": request["bucket"], "agent_name": agent_name, "created": record["created"],
+                    "last_access": record["created"], "bytes": len(payload.encode()), "text": request["text"],
+                }
+                self._evict()
+                self._save_index()
+                self.stats["stored"] += 1
+        except (OSError, TypeError) as e:
+            logger.warning(f"{Colors.YELLOW}LLM cache store failed ({agent_name}): {e}{Colors.END}")
+
+    def gc(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict()
+            self._save_index()
+            live = {f"{key}.json" for key in self._index}
+            entry_dir = os.path.join(self.cache_dir, "entries")
+            for name in (os.listdir(entry_dir) if os.path.isdir(entry_dir) else []):
+                if name not in live: os.remove(os.path.join(entry_dir, name))
+        return {"entries": len(self._index), "bytes": sum(entry["bytes"] for entry in self._index.values()), **self.get_stats()}
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self._index, self._vectorizers = {}, {}
+
+    # ---------- stats ----------
+
+    def hit_rate(self):
+        hits = self.stats["exact_hits"] + self.stats["similar_hits"]
+        return hits / (hits + self.stats["misses"]) if hits + self.stats["misses"] else 0.0
+
+    def get_stats(self):
+        return {**self.stats, "hit_rate": round(self.hit_rate(), 4)}
+
+    def wrap(self, model, agent_name="agent"):
+        """Wrap `model` in a CachedModel; returns it unchanged when LLM_CACHE is off."""
+        return CachedModel(model, self, agent_name=agent_name) if self.enabled else model
+
+class CachedModel(Model):
+    """Model wrapper that serves ConverseStream responses from the ResponseCache."""
+
+    def __init__(self, model, cache, agent_name="agent"):
+        self.model = model
+        self.cache = cache
+        self.agent_name = agent_name
+
+    @property
+    def config(self):
+        return self.model.config
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs) -> AsyncGenerator[Any, None]:
+        try:
+            request = self.cache.describe(self.config, messages, tool_specs, system_prompt, kwargs.get("system_prompt_content"), kwargs.get("tool_choice"))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"{Colors.YELLOW}LLM cache key failed, calling the model: {e}{Colors.END}")
+            self.cache.stats["bypassed"] += 1
+            request = None
+
+        record = self.cache.lookup(request, self.agent_name) if request else None
+        if record is not None:
+            for chunk in record["events"]:
+                await asyncio.sleep(0)  # 이벤트 루프 양보 - 실제 스트리밍과 같은 interleaving 유지
+                yield _zero_usage(_from_json(chunk))
+            return
+
+        events, completed = [], False
+        async for chunk in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+            events.append(chunk)
+            completed = completed or "messageStop" in chunk
+            yield chunk
+        if request and completed: self.cache.store(request, self.agent_name, self.config.get("model_id"), events)
+
+response_cache = ResponseCache()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and clean the LLM response cache")
+    parser.add_argument("command", choices=["stats", "gc", "clear"])
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        index = response_cache._load_index()
+        per_agent = {}
+        for entry in index.values():
+            agent = per_agent.setdefault(entry["agent_name"], {"entries": 0, "hits": 0, "bytes": 0})
+            agent["entries"] += 1
+            agent["hits"] += entry.get("hits", 0)
+            agent["bytes"] += entry["bytes"]
+        print(json.dumps({"dir": response_cache.cache_dir, "entries": len(index), "agents": per_agent}, indent=2, ensure_ascii=False))
+    elif args.command == "gc":
+        print(json.dumps(response_cache.gc()))
+    else:
+        response_cache.clear()
+        print(f"Cleared {response_cache.cache_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Speculative execution of graph work before the graph has decided to run it.
+
+A SpeculativeTask starts `runner(emit)` as an asyncio task right away. Events the runner emits
+are buffered (nothing reaches the global event queue) until the owning node calls commit(),
+which flushes the buffer in order, forwards later events live and returns the runner's result.
+discard() cancels the task and drops the buffer, so a wrong guess leaves no trace in the UI
+or in the shared state (runners must only touch shared state after commit).
+
+The runner runs with the task's _on_event as its event sink (utils/event_queue.set_event_sink), so
+events that tools put directly (python_repl_tool progress) are buffered the same way. Work that
+outlives task cancellation (a cell running in a worker thread) registers a callback with
+current_speculation().on_discard() to be stopped on discard().
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.event_queue import put_event, set_event_sink
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class Colors:
+    CYAN = '\033[96m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+_current_speculation: contextvars.ContextVar = contextvars.ContextVar("speculation", default=None)
+
+def current_speculation() -> Optional["SpeculativeTask"]:
+    """SpeculativeTask whose runner is executing in the calling context (None outside speculation)."""
+    return _current_speculation.get()
+
+class SpeculativeTask:
+
+    def __init__(self, name: str, runner: Callable[[Callable[[Dict], None]], Awaitable[Any]]):
+        self.name = name
+        self.started = time.perf_counter()
+        self.committed_at: Optional[float] = None
+        self.discarded = False
+        self._buffer: List[Dict] = []
+        self._emit: Optional[Callable[[Dict], None]] = None
+        self._on_discard: List[Callable[[], None]] = []
+        self._lock = threading.Lock()  # 도구 스레드(python_repl 진행 이벤트)와 이벤트 루프가 동시에 접근
+        self._outer_context = contextvars.copy_context()  # publish 후 이벤트는 생성한 쪽의 sink/큐로 전달
+        self.task = asyncio.create_task(self._run(runner))
+        logger.info(f"{Colors.CYAN}Speculative {name} started{Colors.END}")
+
+    async def _run(self, runner):
+        # task 는 자신의 context 복사본에서 실행되므로 여기서의 설정은 이 runner (와 그 도구 스레드) 에만 적용
+        _current_speculation.set(self)
+        set_event_sink(self._on_event)
+        return await runner(self._on_event)
+
+    def _on_event(self, event):
+        with self._lock:
+            if self.discarded: return
+            if self._emit is None:
+                self._buffer.append(event)
+                return
+        self._outer_context.run(self._emit, event)
+
+    def on_discard(self, callback: Callable[[], None]):
+        """Call `callback` if this speculation is discarded (immediately if it already was)."""
+        with self._lock:
+            if not self.discarded:
+                self._on_discard.append(callback)
+                return
+        callback()
+
+    def head_start(self):
+        """Seconds the speculative work ran before it was committed."""
+        return (self.committed_at or time.perf_counter()) - self.started
+
+    def publish(self, emit=put_event):
+        """Flush buffered events and forward later ones live, without waiting for the result."""
+        with self._lock:
+            if self._emit is not None: return
+            self.committed_at = time.perf_counter()
+            # 락을 잡은 채로 flush 하고 emit 전환 - 도구 스레드의 이벤트가 순서를 앞지르지 않음
+            for event in self._buffer: self._outer_context.run(emit, event)
+            self._buffer.clear()
+            self._emit = emit
+        logger.info(f"{Colors.CYAN}Speculative {self.name} committed ({self.head_start():.2f}s head start){Colors.END}")
+
+    async def commit(self, emit=put_event):
+        """Publish buffered events, forward the rest live and wait for the result."""
+        self.publish(emit)
+        return await self.task
+
+    def discard(self):
+        with self._lock:
+            if self.discarded: return
+            self.discarded = True
+            self._buffer.clear()
+            callbacks, self._on_discard = self._on_discard, []
+        if not self.task.done(): self.task.cancel()
+        for callback in callbacks: callback()
+        logger.info(f"{Colors.YELLOW}Speculative {self.name} discarded{Colors.END}")
@@ -1,9 +1,22 @@
 
+import os
 import logging
 import traceback
+import time
 import asyncio
 from datetime import datetime
 from utils.bedrock import bedrock_info
+from utils.cassette import wrap_model
+from utils.response_cache import response_cache
+from utils.tool_output import ToolOutputCompactor
+from utils.tracing import tracer
+from utils.usage_ledger import usage_ledger
+from utils.model_router import model_router
+from utils.background_summarizer import BackgroundSummarizingConversationManager, MODEL_CONTEXT_WINDOW
+from utils.token_estimator import TokenEstimatorHook
+from utils.stream_events import AgentEvent
+from utils.terminal_renderer import terminal_renderer
+from utils.tool_registry import get_tool_registry
 from strands import Agent
 from strands.models import BedrockModel
 from botocore.config import Config
@@ -50,6 +63,13 @@ class ColoredStreamingCallback(StreamingStdOutCallbackHandler):
     def on_llm_new_token(self, token: str, **kwargs) -> None:
         print(f"{self.color_code}{token}{self.reset_code}", end="", flush=True)
 
+SESSION_ID = "ABC"  # AgentCore 이벤트의 session_id (tool call registry 도 세션 단위)
+
+# 컨텍스트가 soft threshold 를 넘으면 저렴한 모델로 백그라운드 요약 (overflow 전에 미리)
+BACKGROUND_SUMMARIZATION = os.environ.get("BACKGROUND_SUMMARIZATION", "on").lower() in ("1", "on", "true")
+SUMMARY_MODEL = os.environ.get("SUMMARY_MODEL", "claude-haiku-4-5")
+SUMMARY_SOFT_THRESHOLD = float(os.environ.get("SUMMARY_SOFT_THRESHOLD", 0.6))
+
 class strands_utils():
 
     @staticmethod
@@ -58,11 +78,12 @@ class strands_utils():
         llm_type = kwargs["llm_type"]
         enable_reasoning = kwargs["enable_reasoning"]
 
-        if llm_type in ["claude-sonnet-3-7", "claude-sonnet-4", "claude-sonnet-4-5"]:
+        if llm_type in ["claude-sonnet-3-7", "claude-sonnet-4", "claude-sonnet-4-5", "claude-haiku-4-5"]:
             
             if llm_type == "claude-sonnet-3-7": model_name = "Claude-V3-7-Sonnet-CRI"
             elif llm_type == "claude-sonnet-4": model_name = "Claude-V4-Sonnet-CRI"
             elif llm_type == "claude-sonnet-4-5": model_name = "Claude-V4-5-Sonnet-CRI"
+            elif llm_type == "claude-haiku-4-5": model_name = "Claude-V4-5-Haiku-CRI"
 
             ## BedrockModel params: https://strandsagents.com/latest/api-reference/models/?h=bedrockmodel#strands.models.bedrock.BedrockModel
             llm = BedrockModel(
@@ -101,10 +122,25 @@ class strands_utils():
                     retries=dict(max_attempts=50, mode="standard"),
                 )
             )
+        elif llm_type == "nova-micro":
+            ## Nova는 extended thinking 미지원 - additional_request_fields 없이 사용
+            llm = BedrockModel(
+                model_id=bedrock_info.get_model_id(model_name="Nova-Micro-CRI"),
+                streaming=True,
+                max_tokens=8192,
+                temperature=0.01,
+                boto_client_config=Config(
+                    read_timeout=900,
+                    connect_timeout=900,
+                    retries=dict(max_attempts=50, mode="standard"),
+                )
+            )
         else:
             raise ValueError(f"Unknown LLM type: {llm_type}")
 
-        return llm
+        # LLM 응답 캐시 (exact / similarity) 래퍼, 그 바깥에 BEDROCK_CASSETTE_MODE=record/replay 일 때 ConverseStream 기록/재생 래퍼 적용
+        llm = response_cache.wrap(llm, agent_name=kwargs.get("agent_name", llm_type))
+        return wrap_model(llm, agent_name=kwargs.get("agent_name", llm_type))
 
     @staticmethod
     def get_agent(**kwargs):
@@ -120,8 +156,12 @@ class strands_utils():
         context_overflow_summary_ratio = kwargs.get("context_overflow_summary_ratio", 0.5)  # Summarize 50% of older messages
         context_overflow_preserve_recent_messages = kwargs.get("context_overflow_preserve_recent_messages", 10)  # Keep recent 10 messages
 
+        # MODEL_ROUTING=on 이면 role/프롬프트 크기/지연 예산에 따라 모델 tier 재선택
+        agent_type = model_router.route(agent_name, agent_type, prompt_chars=len(system_prompts), enable_reasoning=enable_reasoning)
+
         prompt_cache, cache_type = prompt_cache_info
-        llm = strands_utils.get_model(llm_type=agent_type, enable_reasoning=enable_reasoning)
+        if agent_type == "nova-micro": prompt_cache = False  # cachePoint는 Claude 모델에서만 사용
+        llm = strands_utils.get_model(llm_type=agent_type, enable_reasoning=enable_reasoning, agent_name=agent_name)
         llm.config["streaming"] = streaming
 
         # Convert system_prompt to SystemContentBlock array with cachePoint if caching is enabled
@@ -136,17 +176,45 @@ class strands_utils():
             logger.info(f"{Colors.GREEN}{agent_name.upper()} - Prompt Cache Disabled{Colors.END}")
             system_prompt_with_cache = system_prompts
 
+        if kwargs.get("background_summarization", BACKGROUND_SUMMARIZATION):
+            conversation_manager = BackgroundSummarizingConversationManager(
+                summarizer_factory=lambda: strands_utils.get_agent(
+                    agent_name=f"{agent_name}_summarizer",
+                    system_prompts=apply_prompt_template(prompt_name="summarization", prompt_context={}),
+                    agent_type=SUMMARY_MODEL,
+                    background_summarization=False,
+                ),
+                context_window_tokens=MODEL_CONTEXT_WINDOW.get(agent_type, 200000),
+                soft_threshold=SUMMARY_SOFT_THRESHOLD,
+                summary_ratio=context_overflow_summary_ratio,
+                preserve_recent_messages=context_overflow_preserve_recent_messages,
+                agent_name=agent_name,
+            )
+            hooks = [conversation_manager]
+        else:
+            conversation_manager = SummarizingConversationManager(
+                summary_ratio=context_overflow_summary_ratio,
+                preserve_recent_messages=context_overflow_preserve_recent_messages,
+                summarization_system_prompt=apply_prompt_template(prompt_name="summarization", prompt_context={})
+            )
+            hooks = []
+
+        # 모델 호출마다 입력 토큰을 로컬 추정 -> 응답 usage 와 비교해 보정 (utils/token_estimator.py)
+        token_estimator = TokenEstimatorHook(model_id=llm.config.get("model_id"), context_window=MODEL_CONTEXT_WINDOW.get(agent_type, 200000))
+        hooks.append(token_estimator)
+        # 긴 도구 출력은 ./artifacts/tool_outputs 로 내보내고 요약만 history 에 유지, 오래된 결과는 파일 참조로 교체
+        if tools: hooks.append(ToolOutputCompactor(agent_name=agent_name))
+
         agent = Agent(
+            name=agent_name,
             model=llm,
             system_prompt=system_prompt_with_cache,
             tools=tools,
-            conversation_manager=SummarizingConversationManager(
-                summary_ratio=context_overflow_summary_ratio,
-                preserve_recent_messages=context_overflow_preserve_recent_messages,
-                summarization_system_prompt=apply_prompt_template(prompt_name="summarization", prompt_context={})
-            ),
+            conversation_manager=conversation_manager,
+            hooks=hooks,
             callback_handler=None # async iterator로 대체 하기 때문에 None 설정
         )
+        agent.token_estimator = token_estimator
 
         return agent
 
@@ -263,7 +331,7 @@ class strands_utils():
                 raise
 
     @staticmethod
-    async def process_streaming_response_yield(agent, message, agent_name="coordinator", source=None):
+    async def process_streaming_response_yield(agent, message, agent_name="coordinator", source=None, emit=None):
         """
         Process streaming response from agent with event conversion and global queue management
 
@@ -272,46 +340,94 @@ class strands_utils():
             message: Message to send to agent
             agent_name: Name of the agent for event tagging
             source: Source identifier for the event
+            emit: Where to publish events (default: global event queue). Speculative runs pass a buffer.
 
         Yields:
             AgentCore formatted events
         """
         from utils.event_queue import put_event
+        emit = emit or put_event
+
+        session_id = SESSION_ID
+        model_id = agent.model.config.get("model_id")
+        usage_ledger.check_budget()  # RUN_BUDGET_USD 초과 시 새 에이전트 호출 전에 중단
+
+        # 이 제너레이터는 소비자의 context 에서 실행되므로 span 은 내부 스트림을 진행하는 동안에만 current 로 설정
+        # (yield 사이에 current 로 남으면 소비자가 만든 span / task 가 LLM span 아래에 잘못 연결됨)
+        with tracer.span(f"{agent_name}.stream", "llm", activate=False, agent_name=agent_name, model_id=model_id) as span:
+            started, first_token_at = time.perf_counter(), None
+            usage_before = strands_utils.get_usage(agent.event_loop_metrics)
+
+            # Use retry helper for robust streaming
+            stream = strands_utils._retry_agent_streaming(agent, message)
+            while True:
+                with tracer.activate(span):
+                    try:
+                        event = await stream.__anext__()
+                    except StopAsyncIteration:
+                        break
+                if first_token_at is None and ("data" in event or "reasoningText" in event or "current_tool_use" in event):
+                    first_token_at = time.perf_counter() - started
+                    if span is not None: span.set(ttft_ms=round(first_token_at * 1000, 1))
+
+                if "result" in event:
+                    # Token usage of this call only (metrics accumulate on the agent across invocations)
+                    usage_after = strands_utils.get_usage(event["result"].metrics)
+                    usage = {field: usage_after[field] - usage_before[field] for field in usage_after}
+                    elapsed = time.perf_counter() - started
+                    step = usage_ledger.record(agent_name, model_id, usage, duration_ms=elapsed * 1000, source=source)
+                    token_estimator = getattr(agent, "token_estimator", None)
+                    if token_estimator is not None:
+                        step.update(token_estimator.reconcile(usage["input_tokens"] + usage["cache_read_tokens"] + usage["cache_write_tokens"]))
+                        logger.debug(f"{agent_name.upper()} - input tokens estimated {step['estimated_input_tokens']}, error {step['estimate_error_pct']}%")
+                    if span is not None:
+                        generation_seconds = elapsed - (first_token_at or 0.0)
+                        span.set(
+                            **usage,
+                            cost_usd=step["cost_usd"],
+                            cycles=getattr(event["result"].metrics, "cycle_count", None),
+                            tokens_per_sec=round(usage["output_tokens"] / generation_seconds, 1) if generation_seconds > 0 else None,
+                        )
+                    usage_event = {
+                        "timestamp": datetime.now().isoformat(),
+                        "session_id": session_id,
+                        "agent_name": agent_name,
+                        "source": source or f"{agent_name}_node",
+                        "type": "agent_usage",
+                        "event_type": "usage",
+                        **step,
+                    }
+                    emit(usage_event)
+                    yield usage_event
+                    continue
 
-        session_id = "ABC"
-
-        # Use retry helper for robust streaming
-        async for event in strands_utils._retry_agent_streaming(agent, message):
-            # Convert Strands events to AgentCore format
-            agentcore_event = await strands_utils._convert_to_agentcore_event(event, agent_name, session_id, source)
-            if agentcore_event:
-                # Put event in global queue for unified processing
-                put_event(agentcore_event)
-                yield agentcore_event
+                # Convert Strands events to AgentCore format
+                agentcore_event = await strands_utils._convert_to_agentcore_event(event, agent_name, session_id, source)
+                if agentcore_event:
+                    # Put event in global queue for unified processing
+                    emit(agentcore_event)
+                    yield agentcore_event
 
-    # 툴 사용 ID와 툴 이름 매핑을 위한 클래스 변수
-    _tool_use_mapping = {}
+    @staticmethod
+    def get_usage(event_loop_metrics):
+        """Token usage accumulated in Strands event_loop_metrics (AgentResult.metrics / agent.event_loop_metrics)."""
+        usage = getattr(event_loop_metrics, "accumulated_usage", None) or {}
+        return {
+            "input_tokens": usage.get("inputTokens", 0),
+            "output_tokens": usage.get("outputTokens", 0),
+            "cache_read_tokens": usage.get("cacheReadInputTokens", 0),
+            "cache_write_tokens": usage.get("cacheWriteInputTokens", 0),
+        }
 
     @staticmethod
     async def _convert_to_agentcore_event(strands_event, agent_name, session_id, source=None):
         """Strands 이벤트를 AgentCore 스트리밍 형식으로 변환"""
 
-        base_event = {
-            "timestamp": datetime.now().isoformat(),
-            "session_id": session_id,
-            "agent_name": agent_name,
-            "source": source or f"{agent_name}_node",
-        }
+        source = source or f"{agent_name}_node"
 
-        # 텍스트 데이터 이벤트
+        # 텍스트 데이터 이벤트 (토큰마다 생성되므로 compact AgentEvent, timestamp 는 읽을 때 포맷)
         if "data" in strands_event:
-            return {
-                **base_event,
-                "type": "agent_text_stream",
-                "event_type": "text_chunk",
-                "data": strands_event["data"],
-                "chunk_size": len(strands_event["data"])
-            }
+            return AgentEvent.text_chunk(strands_event["data"], agent_name, session_id, source)
 
         # 도구 사용 이벤트
         elif "current_tool_use" in strands_event:
@@ -319,48 +435,43 @@ class strands_utils():
             tool_id = tool_info.get("toolUseId")
             tool_name = tool_info.get("name", "unknown")
 
-            # toolUseId와 tool_name 매핑 저장
-            if tool_id and tool_name: strands_utils._tool_use_mapping[tool_id] = tool_name
+            # 세션별 tool call registry 에 시작 시각/입력 크기 기록 (toolUseId -> tool_name 매핑 포함)
+            if tool_id and tool_name: get_tool_registry(session_id).start(tool_id, tool_name, agent_name, tool_info.get("input"))
 
-            return {
-                **base_event,
-                "type": "agent_tool_stream",
-                "event_type": "tool_use",
+            return AgentEvent("tool_use", "agent_tool_stream", agent_name, session_id, source, {
                 "tool_name": tool_name,
                 "tool_id": tool_id,
                 "tool_input": tool_info.get("input", {})
-            }
+            })
 
         # message 래퍼 안의 tool result 처리
         if "message" in strands_event:
             message = strands_event["message"]
             if isinstance(message, dict) and "content" in message and isinstance(message["content"], list):
+                registry, result_event = get_tool_registry(session_id), None
                 for content_item in message["content"]:
                     if isinstance(content_item, dict) and "toolResult" in content_item:
                         tool_result = content_item["toolResult"]
                         tool_id = tool_result.get("toolUseId")
-
-                        # 저장된 매핑에서 툴 이름 찾기
-                        tool_name = strands_utils._tool_use_mapping.get(tool_id, "external_tool")
                         output = str(tool_result.get("content", [{}])[0].get("text", "")) if tool_result.get("content") else ""
 
-                        return {
-                            **base_event,
-                            "type": "agent_tool_stream",
-                            "event_type": "tool_result", 
-                            "tool_name": tool_name,
-                            "tool_id": tool_id,
-                            "output": output
-                        }
+                        # 종료 시각/출력 크기/상태 기록 -> 툴별 latency histogram 갱신 (병렬 호출 결과도 모두 기록)
+                        call = registry.end(tool_id, output, tool_result.get("status", "success")) or {}
+                        if result_event is None:
+                            result_event = AgentEvent("tool_result", "agent_tool_stream", agent_name, session_id, source, {
+                                "tool_name": registry.tool_name(tool_id),
+                                "tool_id": tool_id,
+                                "output": output,
+                                "status": call.get("status", tool_result.get("status", "success")),
+                                "duration_ms": round(call["duration_ms"], 1) if "duration_ms" in call else None,
+                            })
+                if result_event is not None: return result_event
 
         # 추론 이벤트
         elif "reasoning" in strands_event and strands_event.get("reasoning"):
-            return {
-                **base_event,
-                "type": "agent_reasoning_stream",
-                "event_type": "reasoning",
+            return AgentEvent("reasoning", "agent_reasoning_stream", agent_name, session_id, source, {
                 "reasoning_text": strands_event.get("reasoningText", "")[:200]
-            }
+            })
 
         return None
 
@@ -385,51 +496,8 @@ class strands_utils():
 
     @staticmethod
     def process_event_for_display(event):
-        """Process events for colored terminal output"""
-        # Initialize colored callbacks for terminal display
-        callback_default = ColoredStreamingCallback('white')
-        callback_reasoning = ColoredStreamingCallback('cyan')        
-        callback_tool = ColoredStreamingCallback('yellow')
-
-        #print ("event", event)
-
-        if event:
-            if event.get("event_type") == "text_chunk":
-                callback_default.on_llm_new_token(event.get('data', ''))
-
-            elif event.get("event_type") == "reasoning":
-                callback_reasoning.on_llm_new_token(event.get('reasoning_text', ''))
-
-            elif event.get("event_type") == "tool_use": 
-                pass
-
-            elif event.get("event_type") == "tool_result":
-                tool_name = event.get("tool_name", "unknown")
-                output = event.get("output", "")
-                print(f"\n[TOOL RESULT - {tool_name}]", flush=True)
-
-                # Parse output based on function name
-                if tool_name == "python_repl_tool" and len(output.split("||")) == 3:
-                    status, code, stdout = output.split("||")
-                    callback_tool.on_llm_new_token(f"Status: {status}\n")
-
-                    if code: callback_tool.on_llm_new_token(f"Code:\n```python\n{code}\n```\n")
-                    if stdout and stdout != 'None': callback_tool.on_llm_new_token(f"Output:\n{stdout}\n")
-
-                elif tool_name == "bash_tool" and len(output.split("||")) == 2:
-                    cmd, stdout = output.split("||")
-                    if cmd: callback_tool.on_llm_new_token(f"CMD:\n```bash\n{cmd}\n```\n")
-                    if stdout and stdout != 'None': callback_tool.on_llm_new_token(f"Output:\n{stdout}\n")
-
-                elif tool_name == "file_read":
-                    # file_read 결과는 보통 길어서 앞부분만 표시
-                    truncated_output = output[:500] + "..." if len(output) > 500 else output
-                    callback_tool.on_llm_new_token(f"File content preview:\n{truncated_output}\n")
-
-                else: # 기타 모든 툴 결과 표시, 코더 툴, 리포터 툴 결과도 다 출력 (for debug)
-                    callback_tool.on_llm_new_token(f"Output: pass - you can see that in debug mode\n")
-                    #callback_default.on_llm_new_token(f"Output: {output}\n")
-                    #pass
+        """Process events for colored terminal output (buffered, frame-rate limited - see utils/terminal_renderer.py)"""
+        terminal_renderer.render(event)
 
 class FunctionNode(MultiAgentBase):
     """Execute deterministic Python functions as graph nodes."""
@@ -451,10 +519,11 @@ class FunctionNode(MultiAgentBase):
     async def invoke_async(self, task=None, invocation_state=None, **kwargs):
         # Execute function (nodes now use global state for data sharing)  
         # Pass task and kwargs directly to function
-        if asyncio.iscoroutinefunction(self.func): 
-            response = await self.func(task=task, **kwargs)
-        else: 
-            response = self.func(task=task, **kwargs)
+        with tracer.span(self.name, "node"):
+            if asyncio.iscoroutinefunction(self.func): 
+                response = await self.func(task=task, **kwargs)
+            else: 
+                response = self.func(task=task, **kwargs)
 
         agent_result = AgentResult(
             stop_reason="end_turn",
@@ -0,0 +1,87 @@
+"""
+Compact AgentCore stream events.
+
+Every streamed token used to become a fresh dict with a datetime.now().isoformat() string. AgentEvent
+keeps the fixed header fields in __slots__, stores a time.monotonic() stamp and only formats the
+ISO timestamp when a consumer actually reads "timestamp". It is a read-only Mapping, so consumers
+keep using event.get("event_type"), event["data"], {**event} and dict(event) (for JSON).
+
+text_chunk events keep their text as a list of pieces, which lets the event queue coalesce
+consecutive chunks of one agent into a single event (see utils/event_queue.py) without building
+intermediate strings; the pieces are joined once, on first read of "data".
+"""
+
+import time
+from datetime import datetime
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+# monotonic -> wall clock 변환용 기준점 (프로세스 시작 시 한 번)
+_WALL_CLOCK_OFFSET = time.time() - time.monotonic()
+
+_HEADER_KEYS = ("timestamp", "session_id", "agent_name", "source", "type", "event_type")
+
+class AgentEvent(Mapping):
+
+    __slots__ = ("session_id", "agent_name", "source", "type", "event_type", "created", "fields", "_pieces", "_size")
+
+    def __init__(self, event_type: str, type: str, agent_name: str, session_id: str, source: str, fields: Optional[Dict[str, Any]] = None, data: Optional[str] = None, created: Optional[float] = None):
+        self.session_id = session_id
+        self.agent_name = agent_name
+        self.source = source
+        self.type = type
+        self.event_type = event_type
+        self.created = time.monotonic() if created is None else created
+        self.fields = fields or {}
+        self._pieces: Optional[List[str]] = None if data is None else [data]
+        self._size = 0 if data is None else len(data)
+
+    @classmethod
+    def text_chunk(cls, data: str, agent_name: str, session_id: str, source: str, created: Optional[float] = None) -> "AgentEvent":
+        return cls("text_chunk", "agent_text_stream", agent_name, session_id, source, data=data, created=created)
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(_WALL_CLOCK_OFFSET + self.created).isoformat()
+
+    @property
+    def data(self) -> str:
+        if len(self._pieces) > 1: self._pieces[:] = ["".join(self._pieces)]
+        return self._pieces[0]
+
+    # ---------- coalescing ----------
+
+    def append_text(self, data: str) -> None:
+        self._pieces.append(data)
+        self._size += len(data)
+        self.fields["chunk_count"] = self.fields.get("chunk_count", 1) + 1
+
+    @property
+    def text_size(self) -> int:
+        return self._size
+
+    # ---------- Mapping ----------
+
+    def _keys(self):
+        yield from _HEADER_KEYS
+        if self._pieces is not None:
+            yield "data"
+            yield "chunk_size"
+        yield from self.fields
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "timestamp": return self.timestamp
+        if key in _HEADER_KEYS: return getattr(self, key)
+        if self._pieces is not None:
+            if key == "data": return self.data
+            if key == "chunk_size": return self._size
+        return self.fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return self._keys()
+
+    def __len__(self) -> int:
+        return len(_HEADER_KEYS) + (2 if self._pieces is not None else 0) + len(self.fields)
+
+    def __repr__(self) -> str:
+        return f"AgentEvent({dict(self)!r})"
@@ -0,0 +1,167 @@
+"""
+Buffered terminal renderer for the AgentCore event stream (main.py).
+
+process_event_for_display used to build three langchain callback handlers per event and issue one
+flushing print per token, so at high token rates terminal I/O became the bottleneck. TerminalRenderer
+appends text to per-agent buffers and writes everything pending in one write() + flush() per frame
+(RENDER_FPS, default 30). Text of agents streaming at the same time stays grouped per agent instead
+of interleaving token by token. Long tool results are collapsed to their first and last lines
+(RENDER_TOOL_OUTPUT_LINES, 0 = no limit).
+
+Usage:
+    async with terminal_renderer.running():      # flushes on a timer while events are quiet
+        async for event in stream: terminal_renderer.render(event)
+"""
+
+import os
+import sys
+import time
+import asyncio
+import contextlib
+from typing import Dict, List, Optional
+
+COLORS = {
+    'blue': '\033[94m',
+    'green': '\033[92m',
+    'yellow': '\033[93m',
+    'red': '\033[91m',
+    'purple': '\033[95m',
+    'cyan': '\033[96m',
+    'white': '\033[97m',
+}
+RESET = '\033[0m'
+DIM = '\033[2m'
+
+def collapse_lines(text: str, max_lines: int) -> str:
+    """Keep the first and last max_lines//2 lines of a long output."""
+    if max_lines <= 0: return text
+    lines = text.split("\n")
+    if len(lines) <= max_lines: return text
+    head, tail = max_lines // 2, max_lines - max_lines // 2
+    return "\n".join(lines[:head] + [f"{DIM}... {len(lines) - max_lines} lines collapsed ...{RESET}{COLORS['yellow']}"] + lines[-tail:])
+
+class TerminalRenderer:
+
+    def __init__(self, stream=None, fps: Optional[float] = None, tool_output_lines: Optional[int] = None):
+        self.stream = stream
+        self.frame_interval = 1.0 / (fps if fps is not None else float(os.environ.get("RENDER_FPS", 30)))
+        self.tool_output_lines = tool_output_lines if tool_output_lines is not None else int(os.environ.get("RENDER_TOOL_OUTPUT_LINES", 40))
+        self._buffers: Dict[str, List[str]] = {}  # "agent" (스트리밍 텍스트) 또는 "" (블록 출력) -> 색상 포함 조각
+        self._current_agent: Optional[str] = None
+        self._last_flush = 0.0
+        self.events = 0
+        self.writes = 0
+
+    # ---------- buffering ----------
+
+    def _append(self, key: str, color: str, text: str):
+        if text: self._buffers.setdefault(key, []).append(f"{COLORS[color]}{text}{RESET}")
+
+    def _block(self, text: str, color: str = 'yellow'):
+        """Non-streaming output (tool results, summaries): goes out in order after the pending agent text."""
+        self.flush()
+        self._append("", color, text)
+        self._current_agent = None
+
+    def flush(self):
+        if not self._buffers: return
+        parts = []
+        for key, pieces in self._buffers.items():
+            if key and key != self._current_agent:
+                # 에이전트가 바뀔 때만 라벨 출력 (같은 에이전트의 연속 출력은 이어서 표시)
+                if self._current_agent is not None: parts.append("\n")
+                parts.append(f"{DIM}[{key}]{RESET} ")
+                self._current_agent = key
+            parts.extend(pieces)
+        self._buffers.clear()
+        stream = self.stream or sys.stdout
+        stream.write("".join(parts))
+        stream.flush()
+        self.writes += 1
+        self._last_flush = time.perf_counter()
+
+    def flush_if_due(self):
+        if self._buffers and time.perf_counter() - self._last_flush >= self.frame_interval: self.flush()
+
+    @contextlib.asynccontextmanager
+    async def running(self):
+        """Flush pending text every frame even when no new events arrive (e.g. during tool execution)."""
+        async def ticker():
+            while True:
+                await asyncio.sleep(self.frame_interval)
+                self.flush_if_due()
+        task = asyncio.create_task(ticker())
+        try:
+            yield self
+        finally:
+            task.cancel()
+            self.flush()
+
+    # ---------- events ----------
+
+    def render(self, event):
+        if not event: return
+        self.events += 1
+        event_type = event.get("event_type")
+
+        if event_type == "text_chunk":
+            self._append(event.get("agent_name") or "agent", 'white', event.get('data', ''))
+
+        elif event_type == "reasoning":
+            self._append(event.get("agent_name") or "agent", 'cyan', event.get('reasoning_text', ''))
+
+        elif event_type == "tool_progress":
+            # 실행 중인 셀의 중간 출력 (python_repl_tool 라이브 스트리밍)
+            prefix = "[stderr] " if event.get("stream") == "stderr" else ""
+            self._append(f"{event.get('tool_name') or 'tool'} output", 'yellow', f"{prefix}{event.get('data', '')}")
+
+        elif event_type == "tool_result":
+            self._block(self._format_tool_result(event.get("tool_name", "unknown"), event.get("output", ""), event.get("duration_ms"), event.get("status")))
+
+        elif event_type == "usage_summary":
+            self._block(self._format_usage_summary(event))
+
+        elif event_type is None and event.get("type") == "workflow_complete":
+            self.flush()
+            return
+
+        self.flush_if_due()
+
+    def _format_tool_result(self, tool_name, output, duration_ms=None, status=None):
+        timing = f" ({duration_ms / 1000:.2f}s{', ' + status if status and status != 'success' else ''})" if duration_ms is not None else ""
+        lines = [f"\n{RESET}\n[TOOL RESULT - {tool_name}]{timing}{COLORS['yellow']}\n"]
+        # Parse output based on function name
+        if tool_name == "python_repl_tool" and len(output.split("||")) == 3:
+            status, code, stdout = output.split("||")
+            lines.append(f"Status: {status}\n")
+            if code: lines.append(f"Code:\n```python\n{collapse_lines(code, self.tool_output_lines)}\n```\n")
+            if stdout and stdout != 'None': lines.append(f"Output:\n{collapse_lines(stdout, self.tool_output_lines)}\n")
+
+        elif tool_name == "bash_tool" and len(output.split("||")) == 2:
+            cmd, stdout = output.split("||")
+            if cmd: lines.append(f"CMD:\n```bash\n{cmd}\n```\n")
+            if stdout and stdout != 'None': lines.append(f"Output:\n{collapse_lines(stdout, self.tool_output_lines)}\n")
+
+        elif tool_name == "file_read":
+            # file_read 결과는 보통 길어서 앞부분만 표시
+            truncated_output = output[:500] + "..." if len(output) > 500 else output
+            lines.append(f"File content preview:\n{truncated_output}\n")
+
+        else: # 기타 툴 결과 (coder/reporter 등) 는 debug 모드에서 확인
+            lines.append("Output: pass - you can see that in debug mode\n")
+        return "".join(lines)
+
+    def _format_usage_summary(self, event):
+        total = event.get("total", {})
+        lines = [f"\n{RESET}\n[USAGE SUMMARY] calls={total.get('calls', 0)} input={total.get('input_tokens', 0)} output={total.get('output_tokens', 0)} "
+                 f"cache_read={total.get('cache_read_tokens', 0)} cache_write={total.get('cache_write_tokens', 0)} cost=${total.get('cost_usd', 0):.4f}{COLORS['yellow']}\n"]
+        for agent, totals in event.get("by_agent", {}).items():
+            lines.append(f"  {agent:<12} calls={totals['calls']:<3} in={totals['input_tokens']:<8} out={totals['output_tokens']:<7} ${totals['cost_usd']:.4f} {totals['duration_ms'] / 1000:.1f}s\n")
+        for tool_name, latency in (event.get("tool_latency") or {}).items():
+            lines.append(f"  {tool_name:<22} calls={latency['calls']:<3} errors={latency['errors']:<2} p50={latency['p50_ms'] / 1000:.2f}s p95={latency['p95_ms'] / 1000:.2f}s max={latency['max_ms'] / 1000:.2f}s\n")
+        estimation = event.get("token_estimation") or {}
+        if estimation.get("calls"):
+            lines.append(f"  token estimate error {estimation['mean_abs_error_pct']}% over {estimation['calls']} calls, {estimation['overflows_avoided']} context overflows avoided ({estimation['trimmed_tokens']} tokens trimmed)\n")
+        return "".join(lines)
+
+terminal_renderer = TerminalRenderer()
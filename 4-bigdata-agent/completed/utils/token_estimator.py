@@ -0,0 +1,207 @@
+"""
+Pre-flight token estimation and context packing for agent calls.
+
+estimate_tokens() counts tokens locally from character classes (Hangul syllables, Latin words,
+digits, symbols, whitespace) in one regex pass per class - no tokenizer download, ~µs per KB.
+The per-class rates are tuned for the Korean-heavy prompts of this workshop and a per-model
+correction factor is learned from the input token counts Bedrock reports (TokenEstimatorHook
+estimates every model call; process_streaming_response_yield reconciles with the real usage and
+logs the error). Factors persist in TOKEN_CALIBRATION_PATH.
+
+pack_context() fits the parts of a user message (latest message, full_plan, clues, ...) into the
+model's remaining context budget by priority before the request is sent, instead of letting
+Bedrock reject it and paying for the failed call, a summarization and a retry.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from strands.hooks import BeforeModelCallEvent, HookProvider, HookRegistry
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# tokens per character (or per match) by character class
+HANGUL = re.compile(r"[가-힣㄰-㆏]")
+CJK = re.compile(r"[぀-ヿ一-鿿]")
+LATIN_WORD = re.compile(r"[A-Za-z]+")
+DIGITS = re.compile(r"[0-9]")
+SYMBOL = re.compile(r"[^\w\s]")
+NEWLINE = re.compile(r"\n")
+TOKEN_RATES = {
+    "hangul": 0.75,      # Hangul syllable ~ 0.75 token
+    "cjk": 1.0,
+    "latin_chars": 0.25, # ~4 Latin letters per token
+    "latin_words": 0.3,  # word boundary overhead
+    "digits": 0.34,      # numbers split into ~3-digit tokens
+    "symbols": 0.6,      # punctuation/markdown, partly merged with neighbours
+    "newlines": 0.5,
+}
+MESSAGE_OVERHEAD_TOKENS = 4
+IMAGE_TOKENS = 1600
+
+class Colors:
+    BLUE = '\033[94m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+def _raw_estimate(text: str) -> float:
+    if not text: return 0.0
+    latin_words = LATIN_WORD.findall(text)
+    return (
+        len(HANGUL.findall(text)) * TOKEN_RATES["hangul"]
+        + len(CJK.findall(text)) * TOKEN_RATES["cjk"]
+        + sum(map(len, latin_words)) * TOKEN_RATES["latin_chars"]
+        + len(latin_words) * TOKEN_RATES["latin_words"]
+        + len(DIGITS.findall(text)) * TOKEN_RATES["digits"]
+        + len(SYMBOL.findall(text)) * TOKEN_RATES["symbols"]
+        + len(NEWLINE.findall(text)) * TOKEN_RATES["newlines"]
+    )
+
+class TokenCalibration:
+    """Per-model correction factor (actual / estimated input tokens), exponential moving average."""
+
+    def __init__(self, path=None, alpha=0.2):
+        self.path = path or os.environ.get("TOKEN_CALIBRATION_PATH", "./.cache/token_calibration.json")
+        self.alpha = alpha
+        self.learn = os.environ.get("TOKEN_CALIBRATION", "on").lower() in ("1", "on", "true")
+        self._lock = threading.Lock()
+        self.factors: Dict[str, float] = {}
+        self.reset_stats()
+        try:
+            with open(self.path, encoding="utf-8") as f: self.factors = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def reset_stats(self):
+        self.stats = {"calls": 0, "abs_error_pct_sum": 0.0, "overflows_avoided": 0, "trimmed_tokens": 0}
+
+    def factor(self, model_id: Optional[str]) -> float:
+        return self.factors.get(model_id or "default", self.factors.get("default", 1.0))
+
+    def update(self, model_id: Optional[str], estimated: int, actual: int) -> float:
+        """Record one reconciled call and return the estimate error in percent."""
+        if estimated <= 0 or actual <= 0: return 0.0
+        error_pct = (estimated - actual) / actual * 100
+        ratio = min(4.0, max(0.25, actual / (estimated / self.factor(model_id))))  # 이상치 한 번에 factor 가 튀지 않도록 제한
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["abs_error_pct_sum"] += abs(error_pct)
+            if not self.learn: return error_pct
+            for key in (model_id or "default", "default"):
+                previous = self.factors.get(key, 1.0)
+                self.factors[key] = round((1 - self.alpha) * previous + self.alpha * ratio, 4)
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                tmp_path = f"{self.path}.tmp.{os.getpid()}"
+                with open(tmp_path, "w", encoding="utf-8") as f: json.dump(self.factors, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+        return error_pct
+
+    def summary(self):
+        calls = self.stats["calls"]
+        return {"calls": calls, "overflows_avoided": self.stats["overflows_avoided"], "trimmed_tokens": self.stats["trimmed_tokens"], "mean_abs_error_pct": round(self.stats["abs_error_pct_sum"] / calls, 2) if calls else None, "factors": dict(self.factors)}
+
+calibration = TokenCalibration()
+
+def estimate_tokens(text: str, model_id: Optional[str] = None) -> int:
+    return int(_raw_estimate(text) * calibration.factor(model_id) + 0.5)
+
+def _content_text(block) -> str:
+    if "text" in block: return block["text"]
+    if "toolUse" in block: return json.dumps(block["toolUse"].get("input", {}), ensure_ascii=False) + block["toolUse"].get("name", "")
+    if "toolResult" in block: return "".join(_content_text(item) for item in block["toolResult"].get("content", []))
+    if "json" in block: return json.dumps(block["json"], ensure_ascii=False)
+    if "reasoningContent" in block: return block["reasoningContent"].get("reasoningText", {}).get("text", "")
+    return ""
+
+def estimate_message_tokens(message, model_id: Optional[str] = None) -> int:
+    raw = MESSAGE_OVERHEAD_TOKENS + sum(IMAGE_TOKENS if "image" in block else _raw_estimate(_content_text(block)) for block in message.get("content", []))
+    return int(raw * calibration.factor(model_id) + 0.5)
+
+class TokenEstimatorHook(HookProvider):
+    """Estimates the input tokens of every model call of one agent so they can be reconciled with Bedrock usage."""
+
+    def __init__(self, model_id=None, context_window=200000):
+        self.model_id = model_id
+        self.context_window = context_window
+        self.estimated_input_tokens = 0
+        self._fixed_tokens = None
+        self._message_memo: Dict[int, Tuple[Any, int]] = {}  # id(message) -> (message, tokens)
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+
+    def _before_model_call(self, event: BeforeModelCallEvent):
+        agent = event.agent
+        if self._fixed_tokens is None:
+            # system prompt + tool specs 는 호출마다 동일
+            tool_specs = json.dumps(agent.tool_registry.get_all_tool_specs(), ensure_ascii=False)
+            system_prompt = agent.system_prompt if isinstance(agent.system_prompt, str) else ""
+            self._fixed_tokens = estimate_tokens(system_prompt, self.model_id) + estimate_tokens(tool_specs, self.model_id)
+        total = self._fixed_tokens
+        for message in agent.messages:
+            cached = self._message_memo.get(id(message))
+            if cached is None or cached[0] is not message:
+                cached = (message, estimate_message_tokens(message, self.model_id))
+                self._message_memo[id(message)] = cached
+            total += cached[1]
+        self.estimated_input_tokens += total
+
+    def reconcile(self, actual_input_tokens: int) -> Dict[str, Any]:
+        """Compare the estimate for this invocation with Bedrock's count, update calibration and reset."""
+        estimated, self.estimated_input_tokens = self.estimated_input_tokens, 0
+        error_pct = calibration.update(self.model_id, estimated, actual_input_tokens)
+        return {"estimated_input_tokens": estimated, "estimate_error_pct": round(error_pct, 1)}
+
+def _truncate(text: str, tokens: int, keep: str, model_id=None) -> str:
+    total = estimate_tokens(text, model_id)
+    if total <= tokens: return text
+    chars = max(0, int(len(text) * tokens / total))
+    marker = f"\n...[{total - tokens} tokens omitted to fit the context window]...\n"
+    return marker + text[len(text) - chars:] if keep == "tail" else text[:chars] + marker
+
+def pack_context(agent, parts: List[Tuple[str, str, int, str]], separator: str = "\n\n", agent_name: str = "agent") -> str:
+    """
+    Join message parts, trimming the lowest-priority ones to fit the model's context budget.
+
+    parts: (name, text, priority, keep) - priority 0 is kept first; keep="head"/"tail" says which end
+    of a trimmed part survives (e.g. clues keep their most recent tail).
+    Budget = CONTEXT_BUDGET_RATIO * context window - max_tokens - system prompt - conversation so far.
+    """
+    started = time.perf_counter()
+    model_id = agent.model.config.get("model_id")
+    token_estimator = getattr(agent, "token_estimator", None)
+    window = token_estimator.context_window if token_estimator is not None else 200000
+    ratio = float(os.environ.get("CONTEXT_BUDGET_RATIO", 0.9))
+    system_prompt = agent.system_prompt if isinstance(agent.system_prompt, str) else ""
+    used = estimate_tokens(system_prompt, model_id) + sum(estimate_message_tokens(message, model_id) for message in agent.messages)
+    budget = int(window * ratio) - int(agent.model.config.get("max_tokens") or 0) - used
+
+    sizes = {name: estimate_tokens(text, model_id) for name, text, _, _ in parts}
+    packed, remaining = {}, budget
+    for name, text, _, keep in sorted(parts, key=lambda part: part[2]):
+        if sizes[name] <= remaining:
+            packed[name] = text
+        elif remaining > 200:
+            packed[name] = _truncate(text, remaining, keep, model_id)
+        else:
+            packed[name] = ""
+        remaining -= min(sizes[name], max(remaining, 0))
+
+    total = sum(sizes.values())
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if total > budget:
+        calibration.stats["overflows_avoided"] += 1
+        calibration.stats["trimmed_tokens"] += total - budget
+        logger.info(f"{Colors.YELLOW}{agent_name.upper()} - context packed: ~{total} > budget {budget} tokens, trimmed {', '.join(name for name, text, _, _ in parts if packed[name] != text)} ({elapsed_ms:.1f}ms){Colors.END}")
+    else:
+        logger.debug(f"{agent_name.upper()} - pre-flight ~{total + used} tokens of {window} ({elapsed_ms:.1f}ms)")
+    return separator.join(packed[name] for name, _, _, _ in parts if packed[name])
@@ -0,0 +1,179 @@
+"""
+Tool-result compaction and offloading for agent conversation history.
+
+handle_python_repl_tool only shortened the echoed code; the full stdout of a cell (print(df) dumps,
+Glue `Output` dicts, long bash listings) stayed in agent.messages and was re-sent on every following
+model call, so the per-cycle prompt grew with tool verbosity. ToolOutputCompactor (a strands hook added
+to every agent by strands_utils.get_agent) now applies two rules to the tools in TOOL_OUTPUT_TOOLS:
+
+    offload : a result longer than TOOL_OUTPUT_MAX_CHARS is written in full to
+              ./artifacts/tool_outputs/<tool>_<id>.txt and replaced in history by a compact summary
+              (consecutive duplicate lines collapsed, first TOOL_OUTPUT_HEAD_LINES and last
+              TOOL_OUTPUT_TAIL_LINES lines kept, pointer to the file).
+    stale   : TOOL_RESULT_STALE_CYCLES model calls after a result entered history (0 = never), it is
+              replaced by a one-line reference to its file (written then if it was short). The toolResult
+              block and its toolUseId stay, so the conversation remains valid for Bedrock.
+
+The agent can always read the full output back from the referenced file. The reference is written as
+./artifacts/..., which python_repl_tool, bash_tool and file_read (tools/file_read.py) resolve to the
+calling run's artifact directory (artifact_store.resolve_paths), so it stays valid for concurrent and
+MCP runs where the ./artifacts link points to another run or does not exist.
+TOOL_OUTPUT_COMPACTION=off disables both rules.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from strands.hooks import AfterToolCallEvent, BeforeModelCallEvent, HookProvider, HookRegistry
+
+from utils.artifact_store import artifact_store
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+COMPACTION_ENABLED = os.environ.get("TOOL_OUTPUT_COMPACTION", "on").lower() in ("1", "on", "true")
+COMPACT_TOOLS = {name.strip() for name in os.environ.get("TOOL_OUTPUT_TOOLS", "python_repl_tool,bash_tool,glue_bigdata_tool").split(",") if name.strip()}
+MAX_CHARS = int(os.environ.get("TOOL_OUTPUT_MAX_CHARS", 3000))
+HEAD_LINES = int(os.environ.get("TOOL_OUTPUT_HEAD_LINES", 30))
+TAIL_LINES = int(os.environ.get("TOOL_OUTPUT_TAIL_LINES", 15))
+STALE_CYCLES = int(os.environ.get("TOOL_RESULT_STALE_CYCLES", 3))
+MAX_LINE_CHARS = 300        # 요약에 남기는 한 줄의 최대 길이
+MIN_STALE_CHARS = 300       # 이보다 짧은 결과는 오래되어도 그대로 둠 (참조 문구와 길이 차이가 없음)
+OUTPUT_SUBDIR = "tool_outputs"
+SAFE_NAME = re.compile(r"[^\w.-]+")
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+_stats_lock = threading.Lock()
+_stats = {"offloaded": 0, "stale_replaced": 0, "chars_before": 0, "chars_after": 0}
+
+def _count(name, value=1):
+    with _stats_lock: _stats[name] += value
+
+def get_tool_output_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        saved = _stats["chars_before"] - _stats["chars_after"]
+        return {**_stats, "chars_saved": saved}
+
+def dedupe_lines(lines: List[str]) -> List[str]:
+    """Collapse runs of identical lines into one line plus a repeat count."""
+    collapsed, previous, repeats = [], None, 0
+    for line in lines + [None]:
+        if line == previous:
+            repeats += 1
+            continue
+        if repeats: collapsed.append(f"... (previous line repeated {repeats} more times)")
+        if line is not None: collapsed.append(line)
+        previous, repeats = line, 0
+    return collapsed
+
+def summarize(text: str, reference: str, head_lines: int = HEAD_LINES, tail_lines: int = TAIL_LINES) -> str:
+    """Head/tail summary of a long tool output with a pointer to the full text."""
+    lines = [line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + f" ... (+{len(line) - MAX_LINE_CHARS} chars)" for line in dedupe_lines(text.splitlines())]
+    if len(lines) > head_lines + tail_lines:
+        lines = lines[:head_lines] + [f"... ({len(lines) - head_lines - tail_lines} lines omitted) ..."] + lines[-tail_lines:]
+    # 줄 수가 적어도 전체 길이가 크면 (한 줄짜리 dict 등) 문자 단위로 자름
+    body = "\n".join(lines)
+    if len(body) > MAX_CHARS:
+        half = MAX_CHARS // 2
+        body = f"{body[:half]}\n... ({len(body) - 2 * half} chars omitted) ...\n{body[-half:]}"
+    return f"{body}\n[Full output ({len(text):,} chars, {len(text.splitlines()):,} lines) saved to {reference}]"
+
+class ToolOutputCompactor(HookProvider):
+    """Offloads long tool results of one agent and replaces stale ones with file references."""
+
+    def __init__(self, agent_name="agent", tools=None, max_chars=MAX_CHARS, stale_cycles=STALE_CYCLES):
+        self.agent_name = agent_name
+        self.tools = COMPACT_TOOLS if tools is None else set(tools)
+        self.max_chars = max_chars
+        self.stale_cycles = stale_cycles
+        self.cycle = 0
+        self._results = {}  # toolUseId -> {"tool", "cycle", "reference", "stale", "chars"}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+
+    # ---------- files ----------
+
+    def _offload(self, tool_name: str, tool_use_id: str, text: str) -> Optional[str]:
+        """Write the full output under the run's artifact directory; returns the ./artifacts/... reference
+        (resolved back to this run by the agent's tools, see resolve_paths)."""
+        name = SAFE_NAME.sub("_", f"{self.agent_name}_{tool_name}_{tool_use_id[-16:]}") + ".txt"
+        try:
+            directory = os.path.join(artifact_store.run_dir(), OUTPUT_SUBDIR)
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as f: f.write(text)
+        except OSError as e:
+            logger.warning(f"{Colors.YELLOW}Could not offload {tool_name} output: {e}{Colors.END}")
+            return None
+        return f"./artifacts/{OUTPUT_SUBDIR}/{name}"
+
+    @staticmethod
+    def _text(content: List[Dict[str, Any]]) -> str:
+        parts = []
+        for block in content:
+            if "text" in block: parts.append(block["text"])
+            elif "json" in block: parts.append(json.dumps(block["json"], ensure_ascii=False, default=str))
+        return "\n".join(parts)
+
+    # ---------- hooks ----------
+
+    def _after_tool_call(self, event: AfterToolCallEvent):
+        tool_name, result = event.tool_use.get("name"), event.result
+        if not COMPACTION_ENABLED or tool_name not in self.tools: return
+        tool_use_id = result.get("toolUseId") or event.tool_use.get("toolUseId", "")
+        entry = {"tool": tool_name, "cycle": self.cycle, "reference": None, "stale": False, "chars": None}
+        self._results[tool_use_id] = entry
+        content = result.get("content", [])
+        if any("text" not in block and "json" not in block for block in content): return  # 이미지 등은 그대로 둠
+
+        text = self._text(content)
+        if len(text) <= self.max_chars: return
+        reference = self._offload(tool_name, tool_use_id, text)
+        if reference is None: return
+        entry["reference"], entry["chars"] = reference, len(text)
+        compact = summarize(text, reference)
+        event.result = {**result, "content": [{"text": compact}]}
+        _count("offloaded")
+        _count("chars_before", len(text))
+        _count("chars_after", len(compact))
+        logger.info(f"{Colors.GREEN}{self.agent_name.upper()} - {tool_name} output offloaded ({len(text):,} -> {len(compact):,} chars, {reference}){Colors.END}")
+
+    def _before_model_call(self, event: BeforeModelCallEvent):
+        self.cycle += 1
+        if not COMPACTION_ENABLED or not self._results: return
+        messages = event.agent.messages
+        for position, message in enumerate(messages):
+            content = message.get("content", [])
+            if not any("toolResult" in block for block in content): continue
+            replaced = [self._stale_block(block) if "toolResult" in block else block for block in content]
+            if any(new is not old for new, old in zip(replaced, content)):
+                # 새 메시지 객체로 교체 (TokenEstimatorHook 의 메시지별 memo 가 갱신되도록)
+                messages[position] = {**message, "content": replaced}
+
+    def _stale_block(self, block):
+        result = block["toolResult"]
+        entry = self._results.get(result.get("toolUseId"))
+        if entry is None or entry["stale"] or self.stale_cycles <= 0 or self.cycle - entry["cycle"] <= self.stale_cycles: return block
+        content = result.get("content", [])
+        if any("text" not in item and "json" not in item for item in content): return block
+        text = self._text(content)
+        entry["stale"] = True
+        if entry["reference"] is None:
+            if len(text) < MIN_STALE_CHARS: return block
+            entry["reference"] = self._offload(entry["tool"], result.get("toolUseId", ""), text)
+            if entry["reference"] is None: return block
+        preview = " ".join(text.split())[:160]
+        reference = f"[{entry['tool']} output from an earlier step moved to {entry['reference']} ({entry['chars'] or len(text):,} chars, starts with: {preview}). Read that file if you need it again.]"
+        _count("stale_replaced")
+        _count("chars_before", len(text))
+        _count("chars_after", len(reference))
+        return {"toolResult": {**result, "content": [{"text": reference}]}}
@@ -0,0 +1,131 @@
+"""
+Per-session registry of tool calls with rolling latency histograms.
+
+_convert_to_agentcore_event used a class-level toolUseId -> tool name dict that grew forever and was
+shared by every session. ToolCallRegistry is bounded (TOOL_REGISTRY_MAX_CALLS, oldest calls evicted
+first) and records, for every call, the agent, start time (first tool_use event), end time
+(tool_result event), input/output sizes and status. Finished calls feed a per-tool rolling
+LatencyHistogram (last TOOL_LATENCY_WINDOW calls), and calls slower than TOOL_SLOW_FACTOR x the
+tool's p95 (once it has enough samples) are logged as they finish.
+"""
+
+import os
+import time
+import bisect
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+TOOL_REGISTRY_MAX_CALLS = int(os.environ.get("TOOL_REGISTRY_MAX_CALLS", 512))
+TOOL_REGISTRY_MAX_SESSIONS = int(os.environ.get("TOOL_REGISTRY_MAX_SESSIONS", 32))
+TOOL_LATENCY_WINDOW = int(os.environ.get("TOOL_LATENCY_WINDOW", 200))
+TOOL_SLOW_FACTOR = float(os.environ.get("TOOL_SLOW_FACTOR", 2.0))
+TOOL_SLOW_MIN_SAMPLES = 10
+
+# histogram bucket upper bounds (ms)
+LATENCY_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000)
+
+class Colors:
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+class LatencyHistogram:
+    """Latencies of the last `window` calls of one tool: bucket counts and percentiles."""
+
+    def __init__(self, window=TOOL_LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.total_calls = 0
+        self.errors = 0
+
+    def add(self, duration_ms: float, ok: bool = True):
+        self.samples.append(duration_ms)
+        self.total_calls += 1
+        if not ok: self.errors += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples: return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def buckets(self) -> Dict[str, int]:
+        counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        for sample in self.samples: counts[bisect.bisect_left(LATENCY_BUCKETS_MS, sample)] += 1
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {label: count for label, count in zip(labels, counts) if count}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.total_calls,
+            "errors": self.errors,
+            "p50_ms": round(self.percentile(0.5), 1) if self.samples else None,
+            "p95_ms": round(self.percentile(0.95), 1) if self.samples else None,
+            "max_ms": round(max(self.samples), 1) if self.samples else None,
+            "histogram": self.buckets(),
+        }
+
+class ToolCallRegistry:
+
+    def __init__(self, session_id: str, max_calls: int = TOOL_REGISTRY_MAX_CALLS):
+        self.session_id = session_id
+        self.max_calls = max_calls
+        self.calls: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # toolUseId -> call record
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def start(self, tool_id: str, tool_name: str, agent_name: Optional[str] = None, tool_input: Any = None):
+        """Register a tool_use event. Strands streams the input in pieces, so later events only update its size."""
+        input_size = len(tool_input) if isinstance(tool_input, str) else len(str(tool_input or ""))
+        with self._lock:
+            call = self.calls.get(tool_id)
+            if call is None:
+                call = {"tool_id": tool_id, "tool_name": tool_name, "agent_name": agent_name, "started": time.monotonic(), "status": "running"}
+                self.calls[tool_id] = call
+                while len(self.calls) > self.max_calls: self.calls.popitem(last=False)
+            call["input_size"] = input_size
+
+    def end(self, tool_id: str, output: str = "", status: str = "success") -> Optional[Dict[str, Any]]:
+        """Register the tool_result event; returns the finished call (None for unknown ids)."""
+        with self._lock:
+            call = self.calls.get(tool_id)
+            if call is None or call["status"] != "running": return call
+            call.update(status=status, output_size=len(output or ""), duration_ms=(time.monotonic() - call["started"]) * 1000)
+            histogram = self.histograms.setdefault(call["tool_name"], LatencyHistogram())
+            p95 = histogram.percentile(0.95) if len(histogram.samples) >= TOOL_SLOW_MIN_SAMPLES else None
+            histogram.add(call["duration_ms"], ok=status == "success")
+
+        if p95 and call["duration_ms"] > TOOL_SLOW_FACTOR * p95:
+            logger.warning(f"{Colors.YELLOW}Slow tool call: {call['tool_name']} ({call['agent_name']}) took {call['duration_ms'] / 1000:.1f}s, p95 {p95 / 1000:.1f}s{Colors.END}")
+        return call
+
+    def tool_name(self, tool_id: str, default: str = "external_tool") -> str:
+        call = self.calls.get(tool_id)
+        return call["tool_name"] if call else default
+
+    def in_flight(self):
+        """Calls that have started but not returned yet, with their running time."""
+        now = time.monotonic()
+        with self._lock:
+            return [{"tool_name": call["tool_name"], "agent_name": call["agent_name"], "running_ms": round((now - call["started"]) * 1000, 1)}
+                    for call in self.calls.values() if call["status"] == "running"]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {tool_name: histogram.summary() for tool_name, histogram in sorted(self.histograms.items())}
+
+_registries: "OrderedDict[str, ToolCallRegistry]" = OrderedDict()
+_registries_lock = threading.Lock()
+
+def get_tool_registry(session_id: str) -> ToolCallRegistry:
+    """Registry of one session (least recently used sessions are dropped beyond TOOL_REGISTRY_MAX_SESSIONS)."""
+    with _registries_lock:
+        registry = _registries.get(session_id)
+        if registry is None:
+            registry = _registries[session_id] = ToolCallRegistry(session_id)
+            while len(_registries) > TOOL_REGISTRY_MAX_SESSIONS: _registries.popitem(last=False)
+        else:
+            _registries.move_to_end(session_id)
+        return registry
@@ -0,0 +1,165 @@
+"""
+Lightweight tracing spans for graph nodes, agent tools, LLM streams and tool executions.
+
+Spans are linked parent -> child through a ContextVar. asyncio.to_thread / asyncio.run / create_task
+copy the current context, so spans opened inside agent tools (which run their own event loop in a
+worker thread) still attach to the supervisor node that called them.
+
+Async generators run in their consumer's context, so a span held open across `yield` must not stay
+current there: open it with span(..., activate=False) and make it current only around each step of
+the wrapped stream with activate(span) (see process_streaming_response_yield).
+
+Enable with TRACING=on (or main.py --trace_dir); export with export_jsonl() / export_chrome_trace()
+and open the .trace.json file in chrome://tracing or https://ui.perfetto.dev as a flame timeline.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+
+    __slots__ = ("name", "kind", "span_id", "parent_id", "trace_id", "start", "end", "thread_id", "attributes", "status", "_start_perf")
+
+    def __init__(self, name, kind, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.trace_id = trace_id
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        self.end = None
+        self.thread_id = threading.get_ident()
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def elapsed(self):
+        """Seconds since the span started (monotonic)."""
+        return time.perf_counter() - self._start_perf
+
+    def finish(self):
+        self.end = self.start + self.elapsed()
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round((self.end - self.start) * 1000, 3) if self.end else None,
+            "thread_id": self.thread_id,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+class Tracer:
+
+    def __init__(self):
+        self.enabled = os.environ.get("TRACING", "off").lower() in ("1", "on", "true")
+        self.trace_id = uuid.uuid4().hex
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def start_trace(self, trace_id=None):
+        """Begin a new trace (one per workflow run) and drop spans from the previous one."""
+        with self._lock:
+            self.trace_id = trace_id or uuid.uuid4().hex
+            self._spans = []
+        return self.trace_id
+
+    @contextmanager
+    def span(self, name, kind="internal", activate=True, **attributes):
+        """Record a span under the current one; activate=False leaves the current span unchanged (async generators)."""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(name, kind, self.trace_id, parent.span_id if parent else None, attributes)
+        token = _current_span.set(span) if activate else None
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=repr(e)[:500])
+            raise
+        finally:
+            span.finish()
+            if token is not None: _current_span.reset(token)
+            with self._lock: self._spans.append(span)
+
+    @contextmanager
+    def activate(self, span: Optional[Span]):
+        """Make `span` the parent of spans opened inside the block (no-op for None)."""
+        if span is None:
+            yield
+            return
+        token = _current_span.set(span)
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [span.to_dict() for span in self._spans]
+
+    def export_jsonl(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in sorted(self.spans(), key=lambda span: span["start"]):
+                f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+        return path
+
+    def export_chrome_trace(self, path):
+        """Chrome trace event format ("X" complete events), one row per thread."""
+        spans = self.spans()
+        if not spans: return None
+        origin = min(span["start"] for span in spans)
+        lanes = {}
+        events = []
+        for span in sorted(spans, key=lambda span: span["start"]):
+            lane = lanes.setdefault(span["thread_id"], len(lanes) + 1)
+            events.append({
+                "name": span["name"],
+                "cat": span["kind"],
+                "ph": "X",
+                "ts": (span["start"] - origin) * 1e6,
+                "dur": (span["end"] - span["start"]) * 1e6,
+                "pid": 1,
+                "tid": lane,
+                "args": {"span_id": span["span_id"], "parent_id": span["parent_id"], "status": span["status"], **span["attributes"]},
+            })
+        events.extend({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": f"thread-{lane}"}} for lane in lanes.values())
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.trace_id}}, f, ensure_ascii=False, default=str)
+        return path
+
+    def export(self, trace_dir):
+        """Write <trace_id>.jsonl and <trace_id>.trace.json into trace_dir."""
+        jsonl_path = self.export_jsonl(os.path.join(trace_dir, f"{self.trace_id}.jsonl"))
+        chrome_path = self.export_chrome_trace(os.path.join(trace_dir, f"{self.trace_id}.trace.json"))
+        logger.info(f"Trace exported: {jsonl_path}, {chrome_path}")
+        return jsonl_path, chrome_path
+
+tracer = Tracer()
@@ -0,0 +1,109 @@
+"""
+Per-run token and cost ledger aggregated across all agents.
+
+process_streaming_response_yield records one step per agent stream (token deltas taken from the
+Strands event_loop_metrics) and StreamableGraph emits the totals as a `usage_summary` event right
+before `workflow_complete`. Set RUN_BUDGET_USD to stop a run before it starts another agent call
+once the estimated spend is over budget.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+
+# USD per 1M tokens: (input, output, cache read, cache write). Matched by substring of the model id.
+MODEL_PRICING = {
+    "claude-sonnet-4-5": (3.00, 15.00, 0.30, 3.75),
+    "claude-sonnet-4": (3.00, 15.00, 0.30, 3.75),
+    "claude-3-7-sonnet": (3.00, 15.00, 0.30, 3.75),
+    "claude-3-5-sonnet": (3.00, 15.00, 0.30, 3.75),
+    "claude-opus-4": (15.00, 75.00, 1.50, 18.75),
+    "claude-haiku-4-5": (1.00, 5.00, 0.10, 1.25),
+    "claude-3-5-haiku": (0.80, 4.00, 0.08, 1.00),
+    "claude-3-haiku": (0.25, 1.25, 0.03, 0.30),
+    "nova-micro": (0.035, 0.14, 0.00875, 0.035),
+    "nova-lite": (0.06, 0.24, 0.015, 0.06),
+    "nova-pro": (0.80, 3.20, 0.20, 0.80),
+}
+
+class Colors:
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+class BudgetExceededError(Exception):
+    """Raised before a new agent call when the run's estimated cost is over RUN_BUDGET_USD."""
+
+def estimate_cost(model_id: Optional[str], usage: Dict[str, int]) -> float:
+    for model_key, prices in MODEL_PRICING.items():
+        if model_id and model_key in model_id:
+            return sum(usage.get(field, 0) * price for field, price in zip(TOKEN_FIELDS, prices)) / 1_000_000
+    return 0.0
+
+def _empty_totals():
+    return {**{field: 0 for field in TOKEN_FIELDS}, "cost_usd": 0.0, "calls": 0, "duration_ms": 0.0}
+
+class UsageLedger:
+
+    def __init__(self, budget_usd=None):
+        budget = budget_usd if budget_usd is not None else os.environ.get("RUN_BUDGET_USD")
+        self.budget_usd = float(budget) if budget else None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.steps: List[Dict[str, Any]] = []
+            self.by_agent = defaultdict(_empty_totals)
+            self.by_model = defaultdict(_empty_totals)
+            self.total = _empty_totals()
+
+    def record(self, agent_name: str, model_id: Optional[str], usage: Dict[str, int], duration_ms: float = 0.0, source: Optional[str] = None) -> Dict[str, Any]:
+        """Add one agent call (token delta) to the ledger and return the step entry."""
+        cost = estimate_cost(model_id, usage)
+        with self._lock:
+            step = {
+                "step": len(self.steps) + 1,
+                "timestamp": time.time(),
+                "agent_name": agent_name,
+                "model_id": model_id,
+                "source": source,
+                **{field: usage.get(field, 0) for field in TOKEN_FIELDS},
+                "cost_usd": round(cost, 6),
+                "duration_ms": round(duration_ms, 1),
+            }
+            self.steps.append(step)
+            for totals in (self.by_agent[agent_name], self.by_model[model_id or "unknown"], self.total):
+                for field in TOKEN_FIELDS: totals[field] += step[field]
+                totals["cost_usd"] += cost
+                totals["calls"] += 1
+                totals["duration_ms"] += duration_ms
+            step["run_cost_usd"] = round(self.total["cost_usd"], 6)
+        return step
+
+    def check_budget(self):
+        if self.budget_usd is None: return
+        if self.total["cost_usd"] >= self.budget_usd:
+            raise BudgetExceededError(f"Run budget exceeded: ${self.total['cost_usd']:.4f} spent, budget ${self.budget_usd:.4f}")
+
+    def summary(self) -> Dict[str, Any]:
+        def rounded(totals):
+            return {**totals, "cost_usd": round(totals["cost_usd"], 6), "duration_ms": round(totals["duration_ms"], 1)}
+        with self._lock:
+            return {
+                "total": rounded(self.total),
+                "by_agent": {agent: rounded(totals) for agent, totals in self.by_agent.items()},
+                "by_model": {model: rounded(totals) for model, totals in self.by_model.items()},
+                "budget_usd": self.budget_usd,
+                "steps": list(self.steps),
+            }
+
+usage_ledger = UsageLedger()